@@ -3,25 +3,32 @@
 # =========================
 import os
 import json
+import functools
 from datetime import datetime
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
 
 # =========================
 # THIRD-PARTY LIBRARIES
 # =========================
-import joblib
-import openai
-from dotenv import load_dotenv
 import numpy as np
 
+from app.env import load_env
+
 
 # =========================
 # ENVIRONMENT & CONFIGURATION
 # =========================
-load_dotenv()
+load_env()
 
-openai.api_key = os.getenv("OPENAI_API_KEY")
-MODEL_NAME = os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
+from app.executors import run_in_thread
+from app.llm_client import (
+    chat_completion,
+    stream_chat_completion,
+    upstream_unavailable_errors,
+)
+from app.llm_gate import LLMOverloadedError
+from app.metrics import stage
+from app.prompt_context import build_cars_context, count_tokens
 
 # =========================
 # PROJECT PATHS (CRITICAL)
@@ -103,7 +110,19 @@ def load_car_data() -> List[dict]:
 # =========================
 # MARKET VALUE ESTIMATION
 # =========================
-def estimate_market_value(car_data: dict) -> float:
+def estimate_market_value(car_data: dict, market_cube=None) -> float:
+    """
+    Fair market value of a car
+
+    With a MarketCube the value starts from the median asking price of
+    comparable listings (same segment, or the nearest coarser one) and
+    is adjusted for mileage. Without one, or when no segment has enough
+    listings, the rule-based estimate from the car's own price is used.
+    """
+    reference = market_cube.lookup(car_data) if market_cube else None
+    if reference:
+        return estimate_from_market_reference(car_data, reference)
+
     price = safe_float(car_data.get("price_numeric"), 20000)
     brand = car_data.get("brand", "")
     year = car_data.get("year_numeric")
@@ -161,6 +180,26 @@ def estimate_market_value(car_data: dict) -> float:
     )
 
 
+def estimate_from_market_reference(car_data: dict, reference: dict) -> float:
+    """Segment median adjusted for this car's mileage vs its age"""
+    median = reference["median"]
+
+    age = calculate_age(car_data.get("year_numeric"))
+    mileage = safe_float(car_data.get("mileage_numeric"), 0)
+    mileage_diff = mileage - age * 15000
+
+    mileage_adjustment = (
+        -(mileage_diff / 10000) * 500
+        if mileage_diff > 0
+        else (abs(mileage_diff) / 10000) * 300
+    )
+
+    return round(
+        max(median * 0.85, min(median * 1.2, median + mileage_adjustment)),
+        2
+    )
+
+
 # =========================
 # RISK SCORE
 # =========================
@@ -196,9 +235,9 @@ def calculate_risk_score(car_data: dict) -> float:
 # =========================
 # PROFIT & RECOMMENDATION
 # =========================
-def calculate_profit_and_recommendation(car_data: dict) -> dict:
+def calculate_profit_and_recommendation(car_data: dict, market_cube=None) -> dict:
     price = safe_float(car_data.get("price_numeric"), 0)
-    estimated_value = estimate_market_value(car_data)
+    estimated_value = estimate_market_value(car_data, market_cube)
     risk_score = calculate_risk_score(car_data)
 
     age = calculate_age(car_data.get("year_numeric"))
@@ -236,11 +275,38 @@ def calculate_profit_and_recommendation(car_data: dict) -> dict:
 # =========================
 # ML PRICE PREDICTION (SAFE)
 # =========================
-def predict_car_price_ml(car_data: dict) -> float:
+_ml_model_version: Optional[str] = None
+
+
+@functools.lru_cache(maxsize=1)
+def _load_ml_model(path: str, mtime_ns: int):
+    global _ml_model_version
+    import joblib  # ~0.1s import, only needed once a model exists
+
+    model = joblib.load(path)
+    _ml_model_version = datetime.fromtimestamp(mtime_ns / 1e9).isoformat(timespec="seconds")
+    return model
+
+
+def ml_model_version() -> Optional[str]:
+    """Modification time of the loaded model file (None: no model loaded)"""
+    return _ml_model_version
+
+
+def load_ml_model():
+    """
+    Trained price model, loaded once (again when the file changes)
+
+    Raises FileNotFoundError when no model has been trained yet.
+    """
     if not os.path.exists(ML_MODEL_PATH):
         raise FileNotFoundError("ML model not found")
 
-    model = joblib.load(ML_MODEL_PATH)
+    return _load_ml_model(ML_MODEL_PATH, os.stat(ML_MODEL_PATH).st_mtime_ns)
+
+
+def predict_car_price_ml(car_data: dict) -> float:
+    model = load_ml_model()
 
     current_year = datetime.now().year
 
@@ -295,199 +361,365 @@ BRAND_KEYWORDS = {
 }
 
 
-def _extract_brand_filter(prompt: str) -> List[str]:
-    """Extract brand names or country keywords from user prompt"""
-    prompt_lower = prompt.lower()
-    matched_brands = []
-
-    # Country keywords
-    for country, brands in BRAND_KEYWORDS.items():
-        if country in prompt_lower:
-            matched_brands.extend(brands)
+# Candidates analyzed per suggestion (best 5 go to the LLM)
+MAX_ANALYZED_CANDIDATES = 15
 
-    # Direct brand names
-    all_brands = [
-        "BMW", "Mercedes", "Audi", "Volkswagen", "Porsche",
-        "Peugeot", "Citroen", "Renault", "Toyota", "Honda",
-        "Mazda", "Nissan", "Volvo", "Ford", "Jeep", "Hyundai",
-        "Kia", "Skoda", "Seat", "Fiat", "Tesla", "Lynk",
-    ]
-    for brand in all_brands:
-        if brand.lower() in prompt_lower:
-            matched_brands.append(brand)
+SUGGESTION_SYSTEM_PROMPT = (
+    "You are a friendly car buying assistant in a live chat. "
+    "Keep replies SHORT (2-4 sentences max). "
+    "Recommend ONE car at a time with its price. "
+    "End with exactly ONE follow-up question to learn more about what the customer needs. "
+    "Never write long lists or bullet points."
+)
 
-    return list(set(matched_brands))  # deduplicate
+# Fields of each candidate sent to clients before the LLM answers
+CANDIDATE_FIELDS = [
+    "title", "brand", "year_numeric", "mileage_numeric", "fuel_type",
+    "price_numeric", "estimated_market_value", "profit", "risk_score",
+    "recommendation", "url",
+]
+
+
+def _suggestion_plan(
+    messages: Optional[List[dict]] = None,
+    max_tokens: int = 200,
+    candidates: Optional[List[dict]] = None,
+    reply: Optional[str] = None,
+    suffix: str = "",
+    context_tokens: int = 0,
+    retrieval: Optional[dict] = None
+) -> dict:
+    return {
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "prompt_tokens": sum(count_tokens(m["content"]) for m in messages or []),
+        "context_tokens": context_tokens,
+        "candidates": [
+            {key: car.get(key) for key in CANDIDATE_FIELDS}
+            for car in (candidates or [])
+        ],
+        "reply": reply,
+        "suffix": suffix,
+        "retrieval": retrieval or {},
+    }
 
 
-async def get_ai_suggestion(prompt: str, budget: Optional[float] = None) -> str:
+def prepare_suggestion(
+    prompt: str,
+    budget: Optional[float] = None,
+    intent: Optional[dict] = None,
+    within_rows: Optional[Sequence[int]] = None,
+    exclude_rows: Sequence[int] = (),
+    history: Optional[List[dict]] = None
+) -> dict:
     """
-    Conversational AI car suggestion — short replies, one recommendation at a time.
-    Supports brand/country filtering (e.g. 'German car', 'BMW or Mercedes').
+    Local retrieval step of an AI suggestion (everything before the LLM)
+
+    Filters the catalog, analyzes and ranks candidates and builds the
+    chat messages. Conversations (app/sessions.py) pass their accumulated
+    `intent`, the rows they are narrowing (`within_rows`), cars already
+    recommended (`exclude_rows`) and earlier turns (`history`).
+
+    Returns a plan dict:
+        messages   - chat messages for the LLM (None: no LLM call needed)
+        max_tokens - completion limit
+        prompt_tokens  - tokens in `messages` (see app/prompt_context.py)
+        context_tokens - tokens of the candidate table within that
+        candidates - top ranked cars given to the LLM (CANDIDATE_FIELDS)
+        reply      - final answer when no LLM call is needed
+        suffix     - text appended after the LLM reply
+        retrieval  - {"catalog_version", "intent", "budget", "rows" (all
+                     matches), "candidate_rows" (rows of `candidates`)}
     """
+    # Load cars (in-memory catalog snapshot) + comparable-sales cube
+    from app.catalog import get_catalog
+    from app.intent import describe_intent, parse_intent, select_candidates
+    from app.market_cube import get_market_cube
+
     try:
-        # Load cars
-        try:
-            all_cars = load_car_data()
-        except:
-            all_cars = []
-        
-        if not all_cars:
-            budget_str = f"€{budget:,.0f}" if budget else "Not specified"
-            prompt_with_budget = f"{prompt}\nBudget: {budget_str}"
-            
-            client = openai.OpenAI(api_key=openai.api_key)
-            response = client.chat.completions.create(
-                model=MODEL_NAME,
-                messages=[
-                    {"role": "system", "content": "You are a car buying assistant."},
-                    {"role": "user", "content": prompt_with_budget},
-                ],
-                temperature=0.7,
-                max_tokens=400,
-            )
-            return response.choices[0].message.content + "\n\n⚠️ Note: No car database available."
-        
-        # Filter by brand/country keywords from prompt
-        brand_filter = _extract_brand_filter(prompt)
-
-        # Filter by budget (SAFE)
-        affordable_cars = []
-        for car in all_cars:
-            price = car.get('price_numeric')
-            within_budget = (not budget) or (price and isinstance(price, (int, float)) and price <= budget)
-            brand_ok = True
-            if brand_filter:
-                car_brand = (car.get('brand') or '').strip()
-                brand_ok = any(b.lower() in car_brand.lower() for b in brand_filter)
-            if within_budget and brand_ok:
-                affordable_cars.append(car)
+        catalog = get_catalog()
+        all_cars = catalog.cars
+        market_cube = get_market_cube(catalog)
+    except:
+        all_cars = []
+        market_cube = None
+
+    if not all_cars:
+        budget_str = f"€{budget:,.0f}" if budget else "Not specified"
+        prompt_with_budget = f"{prompt}\nBudget: {budget_str}"
+
+        return _suggestion_plan(
+            messages=[
+                {"role": "system", "content": "You are a car buying assistant."},
+                {"role": "user", "content": prompt_with_budget},
+            ],
+            max_tokens=400,
+            suffix="\n\n⚠️ Note: No car database available.",
+        )
+
+    # Structured filters from the prompt (brands, fuel, mileage, year, ...)
+    if intent is None:
+        intent = parse_intent(prompt)
+    if intent["max_price"] is not None:
+        budget = min(budget, intent["max_price"]) if budget else intent["max_price"]
+
+    # Vectorized filter over the snapshot columns + Pareto pre-rank
+    rows, matching_rows, relaxed = select_candidates(
+        catalog, intent, budget,
+        limit=MAX_ANALYZED_CANDIDATES,
+        within=within_rows,
+        exclude=exclude_rows,
+    )
+    matching = int(matching_rows.size)
+
+    if not rows:
+        # Price column, not the car dicts (they may be decoded on access)
+        prices = catalog.price[np.nan_to_num(catalog.price) != 0]
+        min_price = float(prices.min()) if prices.size else 0
+        max_price = float(prices.max()) if prices.size else 0
+        budget_display = budget if budget else 0
         
-        # Fallback: if brand filter returned nothing, use all within budget
-        if brand_filter and not affordable_cars:
-            for car in all_cars:
-                price = car.get('price_numeric')
-                within_budget = (not budget) or (price and isinstance(price, (int, float)) and price <= budget)
-                if within_budget:
-                    affordable_cars.append(car)
-
-        if not affordable_cars:
-            prices = [c.get('price_numeric') for c in all_cars if c.get('price_numeric')]
-            min_price = min(prices) if prices else 0
-            max_price = max(prices) if prices else 0
-            budget_display = budget if budget else 0
-            
-            return f"""❌ No cars found within budget of €{budget_display:,.0f}.
+        return _suggestion_plan(reply=f"""❌ No cars found within budget of €{budget_display:,.0f}.
 
 Database: {len(all_cars)} total cars
 Lowest price: €{min_price:,.0f}
 Highest price: €{max_price:,.0f}
 
-💡 Try increasing your budget."""
-        
-        # Analyze cars (SAFE)
-        analyzed_cars = analyze_multiple_cars(affordable_cars[:15])
-        analyzed_cars.sort(key=lambda x: safe_float(x.get('profit'), 0), reverse=True)
-        top_5 = analyzed_cars[:5]
-        
-        # Build context (COMPLETELY SAFE)
-        cars_context = f"""
-📊 REAL CAR DATABASE:
-- Total cars: {len(all_cars)}
-- Within budget: {len(affordable_cars)}
-- Top deals: {len(top_5)}
-
-🚗 TOP 5 RECOMMENDATIONS:
-"""
-        
-        for i, car in enumerate(top_5, 1):
-            # SAFE extraction with defaults
-            title = car.get('title') or 'Unknown Car'
-            brand = car.get('brand') or 'Unknown'
-            year = car.get('year_numeric')
-            year_display = str(year) if year else 'N/A'
-            mileage = safe_int(car.get('mileage_numeric'), 0)
-            fuel = car.get('fuel_type') or 'N/A'
-            gearbox = car.get('gearbox') or 'N/A'
-            price = safe_float(car.get('price_numeric'), 0)
-            market_value = safe_float(car.get('estimated_market_value'), 0)
-            profit = safe_float(car.get('profit'), 0)
-            risk = safe_float(car.get('risk_score'), 0)
-            recommendation = car.get('recommendation') or 'N/A'
-            url = car.get('url') or 'N/A'
-            
-            cars_context += f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-{i}. {title}
-
-Info:
-  • Brand: {brand}
-  • Year: {year_display}
-  • Mileage: {mileage:,} km
-  • Fuel: {fuel}
-  • Gearbox: {gearbox}
-
-Analysis:
-  💰 Price: €{price:,.0f}
-  📈 Value: €{market_value:,.0f}
-  💸 Profit: €{profit:,.0f}
-  ⚠️ Risk: {risk:.1f}/10
-  ✅ Rating: {recommendation}
-
-🔗 Link: {url[:60]}...
-"""
-        
-        # Build conversational prompt
-        budget_display = f"€{budget:,.0f}" if budget else "any budget"
-        brand_note = f" (filtered for: {', '.join(brand_filter)}" + ")" if brand_filter else ""
-        enhanced_prompt = f"""Customer asked: "{prompt}"
-Budget: {budget_display}{brand_note}
-
-{cars_context}
+💡 Try increasing your budget.""")
+    
+    # Analyze cars (SAFE)
+    with stage("analysis"):
+        analyzed_cars = analyze_multiple_cars([all_cars[row] for row in rows], market_cube)
+    ranked = sorted(
+        zip(rows, analyzed_cars),
+        key=lambda pair: safe_float(pair[1].get('profit'), 0),
+        reverse=True,
+    )
+    top_5 = [car for _, car in ranked[:5]]
+    
+    # Compact candidate table, trimmed to the context token budget;
+    # only the cars that made it into the table are candidates
+    cars_table, context_tokens, top_5 = build_cars_context(top_5)
+
+    # Build conversational prompt
+    budget_display = f"€{budget:,.0f}" if budget else "any budget"
+    filters_text = describe_intent(intent)
+    filters_note = f" (filtered for: {filters_text})" if filters_text else ""
+    if relaxed:
+        filters_note += f"\nNo exact match - relaxed: {', '.join(relaxed)}"
+    enhanced_prompt = f"""Customer asked: "{prompt}"
+Budget: {budget_display}{filters_note}
+Catalog: {len(all_cars)} cars, {matching} match. Top deals, best first (€ amounts, km = mileage, risk 0-10):
+{cars_table}
 
 Give a short, friendly reply. Pick the single best car from the list above. One sentence why it's good. Then ask one follow-up question to help narrow down further."""
 
-        # Call OpenAI — short conversational reply
-        client = openai.OpenAI(api_key=openai.api_key)
-        response = client.chat.completions.create(
-            model=MODEL_NAME,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are a friendly car buying assistant in a live chat. "
-                        "Keep replies SHORT (2-4 sentences max). "
-                        "Recommend ONE car at a time with its price. "
-                        "End with exactly ONE follow-up question to learn more about what the customer needs. "
-                        "Never write long lists or bullet points."
-                    )
-                },
-                {"role": "user", "content": enhanced_prompt},
-            ],
-            temperature=0.7,
-            max_tokens=200,
+    return _suggestion_plan(
+        messages=[
+            {"role": "system", "content": SUGGESTION_SYSTEM_PROMPT},
+            *(history or []),
+            {"role": "user", "content": enhanced_prompt},
+        ],
+        candidates=top_5,
+        context_tokens=context_tokens,
+        retrieval={
+            "catalog_version": catalog.version,
+            "intent": intent,
+            "budget": budget,
+            "rows": matching_rows,
+            "candidate_rows": [row for row, _ in ranked[:len(top_5)]],
+        },
+    )
+
+
+def _format_suggestion_error(e: Exception) -> str:
+    error_type = type(e).__name__
+    error_msg = str(e)
+
+    result = f"❌ Error ({error_type}): {error_msg}"
+
+    if isinstance(e, LLMOverloadedError):
+        result += "\n\n💡 Too many requests right now - try again shortly"
+    elif "api_key" in error_msg.lower():
+        result += "\n\n💡 Check OPENAI_API_KEY in .env"
+    elif "format" in error_msg.lower():
+        result += "\n\n💡 Data format error - check cars_data.json"
+
+    return result
+
+
+def fallback_suggestion(candidates: List[dict]) -> str:
+    """
+    Templated reply from the locally ranked candidates (no LLM)
+
+    Used while the LLM is down or the circuit breaker is open. Same
+    shape as the LLM answer: one pick, why, one follow-up question.
+    """
+    best = candidates[0]
+
+    title = best.get("title") or "Unknown Car"
+    price = safe_float(best.get("price_numeric"), 0)
+    year = str(best.get("year_numeric") or "")
+    details = [
+        year if year and year not in title else None,
+        f"{safe_int(best.get('mileage_numeric'), 0):,} km" if best.get("mileage_numeric") else None,
+        best.get("fuel_type"),
+    ]
+    details_text = ", ".join(d for d in details if d)
+
+    reply = f"I'd go for the {title}"
+    if details_text:
+        reply += f" ({details_text})"
+    reply += f" at €{price:,.0f}."
+
+    profit = safe_float(best.get("profit"), 0)
+    if profit > 0:
+        reply += f" It's priced about €{profit:,.0f} below its estimated market value"
+        reply += f" with a risk score of {safe_float(best.get('risk_score'), 0):.1f}/10."
+
+    others = [c.get("title") for c in candidates[1:3] if c.get("title")]
+    if others:
+        reply += f" Also worth a look: {' and '.join(others)}."
+
+    return reply + " What matters more to you, a lower price or lower mileage?"
+
+
+async def generate_suggestion(
+    prompt: str,
+    budget: Optional[float] = None,
+    **plan_options
+) -> dict:
+    """
+    Run retrieval + LLM for one suggestion
+
+    `plan_options` are passed on to prepare_suggestion().
+
+    When the LLM is unavailable (circuit open, timeouts, 5xx, 429s) the
+    reply is fallback_suggestion() over the same candidates instead.
+
+    Returns:
+        {"suggestion": text, "candidates": [...], "ok": False if the
+        text is an error message, "fallback": True if no LLM was used,
+        "prompt_tokens": size of the prompt sent, "retrieval": see
+        prepare_suggestion}
+
+    Raises:
+        LLMOverloadedError: the LLM queue is full
+    """
+    try:
+        plan = await run_in_thread(
+            functools.partial(prepare_suggestion, prompt, budget, **plan_options)
         )
+        fallback = False
+
+        if plan["messages"] is None:
+            reply = plan["reply"]
+        else:
+            try:
+                # Call OpenAI — short conversational reply (shared async client)
+                reply = await chat_completion(
+                    plan["messages"],
+                    temperature=0.7,
+                    max_tokens=plan["max_tokens"],
+                )
+            except upstream_unavailable_errors():
+                if not plan["candidates"]:
+                    raise
+                reply = fallback_suggestion(plan["candidates"])
+                fallback = True
+
+            reply += plan["suffix"]
+
+        return {
+            "suggestion": reply,
+            "candidates": plan["candidates"],
+            "ok": True,
+            "fallback": fallback,
+            "prompt_tokens": plan["prompt_tokens"],
+            "retrieval": plan["retrieval"],
+        }
+
+    except LLMOverloadedError:
+        # Load shedding: let the route answer 503 instead of a 200 error text
+        raise
+    except Exception as e:
+        return {
+            "suggestion": _format_suggestion_error(e),
+            "candidates": [],
+            "ok": False,
+            "fallback": False,
+            "prompt_tokens": 0,
+            "retrieval": {},
+        }
+
+
+async def get_ai_suggestion(prompt: str, budget: Optional[float] = None) -> str:
+    """
+    Conversational AI car suggestion — short replies, one recommendation at a time.
+    Supports brand/country filtering (e.g. 'German car', 'BMW or Mercedes').
+    """
+    result = await generate_suggestion(prompt, budget)
+    return result["suggestion"]
+
+
+async def stream_ai_suggestion(
+    prompt: str,
+    budget: Optional[float] = None
+) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    Streaming variant of get_ai_suggestion
+
+    Yields (event, data) pairs:
+        candidates - ranked cars (+ prompt_tokens), as soon as local
+                     retrieval is done
+        token      - {"text": ...} reply fragments as the LLM produces them
+        error      - {"message": ...} if anything fails
+        done       - {"timestamp": ..., "fallback": bool} always last
+
+    If the LLM is unavailable before its first token, the templated
+    fallback reply is sent as a single token event.
+    """
+    fallback = False
+
+    try:
+        plan = await run_in_thread(prepare_suggestion, prompt, budget)
+        yield "candidates", {
+            "candidates": plan["candidates"],
+            "prompt_tokens": plan["prompt_tokens"],
+        }
+
+        if plan["messages"] is None:
+            yield "token", {"text": plan["reply"]}
+        else:
+            streamed = False
+            try:
+                async for text in stream_chat_completion(
+                    plan["messages"],
+                    temperature=0.7,
+                    max_tokens=plan["max_tokens"],
+                ):
+                    streamed = True
+                    yield "token", {"text": text}
+            except upstream_unavailable_errors():
+                if streamed or not plan["candidates"]:
+                    raise
+                fallback = True
+                yield "token", {"text": fallback_suggestion(plan["candidates"])}
+
+            if plan["suffix"]:
+                yield "token", {"text": plan["suffix"]}
 
-        return response.choices[0].message.content
-        
     except Exception as e:
-        error_type = type(e).__name__
-        error_msg = str(e)
-        
-        result = f"❌ Error ({error_type}): {error_msg}"
-        
-        if "api_key" in error_msg.lower():
-            result += "\n\n💡 Check OPENAI_API_KEY in .env"
-        elif "format" in error_msg.lower():
-            result += "\n\n💡 Data format error - check cars_data.json"
-        
-        return result
+        yield "error", {"message": _format_suggestion_error(e)}
+
+    yield "done", {"timestamp": datetime.now().isoformat(), "fallback": fallback}
 
 
 # =========================
 # ANALYSIS HELPERS
 # =========================
-def analyze_car(car_data: dict) -> dict:
-    analysis = calculate_profit_and_recommendation(car_data)
+def analyze_car(car_data: dict, market_cube=None) -> dict:
+    analysis = calculate_profit_and_recommendation(car_data, market_cube)
     return {
         **car_data,
         "age": calculate_age(car_data.get("year_numeric")),
@@ -496,13 +728,16 @@ def analyze_car(car_data: dict) -> dict:
     }
 
 
-def analyze_multiple_cars(cars: List[dict]) -> List[dict]:
-    return [analyze_car(car) for car in cars]
+def analyze_multiple_cars(cars: List[dict], market_cube=None) -> List[dict]:
+    return [analyze_car(car, market_cube) for car in cars]
+
 
+def compare_cars(cars: List[dict], market_cube=None) -> dict:
+    return summarize_comparison(analyze_multiple_cars(cars, market_cube))
 
-def compare_cars(cars: List[dict]) -> dict:
-    analyzed = analyze_multiple_cars(cars)
 
+def summarize_comparison(analyzed: List[dict]) -> dict:
+    """Best-by-profit / risk / overall picks from already analyzed cars"""
     by_profit = sorted(analyzed, key=lambda x: safe_float(x.get("profit"), 0), reverse=True)
     by_risk = sorted(analyzed, key=lambda x: safe_float(x.get("risk_score"), 0))
 
@@ -525,11 +760,19 @@ def compare_cars(cars: List[dict]) -> dict:
 # =========================
 __all__ = [
     "load_car_data",
+    "load_ml_model",
+    "ml_model_version",
     "predict_car_price_ml",
     "estimate_market_value",
+    "estimate_from_market_reference",
     "calculate_profit_and_recommendation",
     "calculate_risk_score",
     "analyze_multiple_cars",
     "compare_cars",
+    "summarize_comparison",
+    "prepare_suggestion",
+    "fallback_suggestion",
+    "generate_suggestion",
     "get_ai_suggestion",
+    "stream_ai_suggestion",
 ]
\ No newline at end of file
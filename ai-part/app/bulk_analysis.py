@@ -0,0 +1,226 @@
+"""
+Bulk Analysis Stream
+NDJSON in, NDJSON out: analyze car feeds of any size in bounded memory
+
+The request body is read line by line while results are streamed back:
+
+1. A reader task splits the body into lines, validates each one as a
+   CarInput and groups them into chunks. The first chunk is small
+   (fast first results), later ones double up to NDJSON_CHUNK_SIZE.
+2. Chunks go through a bounded queue. When analysis falls behind, the
+   reader stops reading and TCP backpressure slows the client down.
+3. Up to NDJSON_PIPELINE chunks are analyzed at once (run_batch: the
+   process pool for big chunks) and written back in input order.
+
+Every input line gets exactly one output line with its line number:
+    {"line": 1, "title": ..., "profit": ..., ...}
+    {"line": 2, "error": "..."}
+followed by one {"summary": {...}} line at the end.
+"""
+
+import asyncio
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from starlette.responses import StreamingResponse
+
+from app.executors import run_batch
+from app.fast_json import dumps
+from app.market_cube import analyze_with_market
+from app.metrics import stage
+from app.models import CarInput
+
+NDJSON_CHUNK_SIZE = int(os.getenv("NDJSON_CHUNK_SIZE", "1000"))
+NDJSON_FIRST_CHUNK = int(os.getenv("NDJSON_FIRST_CHUNK", "50"))
+NDJSON_QUEUE_CHUNKS = int(os.getenv("NDJSON_QUEUE_CHUNKS", "2"))
+NDJSON_PIPELINE = int(os.getenv("NDJSON_PIPELINE", "2"))
+NDJSON_MAX_LINE_BYTES = int(os.getenv("NDJSON_MAX_LINE_BYTES", "65536"))
+
+# (line number, car dict or None, error or None)
+Entry = Tuple[int, Optional[dict], Optional[str]]
+
+_END = None
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that may start before the request body is read
+
+    The stock class (ASGI spec < 2.4) runs a task that consumes
+    receive() to watch for disconnects, which would steal body chunks
+    from the reader. Here the reader sees the disconnect itself.
+    """
+
+    media_type = "application/x-ndjson"
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+# =========================
+# READER
+# =========================
+def _parse_line(line_no: int, raw: bytes) -> Entry:
+    try:
+        car = CarInput.model_validate_json(raw)
+        return line_no, car.model_dump(), None
+    except ValidationError as e:
+        errors = "; ".join(
+            f"{'.'.join(str(p) for p in err['loc']) or 'line'}: {err['msg']}"
+            for err in e.errors()
+        )
+        return line_no, None, errors
+
+
+async def _read_chunks(stream: AsyncIterator[bytes], queue: asyncio.Queue, stats: dict) -> None:
+    """Body -> chunks of parsed lines on `queue`, then _END"""
+    chunk: List[Entry] = []
+    chunk_size = NDJSON_FIRST_CHUNK
+    buffer = bytearray()
+    skipping = False  # inside a line that was too long
+    line_no = 0
+
+    async def add(entry: Entry) -> None:
+        nonlocal chunk, chunk_size
+        chunk.append(entry)
+        if len(chunk) >= chunk_size:
+            await queue.put(chunk)
+            chunk = []
+            chunk_size = min(chunk_size * 2, NDJSON_CHUNK_SIZE)
+
+    async def end_line(raw: bytes) -> None:
+        nonlocal line_no
+        line_no += 1
+        stats["lines"] += 1
+        if raw.strip():
+            await add(_parse_line(line_no, raw))
+
+    try:
+        async for data in stream:
+            start = 0
+            while True:
+                newline = data.find(b"\n", start)
+                if newline < 0:
+                    if not skipping:
+                        buffer += data[start:]
+                        if len(buffer) > NDJSON_MAX_LINE_BYTES:
+                            line_no += 1
+                            stats["lines"] += 1
+                            await add((line_no, None, f"Line longer than {NDJSON_MAX_LINE_BYTES} bytes"))
+                            buffer.clear()
+                            skipping = True
+                    break
+
+                if skipping:
+                    skipping = False  # already reported
+                else:
+                    buffer += data[start:newline]
+                    await end_line(bytes(buffer))
+                buffer.clear()
+                start = newline + 1
+
+        if buffer and not skipping:
+            await end_line(bytes(buffer))
+        if chunk:
+            await queue.put(chunk)
+
+    except Exception as e:  # client disconnect, body errors
+        stats["error"] = f"Input error: {str(e) or type(e).__name__}"
+    finally:
+        await queue.put(_END)
+
+
+# =========================
+# ANALYSIS
+# =========================
+async def _analyze_chunk(chunk: List[Entry], project: Callable[[dict], dict], stats: dict) -> bytes:
+    """Output lines of one chunk; counts what was actually written"""
+    cars = [car for _, car, _ in chunk if car is not None]
+
+    failure = None
+    analyzed = iter(())
+    if cars:
+        try:
+            with stage("analysis"):
+                analyzed = iter(await run_batch(analyze_with_market, cars))
+        except Exception as e:
+            failure = f"Analysis error: {str(e)}"
+
+    with stage("serialization"):
+        lines = []
+        for line_no, car, error in chunk:
+            if car is None:
+                lines.append(dumps({"line": line_no, "error": error}))
+            elif failure is not None:
+                lines.append(dumps({"line": line_no, "error": failure}))
+            else:
+                lines.append(dumps({"line": line_no, **project(next(analyzed))}))
+                stats["analyzed"] += 1
+                continue
+            stats["errors"] += 1
+
+        return b"\n".join(lines) + b"\n"
+
+
+async def analyze_ndjson(
+    stream: AsyncIterator[bytes],
+    project: Callable[[dict], dict] = dict
+) -> AsyncIterator[bytes]:
+    """
+    Analyze an NDJSON car stream, yielding NDJSON result lines in order
+
+    Args:
+        stream: Request body chunks (request.stream())
+        project: Shapes one analyzed car for output
+    """
+    stats: Dict[str, Any] = {"lines": 0, "analyzed": 0, "errors": 0, "chunks": 0}
+    queue: asyncio.Queue = asyncio.Queue(maxsize=NDJSON_QUEUE_CHUNKS)
+    reader = asyncio.create_task(_read_chunks(stream, queue, stats))
+    pending: deque = deque()
+    next_chunk = None
+    finished = False
+
+    try:
+        while True:
+            # Read ahead while fewer than NDJSON_PIPELINE chunks are in analysis
+            if next_chunk is None and not finished and len(pending) < NDJSON_PIPELINE:
+                next_chunk = asyncio.ensure_future(queue.get())
+
+            waiting = [task for task in (next_chunk, pending[0] if pending else None) if task]
+            if not waiting:
+                break
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            # Results go out in input order, as soon as the oldest chunk is done
+            if pending and pending[0] in done:
+                yield pending.popleft().result()
+                continue
+
+            if next_chunk in done:
+                chunk = next_chunk.result()
+                next_chunk = None
+                if chunk is _END:
+                    finished = True
+                else:
+                    stats["chunks"] += 1
+                    pending.append(asyncio.create_task(_analyze_chunk(chunk, project, stats)))
+
+        yield dumps({"summary": stats}) + b"\n"
+
+    finally:
+        reader.cancel()
+        for task in (next_chunk, *pending):
+            if task is not None:
+                task.cancel()
+
+
+__all__ = [
+    "NDJSON_CHUNK_SIZE",
+    "NDJSON_FIRST_CHUNK",
+    "NDJSONStreamingResponse",
+    "analyze_ndjson",
+]
@@ -14,27 +14,108 @@ import os
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 
+import numpy as np
+
+
+# Order of sub-scores in score vectors / matrices
+SCORE_KEYS = [
+    "price", "value", "reliability", "features", "fuel_efficiency", "safety"
+]
+
+# Named weight profiles. "balanced" and "daily" are the original
+# fixed weights, so the default user context scores exactly as before.
+WEIGHT_PROFILES = {
+    # priority (price/features/reliability)
+    "balanced": {
+        "price": 0.25, "value": 0.20, "reliability": 0.20,
+        "features": 0.15, "fuel_efficiency": 0.10, "safety": 0.10
+    },
+    "price": {
+        "price": 0.40, "value": 0.25, "reliability": 0.10,
+        "features": 0.05, "fuel_efficiency": 0.15, "safety": 0.05
+    },
+    "features": {
+        "price": 0.15, "value": 0.10, "reliability": 0.15,
+        "features": 0.40, "fuel_efficiency": 0.05, "safety": 0.15
+    },
+    "reliability": {
+        "price": 0.15, "value": 0.15, "reliability": 0.40,
+        "features": 0.05, "fuel_efficiency": 0.10, "safety": 0.15
+    },
+    # usage_type (daily/family/business)
+    "daily": {
+        "price": 0.25, "value": 0.20, "reliability": 0.20,
+        "features": 0.15, "fuel_efficiency": 0.10, "safety": 0.10
+    },
+    "family": {
+        "price": 0.20, "value": 0.15, "reliability": 0.20,
+        "features": 0.20, "fuel_efficiency": 0.05, "safety": 0.20
+    },
+    "business": {
+        "price": 0.10, "value": 0.15, "reliability": 0.25,
+        "features": 0.25, "fuel_efficiency": 0.15, "safety": 0.10
+    },
+}
+
+
+def compile_weight_profiles(profiles: Dict[str, Dict[str, float]]) -> Tuple[List[str], np.ndarray]:
+    """
+    Compile named weight dicts into a (profiles x SCORE_KEYS) matrix
+    
+    Each row is normalized to sum to 1 so user_fit stays on 0-100.
+    """
+    names = list(profiles)
+    matrix = np.array(
+        [[profiles[name].get(key, 0.0) for key in SCORE_KEYS] for name in names],
+        dtype=float
+    )
+    totals = matrix.sum(axis=1, keepdims=True)
+    totals[totals == 0] = 1.0
+    return names, matrix / totals
+
 
 class CarRecommendationEngine:
     """
     Smart car recommendation with user context
     """
     
-    def __init__(self):
-        self.weights = {
-            "price": 0.25,
-            "value": 0.20,
-            "reliability": 0.20,
-            "features": 0.15,
-            "fuel_efficiency": 0.10,
-            "safety": 0.10
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, float]]] = None):
+        self.profile_names, self.profile_matrix = compile_weight_profiles(
+            profiles or WEIGHT_PROFILES
+        )
+        self._profile_index = {
+            name: i for i, name in enumerate(self.profile_names)
         }
+        self.weights = self.weights_for({})
+    
+    def weight_vector_for(self, user_context: Dict) -> np.ndarray:
+        """
+        Weight vector for a user context
+        
+        Blends the priority profile and the usage_type profile 50/50;
+        unknown names fall back to "balanced" / "daily".
+        """
+        priority = self._profile_index.get(
+            user_context.get("priority") or "balanced",
+            self._profile_index["balanced"]
+        )
+        usage = self._profile_index.get(
+            user_context.get("usage_type") or "daily",
+            self._profile_index["daily"]
+        )
+        return (self.profile_matrix[priority] + self.profile_matrix[usage]) / 2
+    
+    def weights_for(self, user_context: Dict) -> Dict[str, float]:
+        """Weight dict (SCORE_KEYS -> weight) for a user context"""
+        vector = self.weight_vector_for(user_context)
+        return {key: float(w) for key, w in zip(SCORE_KEYS, vector)}
     
     def analyze_car_for_user(
         self, 
         car: Dict, 
         user_context: Dict,
-        ml_prediction: Optional[Dict] = None
+        ml_prediction: Optional[Dict] = None,
+        explain: bool = True
     ) -> Dict:
         """
         Analyze car with user context
@@ -43,6 +124,8 @@ class CarRecommendationEngine:
             car: Car data from scraping
             user_context: User preferences, budget, usage
             ml_prediction: ML price prediction if available
+            explain: Build insights/warnings text. Bulk callers pass
+                False and call explain_analysis() only for what they show.
             
         Returns:
             Comprehensive analysis with scores
@@ -52,8 +135,6 @@ class CarRecommendationEngine:
             "car_id": car.get("details_url", "unknown"),
             "car_title": car.get("car_title", "Unknown"),
             "scores": {},
-            "insights": [],
-            "warnings": [],
             "user_fit": 0.0,
             "overall_score": 0.0
         }
@@ -85,22 +166,120 @@ class CarRecommendationEngine:
         analysis["scores"]["safety"] = safety_score
         
         # Calculate overall score
+        weights = self.weights_for(user_context)
         analysis["overall_score"] = sum(
-            analysis["scores"][key] * self.weights[key]
-            for key in self.weights
+            analysis["scores"][key] * weights[key]
+            for key in SCORE_KEYS
         )
         
         # Calculate user fit (0-100)
         analysis["user_fit"] = analysis["overall_score"] * 100
         
-        # Generate insights
-        analysis["insights"] = self._generate_insights(car, analysis, user_context)
+        if explain:
+            self.explain_analysis(car, analysis, user_context)
+        
+        return analysis
+    
+    def explain_analysis(
+        self,
+        car: Dict,
+        analysis: Dict,
+        user_context: Dict
+    ) -> Dict:
+        """
+        Add insights & warnings to an analysis built with explain=False
         
-        # Generate warnings
-        analysis["warnings"] = self._generate_warnings(car, analysis, user_context)
+        Scores are not recomputed; only the text layer is generated.
+        """
+        if "insights" not in analysis:
+            analysis["insights"] = self._generate_insights(car, analysis, user_context)
+            analysis["warnings"] = self._generate_warnings(car, analysis, user_context)
         
         return analysis
     
+    def rank_cars(
+        self,
+        cars: List[Dict],
+        user_context: Dict,
+        top_n: Optional[int] = None,
+        explain: bool = False
+    ) -> List[Dict]:
+        """
+        Score many cars for one user and sort by user fit
+        
+        Scoring skips insight/warning generation entirely; with
+        explain=True only the returned top_n results are explained.
+        """
+        scores = self.score_matrix(cars, user_context)
+        fits = scores @ self.weight_vector_for(user_context)
+        order = np.argsort(-fits, kind="stable")[:top_n]
+        
+        ranked = []
+        for i in order:
+            car = cars[i]
+            analysis = {
+                "car_id": car.get("details_url", "unknown"),
+                "car_title": car.get("car_title", "Unknown"),
+                "scores": dict(zip(SCORE_KEYS, scores[i].tolist())),
+                "user_fit": float(fits[i]) * 100,
+                "overall_score": float(fits[i])
+            }
+            if explain:
+                self.explain_analysis(car, analysis, user_context)
+            ranked.append(analysis)
+        
+        return ranked
+    
+    def score_matrix(
+        self,
+        cars: List[Dict],
+        user_context: Dict,
+        ml_predictions: Optional[List[Optional[Dict]]] = None
+    ) -> np.ndarray:
+        """
+        Sub-score matrix of shape (cars x SCORE_KEYS)
+        
+        Computed once per request; any number of weight profiles can
+        then be applied to it without rescoring the cars.
+        """
+        matrix = np.empty((len(cars), len(SCORE_KEYS)), dtype=float)
+        
+        for i, car in enumerate(cars):
+            ml = ml_predictions[i] if ml_predictions else None
+            matrix[i] = (
+                self._calculate_price_score(car, user_context, ml),
+                self._calculate_value_score(car, ml),
+                self._calculate_reliability_score(car),
+                self._calculate_features_score(car, user_context),
+                self._calculate_fuel_score(car, user_context),
+                self._calculate_safety_score(car),
+            )
+        
+        return matrix
+    
+    def score_profiles(
+        self,
+        cars: List[Dict],
+        user_context: Dict,
+        profiles: Optional[List[str]] = None
+    ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Score cars under several named weight profiles in one pass
+        
+        Returns:
+            (profile names, sub-score matrix, user_fit matrix of shape
+            cars x profiles on the 0-100 scale)
+        """
+        names = profiles or self.profile_names
+        unknown = [name for name in names if name not in self._profile_index]
+        if unknown:
+            raise ValueError(f"Unknown weight profile(s): {', '.join(unknown)}")
+        
+        weights = self.profile_matrix[[self._profile_index[n] for n in names]]
+        scores = self.score_matrix(cars, user_context)
+        
+        return names, scores, (scores @ weights.T) * 100
+    
     def _calculate_price_score(
         self, 
         car: Dict, 
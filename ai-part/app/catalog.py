@@ -0,0 +1,256 @@
+"""
+Catalog Snapshot
+Loads the car dataset once per file version and keeps it in memory
+
+A snapshot holds:
+1. The raw car dicts (row id = position in the list)
+2. Numpy columns for the numeric / categorical fields
+3. Derived structures (indexes, cubes, ...) built lazily per version
+
+When the dataset file changes (weekly scraper run) the next
+get_catalog() call loads a new snapshot with a new version string,
+and every derived structure is rebuilt for it.
+
+With CATALOG_SHARED=1 the snapshot is not loaded per process but
+attached from a shared-memory store (see app/shared_catalog.py).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.ai_calculations import DATA_PATH
+from app.metrics import timed
+
+
+# =========================
+# COLUMN HELPERS
+# =========================
+def _float_column(cars: List[dict], key: str) -> np.ndarray:
+    """Numeric column as float array, NaN where missing/invalid"""
+    values = np.full(len(cars), np.nan, dtype=float)
+    for i, car in enumerate(cars):
+        value = car.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[i] = value
+    return values
+
+
+def _normalize_label(value: Any) -> str:
+    return str(value).strip().lower() if value else ""
+
+
+def _category_column(cars: List[dict], key: str) -> Tuple[np.ndarray, List[str]]:
+    """
+    Categorical column as integer codes + vocabulary
+
+    Code 0 is always "" (missing).
+    """
+    vocab = {"": 0}
+    codes = np.zeros(len(cars), dtype=np.int32)
+    for i, car in enumerate(cars):
+        label = _normalize_label(car.get(key))
+        codes[i] = vocab.setdefault(label, len(vocab))
+    return codes, list(vocab)
+
+
+# Snapshot attribute <- (car field, kind)
+COLUMNS = {
+    "price": ("price_numeric", "float"),
+    "year": ("year_numeric", "float"),
+    "mileage": ("mileage_numeric", "float"),
+    "power": ("power_kw", "float"),
+    "brand_codes": ("brand", "category"),
+    "fuel_codes": ("fuel_type", "category"),
+    "gearbox_codes": ("gearbox", "category"),
+}
+
+
+def build_columns(cars: List[dict]) -> Tuple[Dict[str, np.ndarray], Dict[str, List[str]]]:
+    """
+    Numpy columns of a car list
+
+    Returns:
+        ({attribute: array}, {category attribute: vocabulary}); includes
+        the derived "age" column
+    """
+    columns: Dict[str, np.ndarray] = {}
+    vocabs: Dict[str, List[str]] = {}
+    for name, (key, kind) in COLUMNS.items():
+        if kind == "float":
+            columns[name] = _float_column(cars, key)
+        else:
+            columns[name], vocabs[name] = _category_column(cars, key)
+
+    columns["age"] = np.clip(datetime.now().year - columns["year"], 0, None)
+    return columns, vocabs
+
+
+# =========================
+# SNAPSHOT
+# =========================
+class CatalogSnapshot:
+    """
+    Immutable, versioned view of the car dataset
+
+    `columns` / `vocabs` / `store` are given when the snapshot is
+    attached from the shared store; otherwise columns are built here.
+    """
+
+    def __init__(
+        self,
+        cars: Sequence[dict],
+        version: str,
+        columns: Optional[Dict[str, np.ndarray]] = None,
+        vocabs: Optional[Dict[str, List[str]]] = None,
+        store: Any = None,
+    ):
+        self.cars = cars
+        self.version = version
+        self.size = len(cars)
+        self.loaded_at = datetime.now()
+        self.store = store  # SharedStore, or None when loaded in process
+
+        if columns is None:
+            columns, vocabs = build_columns(cars)
+
+        # Numeric columns: price, year, mileage, power, age
+        # Categorical columns: brand_codes / brand_vocab, fuel_..., gearbox_...
+        for name, column in columns.items():
+            setattr(self, name, column)
+        self.brand_vocab = vocabs["brand_codes"]
+        self.fuel_vocab = vocabs["fuel_codes"]
+        self.gearbox_vocab = vocabs["gearbox_codes"]
+
+        self._derived: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in (*COLUMNS, "age")}
+
+    def vocabs(self) -> Dict[str, List[str]]:
+        return {
+            "brand_codes": self.brand_vocab,
+            "fuel_codes": self.fuel_vocab,
+            "gearbox_codes": self.gearbox_vocab,
+        }
+
+    def derived(self, name: str, builder: Callable[["CatalogSnapshot"], Any]) -> Any:
+        """
+        Get (or build once) a structure derived from this snapshot
+
+        Args:
+            name: Cache key, e.g. "similar_index"
+            builder: Called with the snapshot on first use
+        """
+        value = self._derived.get(name)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(name)
+                if value is None:
+                    value = builder(self)
+                    self._derived[name] = value
+        return value
+
+    def has_derived(self, name: str) -> bool:
+        """Structure `name` was already built for this snapshot"""
+        return name in self._derived
+
+    def derived_arrays(
+        self, name: str, builder: Callable[["CatalogSnapshot"], Tuple[np.ndarray, ...]]
+    ) -> Tuple[np.ndarray, ...]:
+        """
+        derived() for a tuple of numpy arrays
+
+        On a shared catalog the first worker builds them into the store
+        and every worker maps the same read-only copy.
+        """
+        if self.store is None:
+            return self.derived(name, builder)
+        return self.derived(name, lambda snap: snap.store.arrays(name, lambda: builder(snap)))
+
+    def get_car(self, car_id: int) -> Optional[dict]:
+        if 0 <= car_id < self.size:
+            return self.cars[car_id]
+        return None
+
+
+# =========================
+# LOADER
+# =========================
+_snapshot: Optional[CatalogSnapshot] = None
+_snapshot_key: Optional[Tuple[int, int]] = None
+_load_lock = threading.Lock()
+
+
+def _file_key(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+@timed("dataset_load")
+def load_snapshot(path: str = DATA_PATH) -> CatalogSnapshot:
+    """Read the dataset file into a new snapshot (no caching)"""
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Car data not found: {path}")
+
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    version = hashlib.sha1(raw).hexdigest()[:12]
+    return CatalogSnapshot(json.loads(raw), version)
+
+
+def _load(key: Tuple[int, int]) -> CatalogSnapshot:
+    from app.shared_catalog import shared_enabled, shared_snapshot
+
+    if shared_enabled():
+        return shared_snapshot(DATA_PATH, key, load_snapshot)
+    return load_snapshot(DATA_PATH)
+
+
+def current_snapshot() -> Optional[CatalogSnapshot]:
+    """Last loaded snapshot, without checking the file (None before the first load)"""
+    return _snapshot
+
+
+def get_catalog() -> CatalogSnapshot:
+    """
+    Current catalog snapshot
+
+    Only a stat() call per request; the file is re-read when its
+    mtime or size changes.
+    """
+    global _snapshot, _snapshot_key
+
+    if not os.path.exists(DATA_PATH):
+        raise FileNotFoundError(f"Car data not found: {DATA_PATH}")
+
+    key = _file_key(DATA_PATH)
+    if _snapshot is not None and key == _snapshot_key:
+        return _snapshot
+
+    with _load_lock:
+        if _snapshot is None or key != _snapshot_key:
+            fresh = _load(key)
+            # Touched but unchanged file: keep the warm snapshot
+            if _snapshot is None or fresh.version != _snapshot.version:
+                _snapshot = fresh
+            _snapshot_key = key
+
+    return _snapshot
+
+
+__all__ = [
+    "COLUMNS",
+    "CatalogSnapshot",
+    "build_columns",
+    "load_snapshot",
+    "get_catalog",
+    "current_snapshot",
+]
@@ -0,0 +1,331 @@
+"""
+Catalog Pages
+Cursor-paginated, filtered, sorted and projected catalog browsing
+
+For each sort key a row order is built once per catalog version
+(numpy argsort, missing values last). A page request walks that order
+from the cursor position and applies the filters to growing chunks of
+it, stopping as soon as the page is full, so the work done is
+proportional to the page (divided by filter selectivity), not to the
+catalog size. Without filters a page is a plain slice of the order.
+
+Cursors are opaque base64 strings holding the catalog version,
+the position in the order and the sort value and id of the last car.
+Within one catalog version pages never overlap or skip cars; after a
+new version is loaded the walk resumes after that (sort value, id)
+pair, so cars tied on the sort value are not skipped (ties are in id
+order).
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.catalog import CatalogSnapshot
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Smallest chunk of the sort order checked against the filters at once
+MIN_SCAN_CHUNK = 256
+
+# sort name -> snapshot column (None = catalog order)
+SORT_KEYS = {
+    "id": None,
+    "price": "price",
+    "year": "year",
+    "mileage": "mileage",
+    "power": "power",
+}
+
+
+class PageQueryError(ValueError):
+    """Invalid filter, sort, field list or cursor (HTTP 400)"""
+
+
+# =========================
+# QUERY
+# =========================
+def _split(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def normalize_query(
+    brand: Optional[str] = None,
+    fuel_type: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    min_mileage: Optional[float] = None,
+    max_mileage: Optional[float] = None,
+    sort: str = "id"
+) -> dict:
+    """Filters + sort as a plain dict (brand / fuel_type: comma-separated)"""
+    descending = sort.startswith("-")
+    key = sort.lstrip("-+")
+    if key not in SORT_KEYS:
+        raise PageQueryError(
+            f"Unknown sort '{sort}' (use one of {', '.join(SORT_KEYS)}, '-' for descending)"
+        )
+
+    return {
+        "brands": sorted({b.lower() for b in _split(brand)}),
+        "fuels": sorted({f.lower() for f in _split(fuel_type)}),
+        "price": (min_price, max_price),
+        "year": (min_year, max_year),
+        "mileage": (min_mileage, max_mileage),
+        "sort": ("-" if descending else "") + key,
+    }
+
+
+def _has_filters(query: dict) -> bool:
+    return bool(query["brands"] or query["fuels"]) or any(
+        bound is not None
+        for column in ("price", "year", "mileage")
+        for bound in query[column]
+    )
+
+
+def _query_hash(query: dict) -> str:
+    raw = json.dumps(query, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:10]
+
+
+def _filter_mask(snapshot: CatalogSnapshot, query: dict, rows: np.ndarray) -> np.ndarray:
+    """Which of `rows` pass the filters (missing values fail range filters)"""
+    mask = np.ones(rows.size, dtype=bool)
+
+    if query["brands"]:
+        codes = [c for c, label in enumerate(snapshot.brand_vocab) if label in query["brands"]]
+        mask &= np.isin(snapshot.brand_codes[rows], codes)
+    if query["fuels"]:
+        codes = [c for c, label in enumerate(snapshot.fuel_vocab) if label in query["fuels"]]
+        mask &= np.isin(snapshot.fuel_codes[rows], codes)
+
+    for column in ("price", "year", "mileage"):
+        low, high = query[column]
+        if low is None and high is None:
+            continue
+        values = getattr(snapshot, column)[rows]
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+
+    return mask
+
+
+# =========================
+# SORT ORDERS
+# =========================
+def _sort_order(snapshot: CatalogSnapshot, sort: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(row ids in sort order, their sort keys ascending), once per version"""
+
+    def build(snap: CatalogSnapshot) -> Tuple[np.ndarray, np.ndarray]:
+        column = SORT_KEYS[sort.lstrip("-")]
+        if column is None:
+            keys = np.arange(snap.size, dtype=float)
+        else:
+            keys = getattr(snap, column).copy()
+        if sort.startswith("-"):
+            keys = -keys
+        keys[np.isnan(keys)] = np.inf  # missing values last either way
+
+        order = np.argsort(keys, kind="stable")
+        return order, keys[order]
+
+    return snapshot.derived_arrays(f"page_order:{sort}", build)
+
+
+# =========================
+# CURSORS
+# =========================
+def encode_cursor(
+    version: str,
+    query_hash: str,
+    position: int,
+    last_key: float,
+    last_id: int
+) -> str:
+    raw = json.dumps(
+        {"v": version, "q": query_hash, "p": position, "k": last_key, "i": last_id},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return {
+            "v": str(data["v"]),
+            "q": str(data["q"]),
+            "p": int(data["p"]),
+            "k": float(data["k"]),
+            "i": int(data["i"]),
+        }
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise PageQueryError("Invalid cursor")
+
+
+def _start_position(
+    snapshot: CatalogSnapshot,
+    cursor: Optional[str],
+    query_hash: str,
+    order: np.ndarray,
+    keys: np.ndarray
+) -> int:
+    if not cursor:
+        return 0
+
+    state = decode_cursor(cursor)
+    if state["q"] != query_hash:
+        raise PageQueryError("Cursor belongs to a different filter / sort")
+
+    if state["v"] == snapshot.version:
+        return min(max(state["p"], 0), snapshot.size)
+
+    # New catalog version: positions moved, resume after (last key, last id);
+    # rows tied on the key are in id order (stable sort)
+    low = int(np.searchsorted(keys, state["k"], side="left"))
+    high = int(np.searchsorted(keys, state["k"], side="right"))
+    return low + int(np.searchsorted(order[low:high], state["i"], side="right"))
+
+
+# =========================
+# FIELDS
+# =========================
+def catalog_fields(snapshot: CatalogSnapshot) -> frozenset:
+    """Every field name present on at least one car"""
+    return snapshot.derived(
+        "field_names", lambda snap: frozenset(k for car in snap.cars for k in car)
+    )
+
+
+def parse_fields(snapshot: CatalogSnapshot, fields: Optional[str]) -> Optional[List[str]]:
+    """Requested projection (None = whole car)"""
+    names = _split(fields)
+    if not names:
+        return None
+
+    unknown = sorted(set(names) - catalog_fields(snapshot) - {"car_id"})
+    if unknown:
+        raise PageQueryError(f"Unknown fields: {', '.join(unknown)}")
+
+    return [name for name in dict.fromkeys(names) if name != "car_id"]
+
+
+# =========================
+# PAGE
+# =========================
+def _scan(
+    snapshot: CatalogSnapshot,
+    query: dict,
+    order: np.ndarray,
+    start: int,
+    wanted: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First `wanted` matching rows of order[start:]
+
+    Returns:
+        (matching row ids, their positions in `order`)
+    """
+    if not _has_filters(query):
+        positions = np.arange(start, min(start + wanted, order.size))
+        return order[positions], positions
+
+    found_rows, found_positions = [], []
+    found = 0
+    chunk = max(MIN_SCAN_CHUNK, wanted * 4)
+    position = start
+
+    while found < wanted and position < order.size:
+        rows = order[position:position + chunk]
+        hits = np.flatnonzero(_filter_mask(snapshot, query, rows))[:wanted - found]
+        found_rows.append(rows[hits])
+        found_positions.append(hits + position)
+        found += hits.size
+        position += rows.size
+        chunk *= 2  # selective filter: look further ahead next time
+
+    if not found_rows:
+        return np.empty(0, dtype=int), np.empty(0, dtype=int)
+    return np.concatenate(found_rows), np.concatenate(found_positions)
+
+
+def catalog_page(
+    snapshot: CatalogSnapshot,
+    query: dict,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    One page of the catalog
+
+    Args:
+        query: From normalize_query()
+        limit: Cars per page (1..MAX_PAGE_SIZE)
+        cursor: next_cursor of the previous page
+        fields: Comma-separated projection (None = whole car)
+
+    Raises:
+        PageQueryError: bad cursor or unknown field
+    """
+    projection = parse_fields(snapshot, fields)
+    limit = min(max(int(limit), 1), MAX_PAGE_SIZE)
+    query_hash = _query_hash(query)
+    order, keys = _sort_order(snapshot, query["sort"])
+
+    start = _start_position(snapshot, cursor, query_hash, order, keys)
+    # One extra match tells whether another page exists
+    rows, positions = _scan(snapshot, query, order, start, limit + 1)
+
+    next_cursor = None
+    if rows.size > limit:
+        rows, positions = rows[:limit], positions[:limit]
+        last = int(positions[-1])
+        next_cursor = encode_cursor(
+            snapshot.version, query_hash, last + 1, float(keys[last]), int(order[last])
+        )
+
+    cars = snapshot.cars
+    if projection is None:
+        items = [{"car_id": int(row), **cars[row]} for row in rows]
+    else:
+        items = []
+        for row in rows:
+            car = cars[row]  # one lookup per row (shared catalogs decode on access)
+            items.append({"car_id": int(row), **{name: car.get(name) for name in projection}})
+
+    return {
+        "cars": items,
+        "count": len(items),
+        "limit": limit,
+        "sort": query["sort"],
+        "next_cursor": next_cursor,
+        "catalog_version": snapshot.version,
+    }
+
+
+__all__ = [
+    "DEFAULT_PAGE_SIZE",
+    "MAX_PAGE_SIZE",
+    "SORT_KEYS",
+    "PageQueryError",
+    "normalize_query",
+    "parse_fields",
+    "catalog_fields",
+    "encode_cursor",
+    "decode_cursor",
+    "catalog_page",
+]
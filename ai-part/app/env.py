@@ -0,0 +1,29 @@
+"""
+Environment
+Loads .env once per process
+
+Several modules read their configuration at import time (os.getenv at
+module level), so .env has to be loaded before they are imported:
+app.main calls load_env() first, modules that are also used on their
+own (scripts) call it too; only the first call reads the file.
+"""
+
+import threading
+
+from dotenv import load_dotenv
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env() -> None:
+    """load_dotenv() the first time, no-op afterwards"""
+    global _loaded
+
+    with _lock:
+        if not _loaded:
+            load_dotenv()
+            _loaded = True
+
+
+__all__ = ["load_env"]
@@ -0,0 +1,115 @@
+"""
+Executors
+Runs CPU-bound work off the asyncio event loop
+
+Route handlers are `async def`; calling analysis code directly would
+block every other request on the worker. Instead they dispatch here:
+
+- Thread pool: light work (single comparisons, stats, small batches)
+- Process pool: large batches, split into chunks across processes so
+  they use real CPU parallelism and never hold the server's GIL
+
+Thresholds and pool sizes come from environment variables.
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+
+# =========================
+# CONFIGURATION
+# =========================
+THREAD_WORKERS = int(os.getenv("CPU_THREAD_WORKERS", "4"))
+PROCESS_WORKERS = int(os.getenv("CPU_PROCESS_WORKERS", str(os.cpu_count() or 2)))
+
+# Batches with at least this many items go to the process pool
+PROCESS_POOL_MIN_ITEMS = int(os.getenv("PROCESS_POOL_MIN_ITEMS", "1000"))
+
+# Items per process-pool task
+PROCESS_CHUNK_SIZE = int(os.getenv("PROCESS_CHUNK_SIZE", "500"))
+
+
+# =========================
+# POOLS (created lazily)
+# =========================
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=THREAD_WORKERS, thread_name_prefix="cpu"
+        )
+    return _thread_pool
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        # spawn: never fork a process that is running an event loop
+        _process_pool = ProcessPoolExecutor(
+            max_workers=PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _process_pool
+
+
+def shutdown_executors() -> None:
+    """Stop both pools (called on app shutdown)"""
+    global _thread_pool, _process_pool
+
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+# =========================
+# DISPATCH
+# =========================
+async def _run(executor: Executor, func: Callable, *args) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args))
+
+
+async def run_in_thread(func: Callable, *args) -> Any:
+    """Run light CPU/IO work in the thread pool"""
+    return await _run(get_thread_pool(), func, *args)
+
+
+async def run_batch(func: Callable[[List], List], items: List) -> List:
+    """
+    Run `func(items) -> list` off the event loop
+
+    Small batches run in one thread-pool call. Batches of at least
+    PROCESS_POOL_MIN_ITEMS are split into PROCESS_CHUNK_SIZE chunks
+    on the process pool and the results concatenated in order, so
+    `func` must be a picklable module-level function whose output
+    lines up 1:1 with its input.
+    """
+    if len(items) < PROCESS_POOL_MIN_ITEMS:
+        return await run_in_thread(func, items)
+
+    pool = get_process_pool()
+    chunks = [
+        items[i:i + PROCESS_CHUNK_SIZE]
+        for i in range(0, len(items), PROCESS_CHUNK_SIZE)
+    ]
+    results = await asyncio.gather(*(_run(pool, func, chunk) for chunk in chunks))
+
+    return [item for chunk in results for item in chunk]
+
+
+__all__ = [
+    "run_in_thread",
+    "run_batch",
+    "shutdown_executors",
+]
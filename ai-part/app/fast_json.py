@@ -0,0 +1,86 @@
+"""
+Fast JSON Responses
+Skip FastAPI's jsonable_encoder + response_model pass for large payloads
+
+Routes opt in by returning FastJSONResponse(content) (serialized with
+orjson when installed) or RawJSONResponse(body) for bytes that were
+serialized ahead of time, e.g. once per catalog version:
+
+    body = snapshot.derived("cars_list_json", lambda s: dumps(build(s)))
+    return RawJSONResponse(body)
+
+Returning a Response directly bypasses response_model validation, so
+these routes must already produce the documented shape.
+"""
+
+import json
+import math
+from typing import Any
+
+from fastapi.responses import Response
+
+from app.metrics import stage
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    """Numpy scalars / arrays and datetimes for the stdlib fallback"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes (NaN / inf become null)"""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+
+    return json.dumps(
+        _replace_nan(content),
+        ensure_ascii=False,
+        separators=(",", ":"),
+        allow_nan=False,
+        default=_default,
+    ).encode("utf-8")
+
+
+def _replace_nan(content: Any) -> Any:
+    if isinstance(content, float):
+        return content if math.isfinite(content) else None
+    if isinstance(content, dict):
+        return {key: _replace_nan(value) for key, value in content.items()}
+    if isinstance(content, (list, tuple)):
+        return [_replace_nan(value) for value in content]
+    return content
+
+
+class FastJSONResponse(Response):
+    """JSON response rendered with dumps() instead of json.dumps"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        with stage("serialization"):
+            return dumps(content)
+
+
+class RawJSONResponse(Response):
+    """Already serialized JSON bytes, sent as is"""
+
+    media_type = "application/json"
+
+
+__all__ = [
+    "dumps",
+    "FastJSONResponse",
+    "RawJSONResponse",
+]
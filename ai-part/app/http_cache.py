@@ -0,0 +1,75 @@
+"""
+HTTP Conditional Requests
+ETags for read-only endpoints whose body only depends on the catalog
+
+The ETag is the catalog version plus a hash of the path and the
+(sorted) query parameters, so it is known after a stat() of the
+dataset file, before anything is computed. A request whose
+If-None-Match matches gets an empty 304 and the body is never built
+or serialized. Responses carry `Cache-Control: no-cache`: clients may
+keep them but must revalidate, which is a cheap 304 until the weekly
+scraper run changes the dataset.
+
+    etag = catalog_etag(request, catalog)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    ...
+    return RawJSONResponse(body, headers=etag_headers(etag))
+"""
+
+import hashlib
+from typing import Dict
+from urllib.parse import urlencode
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.catalog import CatalogSnapshot
+
+CACHE_CONTROL = "no-cache"
+
+
+def catalog_etag(request: Request, catalog: CatalogSnapshot) -> str:
+    """
+    ETag for this path + query on this catalog version
+
+    Weak (W/): workers may differ in diagnostic fields such as index
+    build times, the data itself is the same.
+    """
+    query = urlencode(sorted(request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{request.url.path}?{query}".encode("utf-8")).hexdigest()[:12]
+    return f'W/"{catalog.version}-{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match contains `etag` (or *), weak comparison (RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    opaque = _opaque_tag(etag)
+    return any(_opaque_tag(candidate) == opaque for candidate in header.split(","))
+
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    """Empty 304 carrying the same validators as the full response"""
+    return Response(status_code=304, headers=etag_headers(etag))
+
+
+__all__ = [
+    "catalog_etag",
+    "etag_matches",
+    "etag_headers",
+    "not_modified",
+]
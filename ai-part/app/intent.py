@@ -0,0 +1,375 @@
+"""
+Search Intent
+Turns a free-text prompt into structured catalog filters
+
+"german diesel estate, automatic, under 150k km, newer than 2015"
+    -> brands, fuels, gearbox, body_types, max_mileage, min_year
+
+Everything is local (compiled regexes + small vocabularies), so the
+LLM only sees cars that already match what the customer asked for.
+Filters are applied as numpy masks over the catalog snapshot columns;
+cue types the dataset has no column for (body type, seats) are checked
+on the listing dicts, and listings that don't state them are kept.
+"""
+
+import re
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.ai_calculations import BRAND_KEYWORDS
+from app.catalog import CatalogSnapshot
+from app.metrics import timed
+from app.pareto import get_pareto_index, skyline
+
+
+# =========================
+# VOCABULARIES
+# =========================
+KNOWN_BRANDS = [
+    "BMW", "Mercedes", "Audi", "Volkswagen", "Porsche",
+    "Peugeot", "Citroen", "Renault", "Toyota", "Honda",
+    "Mazda", "Nissan", "Volvo", "Ford", "Jeep", "Hyundai",
+    "Kia", "Skoda", "Seat", "Fiat", "Tesla", "Lynk",
+    "Opel", "Dacia", "Lexus", "Subaru", "Suzuki",
+]
+
+# Brand aliases people type -> catalog brand
+BRAND_ALIASES = {
+    "vw": "Volkswagen",
+    "merc": "Mercedes",
+    "benz": "Mercedes",
+    "mercedes-benz": "Mercedes",
+}
+
+# Country keywords -> brands ("electric" is a fuel here, not a country)
+COUNTRY_BRANDS = {k: v for k, v in BRAND_KEYWORDS.items() if k != "electric"}
+
+# Prompt word -> catalog fuel label
+FUEL_WORDS = {
+    "diesel": "diesel", "tdi": "diesel", "hdi": "diesel", "dci": "diesel",
+    "petrol": "petrol", "gasoline": "petrol", "gas": "petrol", "benzin": "petrol",
+    "hybrid": "hybrid", "phev": "hybrid", "plug-in": "hybrid",
+    "electric": "electric", "ev": "electric", "bev": "electric",
+}
+
+GEARBOX_WORDS = {
+    "automatic": "automatic", "dsg": "automatic",
+    "manual": "manual", "stick": "manual",
+}
+
+BODY_WORDS = {
+    "suv": "suv", "crossover": "suv", "4x4": "suv",
+    "estate": "estate", "wagon": "estate", "kombi": "estate", "touring": "estate",
+    "hatchback": "hatchback", "hatch": "hatchback",
+    "sedan": "sedan", "saloon": "sedan",
+    "coupe": "coupe",
+    "convertible": "convertible", "cabrio": "convertible", "cabriolet": "convertible",
+    "van": "van", "minivan": "van", "mpv": "van",
+    "pickup": "pickup",
+}
+
+NUMBER_WORDS = {"two": 2, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9}
+
+LOW_MILEAGE_KM = 100_000
+RECENT_YEARS = 5
+MILES_TO_KM = 1.609
+
+
+# =========================
+# COMPILED PATTERNS
+# =========================
+def _word_pattern(words) -> "re.Pattern":
+    alternatives = sorted((re.escape(w.lower()) for w in words), key=len, reverse=True)
+    return re.compile(r"(?<![\w-])(" + "|".join(alternatives) + r")(?![\w-])")
+
+
+_BRAND_LOOKUP = {**{b.lower(): b for b in KNOWN_BRANDS}, **BRAND_ALIASES}
+
+_BRAND_RE = _word_pattern(_BRAND_LOOKUP)
+_COUNTRY_RE = _word_pattern(COUNTRY_BRANDS)
+_FUEL_RE = _word_pattern(FUEL_WORDS)
+_GEARBOX_RE = _word_pattern(GEARBOX_WORDS)
+_BODY_RE = _word_pattern(BODY_WORDS)
+
+_UPPER = r"(?:under|below|less than|max(?:imum)?|up to|at most|within|no more than|<)"
+_LOWER = r"(?:over|above|more than|at least|min(?:imum)?|from|since|after|newer than|later than|>)"
+
+# 12,000 / 12.000 / 12 000 / 12000 / 12.5 / 12k
+_NUMBER = r"(\d{1,3}(?:[,. ]\d{3})+|\d+(?:\.\d+)?)(?!\d)\s*(k\b|thousand\b)?"
+_DISTANCE_UNIT = re.compile(r"\s*(?:km|kms|kilomet|miles?)\b")
+
+_PRICE_RE = re.compile(_UPPER + r"\s*(?:€|eur\b|euros?\b)?\s*" + _NUMBER)
+_MILEAGE_RE = re.compile(
+    r"(?:" + _UPPER + r"\s*)?" + _NUMBER + r"\s*(km|kms|kilomet\w*|miles?)\b"
+)
+_YEAR_RE = re.compile(
+    r"(?:(" + _LOWER + r")\s*)?\b((?:19[89]|20[0-9])\d)\b\s*(\+|or (?:newer|later|above))?"
+)
+# "from 2000 euro" / "price from 2000" is an amount, not a year
+_CURRENCY_AFTER = re.compile(r"\s*(?:€|\$|eur\b|euros?\b|dollars?\b|usd\b)")
+_PRICE_BEFORE = re.compile(r"\b(?:price[ds]?|budget|costs?|costing|pay|paying|spend)\s*$")
+# "no diesel", "not a manual", "anything except bmw"
+_NEGATED = re.compile(r"\b(?:no|not|without|except)\s+(?:(?:an?|any)\s+)?$")
+_SEATS_RE = re.compile(
+    r"\b(\d|" + "|".join(NUMBER_WORDS) + r")[\s-]*(?:seats?|seater|places)\b"
+)
+
+
+def _to_number(digits: str, thousands: Optional[str]) -> float:
+    """'12,000' / '12.000' / '12 000' -> 12000, '12.5' + 'k' -> 12500"""
+    if re.fullmatch(r"\d{1,3}(?:[,. ]\d{3})+", digits):
+        value = float(re.sub(r"[,. ]", "", digits))
+    else:
+        value = float(digits)
+    return value * 1000 if thousands else value
+
+
+def _wanted(pattern: "re.Pattern", text: str) -> List[str]:
+    """Matches of `pattern` that are not negated ("no diesel")"""
+    return [
+        match.group(1)
+        for match in pattern.finditer(text)
+        if not _NEGATED.search(text[max(0, match.start() - 16):match.start()])
+    ]
+
+
+# =========================
+# PARSER
+# =========================
+def parse_intent(prompt: str) -> dict:
+    """
+    Structured filters from a prompt
+
+    Returns:
+        {"brands", "fuels", "gearbox", "body_types", "min_seats",
+         "max_price", "max_mileage", "min_year"} - None / [] when absent
+    """
+    text = prompt.lower()
+
+    brands = {_BRAND_LOOKUP[match] for match in _wanted(_BRAND_RE, text)}
+    for country in _wanted(_COUNTRY_RE, text):
+        brands.update(COUNTRY_BRANDS[country])
+
+    fuels = sorted({FUEL_WORDS[w] for w in _wanted(_FUEL_RE, text)})
+    gearboxes = {GEARBOX_WORDS[w] for w in _wanted(_GEARBOX_RE, text)}
+    body_types = sorted({BODY_WORDS[w] for w in _BODY_RE.findall(text)})
+
+    max_price = None
+    for match in _PRICE_RE.finditer(text):
+        if _DISTANCE_UNIT.match(text, match.end()):
+            continue  # "under 150k km" is mileage
+        value = _to_number(*match.groups())
+        if value >= 500:  # "under 5 years old" is not a price
+            max_price = value if max_price is None else min(max_price, value)
+
+    max_mileage = None
+    for digits, thousands, unit in _MILEAGE_RE.findall(text):
+        value = _to_number(digits, thousands)
+        if unit.startswith("mile"):
+            value *= MILES_TO_KM
+        max_mileage = value if max_mileage is None else min(max_mileage, value)
+    if max_mileage is None and "low mileage" in text:
+        max_mileage = LOW_MILEAGE_KM
+
+    min_year = None
+    for match in _YEAR_RE.finditer(text):
+        qualifier, year, suffix = match.groups(default="")
+        before = text[max(0, match.start() - 16):match.start()]
+        if _CURRENCY_AFTER.match(text, match.end(2)) or _PRICE_BEFORE.search(before):
+            continue
+        year = int(year)
+        if qualifier in ("after", "newer than", "later than", ">", "over", "above", "more than"):
+            min_year = year + 1
+        elif qualifier or suffix:
+            min_year = year
+    if min_year is None and re.search(r"\b(?:newer|recent)\b", text):
+        min_year = datetime.now().year - RECENT_YEARS
+
+    min_seats = None
+    seats_match = _SEATS_RE.search(text)
+    if seats_match:
+        raw = seats_match.group(1)
+        min_seats = int(raw) if raw.isdigit() else NUMBER_WORDS[raw]
+
+    return {
+        "brands": sorted(brands),
+        "fuels": fuels,
+        # "automatic or manual" is no constraint at all
+        "gearbox": gearboxes.pop() if len(gearboxes) == 1 else None,
+        "body_types": body_types,
+        "min_seats": min_seats,
+        "max_price": max_price,
+        "max_mileage": round(max_mileage) if max_mileage is not None else None,
+        "min_year": min_year,
+    }
+
+
+def describe_intent(intent: dict) -> str:
+    """Short human-readable summary of the active filters"""
+    parts = []
+    if intent["brands"]:
+        parts.append("/".join(intent["brands"]))
+    if intent["fuels"]:
+        parts.append("/".join(intent["fuels"]))
+    if intent["gearbox"]:
+        parts.append(intent["gearbox"])
+    if intent["body_types"]:
+        parts.append("/".join(intent["body_types"]))
+    if intent["min_seats"]:
+        parts.append(f"{intent['min_seats']}+ seats")
+    if intent["max_price"] is not None:
+        parts.append(f"≤ €{intent['max_price']:,.0f}")
+    if intent["max_mileage"] is not None:
+        parts.append(f"≤ {intent['max_mileage']:,} km")
+    if intent["min_year"] is not None:
+        parts.append(f"{intent['min_year']}+")
+    return ", ".join(parts)
+
+
+# =========================
+# CANDIDATE SELECTION
+# =========================
+# Filters dropped one at a time (least important first) when nothing matches
+RELAX_ORDER = ["body_types", "min_seats", "gearbox", "max_mileage", "min_year", "fuels", "brands"]
+
+
+def _vocab_codes(vocab: List[str], wanted: List[str]) -> List[int]:
+    """Codes of vocabulary labels containing any wanted term"""
+    wanted = [w.lower() for w in wanted]
+    return [code for code, label in enumerate(vocab) if label and any(w in label for w in wanted)]
+
+
+def _column_mask(
+    snapshot: CatalogSnapshot,
+    intent: dict,
+    budget: Optional[float],
+    rows: np.ndarray
+) -> np.ndarray:
+    """Which of `rows` pass the column filters (cost is O(len(rows)))"""
+    mask = np.ones(rows.size, dtype=bool)
+
+    if budget:
+        mask &= snapshot.price[rows] <= budget
+    if intent["brands"]:
+        codes = _vocab_codes(snapshot.brand_vocab, intent["brands"])
+        mask &= np.isin(snapshot.brand_codes[rows], codes)
+    if intent["fuels"]:
+        codes = _vocab_codes(snapshot.fuel_vocab, intent["fuels"])
+        mask &= np.isin(snapshot.fuel_codes[rows], codes)
+    if intent["gearbox"]:
+        # Unknown gearbox (code 0) is kept
+        codes = _vocab_codes(snapshot.gearbox_vocab, [intent["gearbox"][:4]])
+        mask &= np.isin(snapshot.gearbox_codes[rows], [0] + codes)
+    if intent["max_mileage"] is not None:
+        mask &= ~(snapshot.mileage[rows] > intent["max_mileage"])
+    if intent["min_year"] is not None:
+        mask &= ~(snapshot.year[rows] < intent["min_year"])
+
+    return mask
+
+
+def _listing_ok(car: dict, intent: dict) -> bool:
+    """Checks for fields that only some sources provide (missing = ok)"""
+    if intent["body_types"]:
+        body = (car.get("body_type") or "").lower()
+        if body and not any(b in body for b in intent["body_types"]):
+            return False
+    if intent["min_seats"]:
+        seats = car.get("seats")
+        if isinstance(seats, (int, float)) and seats < intent["min_seats"]:
+            return False
+    return True
+
+
+def _matching_rows(
+    snapshot: CatalogSnapshot,
+    intent: dict,
+    budget: Optional[float],
+    within: Optional[np.ndarray] = None
+) -> np.ndarray:
+    rows = np.arange(snapshot.size) if within is None else np.asarray(within, dtype=int)
+    rows = rows[_column_mask(snapshot, intent, budget, rows)]
+    if intent["body_types"] or intent["min_seats"]:
+        rows = np.array([r for r in rows.tolist() if _listing_ok(snapshot.cars[r], intent)], dtype=int)
+    return rows
+
+
+def _pre_rank(snapshot: CatalogSnapshot, rows: np.ndarray, limit: int) -> List[int]:
+    """
+    Up to `limit` rows worth analyzing
+
+    Price/risk/mileage Pareto front first (no listing there is beaten on
+    all three), then the rest by lowest risk, then price.
+    """
+    index = get_pareto_index(snapshot)
+
+    comparable = rows[index.comparable[rows]]
+    chosen = skyline(comparable, snapshot.price, index.risk, snapshot.mileage)[:limit]
+
+    if len(chosen) < limit:
+        taken = set(chosen)
+        rest = np.array([r for r in rows.tolist() if r not in taken], dtype=int)
+        if rest.size:
+            price = np.nan_to_num(snapshot.price[rest], nan=np.inf)
+            rest = rest[np.lexsort((price, index.risk[rest]))]
+            chosen.extend(rest[:limit - len(chosen)].tolist())
+
+    return chosen
+
+
+@timed("candidate_filter")
+def select_candidates(
+    snapshot: CatalogSnapshot,
+    intent: dict,
+    budget: Optional[float] = None,
+    limit: int = 15,
+    within: Optional[np.ndarray] = None,
+    exclude: Sequence[int] = ()
+) -> Tuple[List[int], np.ndarray, List[str]]:
+    """
+    Rows to analyze for a suggestion
+
+    The budget is always enforced. If nothing matches, intent filters
+    are relaxed one by one (RELAX_ORDER).
+
+    Args:
+        within: Only search these rows (a conversation narrowing its
+            previous matches); falls back to the full catalog if
+            nothing in it matches
+        exclude: Rows to leave out of the ranking when others remain
+            (cars already recommended)
+
+    Returns:
+        (row ids to analyze, all matching row ids, names of relaxed filters)
+    """
+    intent = dict(intent)
+    relaxed = []
+
+    rows = _matching_rows(snapshot, intent, budget, within)
+    if within is not None and not rows.size:
+        rows = _matching_rows(snapshot, intent, budget)
+
+    for name in RELAX_ORDER:
+        if rows.size:
+            break
+        if intent[name]:
+            intent[name] = [] if isinstance(intent[name], list) else None
+            relaxed.append(name)
+            rows = _matching_rows(snapshot, intent, budget)
+
+    ranked = rows
+    if len(exclude) and rows.size:
+        fresh = rows[~np.isin(rows, np.asarray(exclude, dtype=int))]
+        if fresh.size:
+            ranked = fresh
+
+    return _pre_rank(snapshot, ranked, limit), rows, relaxed
+
+
+__all__ = [
+    "parse_intent",
+    "describe_intent",
+    "select_candidates",
+]
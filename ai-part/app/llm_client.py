@@ -0,0 +1,322 @@
+"""
+LLM Client
+One shared async OpenAI client for the whole process
+
+- Non-blocking: awaits the HTTP call, so the event loop keeps serving
+  other requests while the model is thinking
+- Pooled: keep-alive connections are reused across requests
+- Explicit timeouts instead of the SDK's 10 minute default
+- Bounded: at most LLM_MAX_CONCURRENCY calls in flight, a bounded wait
+  queue in front (app/llm_gate.py) and a deadline per call
+- Retries 429 / 5xx / connection errors itself, honouring Retry-After
+  and adding jitter (the SDK's own retries are turned off)
+- Guarded by a circuit breaker (app/circuit_breaker.py): after repeated
+  failures or slow calls, calls fail at once with CircuitOpenError so
+  callers can answer from local data instead of waiting for timeouts
+
+Set OPENAI_BASE_URL to point at a local stub server
+(see scripts/fake_openai_server.py) for testing without the real API.
+
+The openai SDK (and httpx) take ~0.4s to import; they are imported on
+first use (or by the startup warmup, app/warmup.py), not with this module.
+"""
+
+import asyncio
+import functools
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.llm_gate import ConcurrencyGate, LLMDeadlineError
+from app.metrics import observe_stage
+
+
+# =========================
+# CONFIGURATION
+# =========================
+MODEL_NAME = os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "8"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "45"))
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "32"))
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_SLOW_SECONDS = float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "15"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))
+
+
+
+# =========================
+# ERROR CLASSES (LAZY)
+# =========================
+@functools.lru_cache(maxsize=None)
+def retryable_errors() -> Tuple[type, ...]:
+    """Errors worth another attempt (APITimeoutError is an APIConnectionError)"""
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.InternalServerError,
+        openai.APIConnectionError,
+    )
+
+
+def upstream_unavailable_errors() -> Tuple[type, ...]:
+    """
+    Upstream is down / slow / throttling: answer from local data instead
+
+    A function so `except upstream_unavailable_errors():` only imports
+    the SDK once an exception is actually being matched.
+    """
+    return retryable_errors() + (CircuitOpenError, LLMDeadlineError)
+
+
+# =========================
+# SHARED CLIENT
+# =========================
+_client = None  # openai.AsyncOpenAI
+
+_gate = ConcurrencyGate(LLM_MAX_CONCURRENCY, LLM_QUEUE_SIZE, LLM_QUEUE_TIMEOUT)
+
+_breaker = CircuitBreaker(
+    "llm",
+    failure_threshold=LLM_BREAKER_FAILURES,
+    slow_call_seconds=LLM_BREAKER_SLOW_SECONDS,
+    reset_timeout=LLM_BREAKER_RESET,
+)
+
+_retry_stats = {"retries": 0, "rate_limited": 0, "deadline_exceeded": 0}
+
+
+def get_llm_client() -> "openai.AsyncOpenAI":
+    """Process-wide AsyncOpenAI client (created on first use)"""
+    global _client
+
+    if _client is None:
+        import httpx
+        import openai
+
+        _client = openai.AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"),
+            base_url=OPENAI_BASE_URL,
+            timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            max_retries=0,  # retried in _call_with_retries
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                ),
+                timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            ),
+        )
+
+    return _client
+
+
+async def close_llm_client() -> None:
+    """Close pooled connections (called on app shutdown)"""
+    global _client
+
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+# =========================
+# RETRIES
+# =========================
+def _retry_after_seconds(error: Exception) -> float:
+    """Server-requested wait from a Retry-After header, 0 if none"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return 0.0
+
+    try:
+        return float(response.headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Full-jitter exponential backoff, never shorter than Retry-After"""
+    backoff = random.uniform(0, LLM_RETRY_BASE_DELAY * 2 ** attempt)
+    return min(max(backoff, _retry_after_seconds(error)), LLM_RETRY_MAX_DELAY)
+
+
+async def _call_with_retries(
+    call: Callable[[], Awaitable[Any]],
+    deadline: float
+) -> Any:
+    """Run `call` until it succeeds, retries run out or the deadline passes"""
+    loop = asyncio.get_running_loop()
+    attempt = 0
+
+    while True:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            _retry_stats["deadline_exceeded"] += 1
+            raise LLMDeadlineError(f"LLM call exceeded its {LLM_DEADLINE:g}s deadline")
+
+        try:
+            return await asyncio.wait_for(call(), remaining)
+        except asyncio.TimeoutError:
+            _retry_stats["deadline_exceeded"] += 1
+            raise LLMDeadlineError(f"LLM call exceeded its {LLM_DEADLINE:g}s deadline")
+        except retryable_errors() as e:
+            if isinstance(e, retryable_errors()[0]):  # openai.RateLimitError
+                _retry_stats["rate_limited"] += 1
+
+            delay = _retry_delay(e, attempt)
+            if attempt >= LLM_MAX_RETRIES or loop.time() + delay >= deadline:
+                raise
+
+            attempt += 1
+            _retry_stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+
+@asynccontextmanager
+async def _upstream_call() -> AsyncIterator[Callable[[], None]]:
+    """
+    Breaker check + gate slot around one upstream call
+
+    Only upstream_unavailable_errors() (timeouts, connection errors,
+    5xx, 429) count as breaker failures; other errors, calls shed by
+    our own queue or cancelled by the client leave it untouched.
+
+    Yields a callable for streams to mark their first token: the
+    breaker then judges the time to first token, not the whole stream.
+    """
+    _breaker.check()
+    recorded = False
+    queued = time.monotonic()
+    first_token: List[float] = []
+
+    def mark_first_token() -> None:
+        if not first_token:
+            first_token.append(time.monotonic())
+
+    try:
+        async with _gate.slot():
+            started = time.monotonic()
+            observe_stage("llm_queue_wait", started - queued)
+            try:
+                yield mark_first_token
+            except Exception as e:
+                observe_stage("llm_call", time.monotonic() - started)
+                if isinstance(e, upstream_unavailable_errors()):
+                    _breaker.record_failure()
+                    recorded = True
+                raise
+            finished = time.monotonic()
+            observe_stage("llm_call", finished - started)
+            _breaker.record_success((first_token[0] if first_token else finished) - started)
+            recorded = True
+    finally:
+        if not recorded:
+            _breaker.release()
+
+
+# =========================
+# COMPLETIONS
+# =========================
+async def chat_completion(
+    messages: List[Dict[str, str]],
+    temperature: float = 0.7,
+    max_tokens: int = 200
+) -> str:
+    """
+    Single chat completion, returns the reply text
+
+    Raises LLMOverloadedError when the wait queue is full,
+    LLMDeadlineError when LLM_DEADLINE passes (queue wait included) and
+    CircuitOpenError while the breaker is open.
+    """
+    deadline = asyncio.get_running_loop().time() + LLM_DEADLINE
+
+    async with _upstream_call():
+        response = await _call_with_retries(
+            lambda: get_llm_client().chat.completions.create(
+                model=MODEL_NAME,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            ),
+            deadline,
+        )
+
+    return response.choices[0].message.content
+
+
+async def stream_chat_completion(
+    messages: List[Dict[str, str]],
+    temperature: float = 0.7,
+    max_tokens: int = 200
+) -> AsyncIterator[str]:
+    """
+    Streamed chat completion, yields reply text fragments as they arrive
+
+    Holds its LLM slot until the stream ends. Only the request itself
+    is retried; once tokens flow, errors are raised to the caller. The
+    circuit breaker judges the time to the first token.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + LLM_DEADLINE
+
+    async with _upstream_call() as mark_first_token:
+        stream = await _call_with_retries(
+            lambda: get_llm_client().chat.completions.create(
+                model=MODEL_NAME,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+            ),
+            deadline,
+        )
+
+        chunks = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(
+                    chunks.__anext__(), max(deadline - loop.time(), 0)
+                )
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                _retry_stats["deadline_exceeded"] += 1
+                await stream.close()
+                raise LLMDeadlineError(f"LLM stream exceeded its {LLM_DEADLINE:g}s deadline")
+
+            if chunk.choices and chunk.choices[0].delta.content:
+                mark_first_token()
+                yield chunk.choices[0].delta.content
+
+
+def llm_stats() -> dict:
+    """Concurrency gate, retry counters and circuit breaker state"""
+    return {**_gate.stats(), **_retry_stats, "circuit": _breaker.stats()}
+
+
+__all__ = [
+    "MODEL_NAME",
+    "get_llm_client",
+    "close_llm_client",
+    "chat_completion",
+    "stream_chat_completion",
+    "llm_stats",
+    "retryable_errors",
+    "upstream_unavailable_errors",
+]
@@ -0,0 +1,105 @@
+"""
+LLM Concurrency Gate
+Caps in-flight LLM calls and bounds the queue in front of them
+
+- At most `limit` calls run at once (the provider's rate budget)
+- Up to `queue_size` callers wait for a slot, each for at most
+  `queue_timeout` seconds
+- Anyone beyond that fails fast with LLMOverloadedError, which the
+  API turns into a 503 + Retry-After instead of piling up timeouts
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+
+class LLMOverloadedError(Exception):
+    """LLM queue full (or no slot freed in time) — shed the request"""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMDeadlineError(TimeoutError):
+    """A call (including its retries) ran past its deadline"""
+
+
+class ConcurrencyGate:
+    """
+    Semaphore with a bounded, time-limited wait queue
+    """
+
+    def __init__(self, limit: int, queue_size: int, queue_timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(limit)
+
+        self.active = 0
+        self.waiting = 0
+        self.max_active = 0
+        self.max_waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one LLM slot for the duration of the block"""
+        if not self._semaphore.locked():
+            # Free slot: acquire() returns without suspending
+            await self._semaphore.acquire()
+        else:
+            await self._wait_for_slot()
+
+        self.active += 1
+        self.admitted += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    async def _wait_for_slot(self) -> None:
+        if self.waiting >= self.queue_size:
+            self.rejected += 1
+            raise LLMOverloadedError(
+                f"LLM queue is full ({self.active} running, {self.waiting} waiting)"
+            )
+
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise LLMOverloadedError(
+                f"No LLM slot became free within {self.queue_timeout:g}s",
+                retry_after=max(1, round(self.queue_timeout)),
+            )
+        finally:
+            self.waiting -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "queue_timeout_seconds": self.queue_timeout,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_active": self.max_active,
+            "max_waiting": self.max_waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+__all__ = [
+    "LLMOverloadedError",
+    "LLMDeadlineError",
+    "ConcurrencyGate",
+]
@@ -1,12 +1,23 @@
-import threading
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, BackgroundTasks
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
 import os
-from scrapers.automator import run_automation
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (before app modules read them)
+from app.env import load_env
+load_env()
+
+from app.executors import shutdown_executors
+from app.llm_client import close_llm_client
+from app.sessions import close_session_store
+from app.metrics import MetricsMiddleware, metrics_summary, render_prometheus
+from app.profiling import ProfilingMiddleware
+from app.shared_catalog import shared_stats
+from app.warmup import is_warm, readiness, record_phase, start_warmup, startup_report
+from app.fast_json import FastJSONResponse
 
 # Create FastAPI app
 app = FastAPI(
@@ -24,6 +35,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route request count / latency / in-flight (see /metrics)
+app.add_middleware(MetricsMiddleware)
+
+# X-Profile: <PROFILE_TOKEN> runs one request under a profiler
+app.add_middleware(ProfilingMiddleware)
+
 # --- Manual Scraper Logic ---
 # Note: For production, 7-day automated scraping should be handled via Linux CRON Jobs.
 # See deployment_guide.md for instructions.
@@ -39,14 +56,25 @@ async def root():
             "run_scraper": "/run-scraper (POST)",
             "analyze_cars": "/analyze-cars/",
             "compare_cars": "/compare-cars/",
+            "rank_cars": "/rank-cars/",
+            "cars_list": "/cars/list?limit=&cursor=&sort=&fields=",
+            "similar_cars": "/cars/{car_id}/similar",
+            "pareto_front": "/cars/pareto",
             "ai_suggest": "/ai-suggest/",
-            "health": "/health"
+            "ai_sessions": "/sessions (POST), /sessions/{session_id}/suggest (POST)",
+            "health": "/health",
+            "liveness": "/health/live",
+            "readiness": "/health/ready",
+            "metrics": "/metrics (?format=json)"
         }
     }
 
 @app.post("/run-scraper")
 async def trigger_scraper(background_tasks: BackgroundTasks):
     """Manually trigger the scraper automation in the background"""
+    # Imported here: the scraper chain (selenium, webdriver) is slow to import
+    from scrapers.automator import run_automation
+
     background_tasks.add_task(run_automation)
     return {"message": "Scraper started in background"}
 
@@ -54,10 +82,48 @@ async def trigger_scraper(background_tasks: BackgroundTasks):
 async def health_check():
     return {
         "status": "healthy",
+        "warm": is_warm(),
         "openai_key_set": bool(os.getenv("OPENAI_API_KEY")),
-        "node_api_url": os.getenv("NODE_API_URL")
+        "node_api_url": os.getenv("NODE_API_URL"),
+        "shared_catalog": shared_stats(),
+        "startup": startup_report()
     }
 
+@app.get("/health/live")
+async def liveness():
+    """Liveness probe: the process answers (no dependency is checked)"""
+    return FastJSONResponse({"status": "alive"})
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: 200 once dataset + indexes are warm, 503 before"""
+    ready, report = readiness()
+    return FastJSONResponse(
+        report, status_code=200 if ready else 503, headers={"Cache-Control": "no-store"}
+    )
+
+@app.get("/metrics")
+async def metrics(format: str = "prometheus"):
+    """Request and stage metrics (Prometheus text, or ?format=json)"""
+    if format == "json":
+        return metrics_summary()
+    return PlainTextResponse(
+        render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+@app.on_event("startup")
+async def warmup():
+    # WARMUP=background|blocking|off, see app/warmup.py
+    await start_warmup()
+
+@app.on_event("shutdown")
+async def shutdown_pools():
+    shutdown_executors()
+    await close_llm_client()
+    await close_session_store()
+
 # Include routes
 from app.routes import router
-app.include_router(router)
\ No newline at end of file
+app.include_router(router)
+
+record_phase("app_import", time.perf_counter() - _import_started)
@@ -0,0 +1,300 @@
+"""
+Market Price Cube
+Comparable-sales price statistics per market segment
+
+Segments are brand x age bucket x mileage bucket x fuel. For every
+segment (and coarser roll-ups of it) the cube keeps median, quartiles,
+mean and count of asking prices across the catalog, so valuing a car is
+a dictionary lookup instead of a scan over similar listings.
+
+The cube is built once per catalog version. When a new version arrives
+it is updated incrementally: only listings that were added or removed
+since the previous version are applied, and only the segments they
+touch are recomputed.
+"""
+
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.ai_calculations import (
+    BUDGET_BRANDS,
+    MID_TIER_BRANDS,
+    PREMIUM_BRANDS,
+    analyze_multiple_cars,
+    calculate_age,
+    safe_float,
+)
+from app.catalog import CatalogSnapshot, get_catalog
+
+
+# =========================
+# SEGMENTS
+# =========================
+AGE_BUCKETS = [2, 5, 10, 15]                       # 0-2, 3-5, 6-10, 11-15, 16+
+MILEAGE_BUCKETS = [50000, 100000, 150000, 200000]  # km
+
+# Segment levels, most specific first. Each is a tuple of field names
+# from the segment key (brand, tier, age_bucket, mileage_bucket, fuel).
+# Every level keeps the brand or its tier: a premium car is never
+# priced from a catalog-wide median of budget cars. With no level
+# qualifying, lookup() returns None and the rule-based estimate is used.
+SEGMENT_LEVELS = [
+    ("brand", "age", "mileage", "fuel"),
+    ("brand", "age", "mileage"),
+    ("brand", "age"),
+    ("tier", "age", "mileage", "fuel"),
+    ("tier", "age", "mileage"),
+    ("tier", "age"),
+]
+
+# Minimum listings in a segment before it is used as market reference
+MIN_SEGMENT_COUNT = 3
+
+
+def _bucket(value: float, edges: List[int]) -> int:
+    for i, edge in enumerate(edges):
+        if value <= edge:
+            return i
+    return len(edges)
+
+
+def brand_tier(brand: Optional[str]) -> str:
+    """premium / mid / budget (brand lists in ai_calculations), else other"""
+    name = (brand or "").strip().upper()
+    if name in PREMIUM_BRANDS:
+        return "premium"
+    if name in MID_TIER_BRANDS:
+        return "mid"
+    if name in BUDGET_BRANDS:
+        return "budget"
+    return "other"
+
+
+def segment_of(brand: Optional[str], age: int, mileage: float, fuel: Optional[str]) -> Dict[str, object]:
+    """Segment fields for one car"""
+    return {
+        "brand": (brand or "").strip().lower(),
+        "tier": brand_tier(brand),
+        "age": _bucket(age, AGE_BUCKETS),
+        "mileage": _bucket(mileage, MILEAGE_BUCKETS),
+        "fuel": (fuel or "").strip().lower(),
+    }
+
+
+def _segment_keys(segment: Dict[str, object]) -> List[Tuple]:
+    """Cube key of the car's segment at every level"""
+    return [
+        (level,) + tuple(segment[field] for field in level)
+        for level in SEGMENT_LEVELS
+    ]
+
+
+def _fingerprint(car: dict) -> Optional[Tuple]:
+    """
+    Hashable identity of a priced listing
+
+    Any change in price or segment fields gives a new fingerprint,
+    which the incremental update treats as remove + add.
+    """
+    price = car.get("price_numeric")
+    if not isinstance(price, (int, float)) or price <= 0:
+        return None
+
+    return (
+        car.get("url") or car.get("title") or "",
+        float(price),
+        car.get("year_numeric"),
+        safe_float(car.get("mileage_numeric"), 0),
+        car.get("brand"),
+        car.get("fuel_type"),
+    )
+
+
+def _fingerprint_keys(fingerprint: Tuple) -> List[Tuple]:
+    _, _, year, mileage, brand, fuel = fingerprint
+    return _segment_keys(segment_of(brand, calculate_age(year), mileage, fuel))
+
+
+def _segment_stats(prices: List[float]) -> Dict[str, float]:
+    values = np.asarray(prices, dtype=float)
+    p25, median, p75 = np.percentile(values, [25, 50, 75])
+    return {
+        "count": int(values.size),
+        "median": round(float(median), 2),
+        "p25": round(float(p25), 2),
+        "p75": round(float(p75), 2),
+        "mean": round(float(values.mean()), 2),
+    }
+
+
+# =========================
+# CUBE
+# =========================
+class MarketCube:
+    """
+    Price statistics per segment for one catalog version
+    """
+
+    def __init__(
+        self,
+        version: str,
+        listings: Counter,
+        prices: Dict[Tuple, List[float]],
+        stats: Dict[Tuple, Dict[str, float]],
+        build_ms: float,
+        touched_segments: int
+    ):
+        self.version = version
+        self._listings = listings
+        self._prices = prices
+        self.stats = stats
+        self.build_ms = build_ms
+        self.touched_segments = touched_segments
+        # Age buckets depend on the current year
+        self.year = datetime.now().year
+
+    @classmethod
+    def build(cls, snapshot: CatalogSnapshot) -> "MarketCube":
+        """Full build from a snapshot"""
+        return cls.empty().updated(snapshot)
+
+    @classmethod
+    def empty(cls) -> "MarketCube":
+        return cls("", Counter(), {}, {}, 0.0, 0)
+
+    def updated(self, snapshot: CatalogSnapshot) -> "MarketCube":
+        """
+        New cube for `snapshot`, applying only the listing diff
+
+        This cube is left untouched (segments are copied on write),
+        so requests still holding the previous version stay consistent.
+        """
+        if self._listings and self.year != datetime.now().year:
+            return MarketCube.empty().updated(snapshot)
+
+        started = time.perf_counter()
+
+        listings = Counter(
+            fp for fp in map(_fingerprint, snapshot.cars) if fp is not None
+        )
+        added = listings - self._listings
+        removed = self._listings - listings
+
+        prices = dict(self._prices)
+        dirty = set()
+
+        for fingerprint, count in removed.items():
+            for key in _fingerprint_keys(fingerprint):
+                if key not in dirty:
+                    prices[key] = list(prices[key])
+                    dirty.add(key)
+                for _ in range(count):
+                    prices[key].remove(fingerprint[1])
+
+        for fingerprint, count in added.items():
+            for key in _fingerprint_keys(fingerprint):
+                if key not in dirty:
+                    prices[key] = list(prices.get(key, []))
+                    dirty.add(key)
+                prices[key].extend([fingerprint[1]] * count)
+
+        stats = dict(self.stats)
+        for key in dirty:
+            if prices[key]:
+                stats[key] = _segment_stats(prices[key])
+            else:
+                del prices[key]
+                stats.pop(key, None)
+
+        return MarketCube(
+            snapshot.version,
+            listings,
+            prices,
+            stats,
+            (time.perf_counter() - started) * 1000,
+            len(dirty),
+        )
+
+    def lookup(self, car_data: dict) -> Optional[Dict]:
+        """
+        Market reference for a car: the most specific segment with at
+        least MIN_SEGMENT_COUNT listings, or None.
+        """
+        segment = segment_of(
+            car_data.get("brand"),
+            calculate_age(car_data.get("year_numeric")),
+            safe_float(car_data.get("mileage_numeric"), 0),
+            car_data.get("fuel_type"),
+        )
+
+        for key in _segment_keys(segment):
+            stats = self.stats.get(key)
+            if stats and stats["count"] >= MIN_SEGMENT_COUNT:
+                return {"segment": list(key[0]), **stats}
+
+        return None
+
+    def summary(self) -> Dict:
+        return {
+            "catalog_version": self.version,
+            "listings": sum(self._listings.values()),
+            "segments": len(self.stats),
+            "build_ms": round(self.build_ms, 2),
+            "touched_segments": self.touched_segments,
+        }
+
+
+# =========================
+# PER-VERSION ACCESS
+# =========================
+_latest_cube: Optional[MarketCube] = None
+_cube_lock = threading.Lock()
+
+
+def _build_for(snapshot: CatalogSnapshot) -> MarketCube:
+    global _latest_cube
+
+    with _cube_lock:
+        base = _latest_cube or MarketCube.empty()
+        cube = base.updated(snapshot)
+        _latest_cube = cube
+
+    return cube
+
+
+def get_market_cube(snapshot: CatalogSnapshot) -> MarketCube:
+    """Cube for this snapshot, derived incrementally from the last one"""
+    return snapshot.derived("market_cube", _build_for)
+
+
+def current_market_cube() -> Optional[MarketCube]:
+    """Cube of the current catalog (None if the dataset is missing)"""
+    try:
+        return get_market_cube(get_catalog())
+    except FileNotFoundError:
+        return None
+
+
+def analyze_with_market(cars: List[dict]) -> List[dict]:
+    """
+    analyze_multiple_cars() against the current market cube
+
+    Module-level so executor processes can run it: each process
+    resolves the catalog/cube itself instead of receiving it pickled.
+    """
+    return analyze_multiple_cars(cars, current_market_cube())
+
+
+__all__ = [
+    "MarketCube",
+    "brand_tier",
+    "segment_of",
+    "get_market_cube",
+    "current_market_cube",
+    "analyze_with_market",
+]
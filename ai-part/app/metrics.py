@@ -0,0 +1,387 @@
+"""
+Metrics
+Per-route request metrics and hot-path stage timings, in process
+
+1. MetricsMiddleware (pure ASGI): per route template request counts
+   by status, latency histogram and in-flight gauge
+2. stage("name"): times an internal step; used around dataset load,
+   candidate filter, analysis, LLM queue wait / call and serialization
+3. GET /metrics renders everything in the Prometheus text format
+   (?format=json: counts, mean and p50/p95/p99 estimates per series),
+   plus gauges from the LLM gate, circuit breaker and AI cache
+
+Recording is a bisect and a few additions under an uncontended lock
+(a few microseconds per request / stage). METRICS_ENABLED=0 turns stage() into a no-op and
+the middleware into a pass-through. Each worker process keeps its own
+numbers: with several uvicorn workers, scrape each or sum them.
+"""
+
+import bisect
+import os
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+
+# Latency bucket upper bounds (seconds)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+# Distinct paths remembered by the route template lookup
+_ROUTE_CACHE_SIZE = 2048
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+# =========================
+# PRIMITIVES
+# =========================
+class Histogram:
+    """Fixed-bucket histogram (thread safe)"""
+
+    __slots__ = ("buckets", "counts", "count", "sum", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate (linear within the bucket, like histogram_quantile)"""
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                low = self.buckets[i - 1] if i else 0.0
+                return low + (self.buckets[i] - low) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class _Series:
+    """Metric family: one value per label set"""
+
+    def __init__(self, name: str, kind: str, help_text: str, factory: Callable[[], Any]):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.factory = factory
+        self.values: Dict[Labels, Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels: str) -> Any:
+        key = tuple(sorted(labels.items()))
+        value = self.values.get(key)
+        if value is None:
+            with self._lock:
+                value = self.values.setdefault(key, self.factory())
+        return value
+
+
+class _Number:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+REQUESTS = _Series("car_api_requests_total", "counter", "HTTP requests by route and status", _Number)
+REQUEST_SECONDS = _Series(
+    "car_api_request_duration_seconds", "histogram", "HTTP request latency by route", Histogram
+)
+IN_FLIGHT = _Series("car_api_requests_in_flight", "gauge", "HTTP requests being handled", _Number)
+STAGE_SECONDS = _Series(
+    "car_api_stage_duration_seconds", "histogram", "Time spent in internal stages", Histogram
+)
+
+_FAMILIES = [REQUESTS, REQUEST_SECONDS, IN_FLIGHT, STAGE_SECONDS]
+
+
+# =========================
+# STAGE TIMING
+# =========================
+class _StageTimer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self) -> "_StageTimer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class _NoTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoTimer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NO_TIMER = _NoTimer()
+
+
+def stage(name: str):
+    """
+    Context manager timing one internal stage (sync or async code)
+
+        with stage("analysis"):
+            analyzed = await run_batch(analyze_with_market, cars)
+    """
+    if not METRICS_ENABLED:
+        return _NO_TIMER
+    return _StageTimer(STAGE_SECONDS.labels(stage=name))
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    """Record a stage duration measured by the caller"""
+    if METRICS_ENABLED:
+        STAGE_SECONDS.labels(stage=name).observe(seconds)
+
+
+def timed(name: str) -> Callable:
+    """Decorator form of stage() for plain functions"""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+# =========================
+# MIDDLEWARE
+# =========================
+_route_cache: Dict[Tuple[str, str], str] = {}
+
+
+def _match_template(routes, scope: dict) -> Optional[str]:
+    from starlette.routing import Match
+
+    partial = None
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match is Match.NONE:
+            continue
+
+        # Included routers (newer FastAPI) keep their routes nested
+        nested = getattr(route, "original_router", None)
+        template = (
+            _match_template(nested.routes, scope) if nested is not None
+            else getattr(route, "path", None)
+        )
+        if match is Match.FULL and template:
+            return template
+        partial = partial or template  # wrong method (405)
+
+    return partial
+
+
+def _route_template(scope: dict) -> str:
+    """Route path template ("/cars/{car_id}/similar"), not the raw path"""
+    key = (scope["method"], scope["path"])
+    template = _route_cache.get(key)
+    if template is not None:
+        return template
+
+    template = _match_template(scope["app"].router.routes, scope) or "unmatched"
+
+    if len(_route_cache) >= _ROUTE_CACHE_SIZE:
+        _route_cache.clear()
+    _route_cache[key] = template
+    return template
+
+
+class MetricsMiddleware:
+    """Request count / latency / in-flight per route (pure ASGI, streaming safe)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = _route_template(scope)
+        status = 500
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = IN_FLIGHT.labels(route=route)
+        in_flight.add(1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Includes streaming the body (SSE, NDJSON)
+            REQUEST_SECONDS.labels(method=method, route=route).observe(
+                time.perf_counter() - started
+            )
+            REQUESTS.labels(method=method, route=route, status=str(status)).add(1)
+            in_flight.add(-1)
+
+
+# =========================
+# COMPONENT GAUGES
+# =========================
+def _component_samples() -> List[Tuple[str, str, str, float]]:
+    """(name, type, help, value) read from the LLM gate, breaker and AI cache"""
+    from app.llm_client import llm_stats
+    from app.suggestion_cache import cache_stats
+
+    llm = llm_stats()
+    cache = cache_stats()
+    circuit_state = {"closed": 0, "half_open": 1, "open": 2}.get(llm["circuit"]["state"], -1)
+
+    return [
+        ("car_api_llm_active", "gauge", "LLM calls holding a concurrency slot", llm["active"]),
+        ("car_api_llm_waiting", "gauge", "LLM calls queued for a slot", llm["waiting"]),
+        ("car_api_llm_rejected_total", "counter", "LLM calls shed (queue full)", llm["rejected"]),
+        ("car_api_llm_queue_timeouts_total", "counter", "LLM calls that timed out in the queue", llm["timed_out"]),
+        ("car_api_llm_circuit_state", "gauge", "0 closed, 1 half open, 2 open", circuit_state),
+        ("car_api_ai_cache_hits_total", "counter", "AI suggestion cache hits", cache["hits"]),
+        ("car_api_ai_cache_misses_total", "counter", "AI suggestion cache misses", cache["misses"]),
+        ("car_api_ai_cache_entries", "gauge", "Cached AI suggestions", cache["size"]),
+    ]
+
+
+# =========================
+# EXPOSITION
+# =========================
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format (0.0.4)"""
+    lines = []
+
+    for family in _FAMILIES:
+        lines.append(f"# HELP {family.name} {family.help}")
+        lines.append(f"# TYPE {family.name} {family.kind}")
+
+        for labels, value in sorted(family.values.items()):
+            if family.kind != "histogram":
+                lines.append(f"{family.name}{_label_text(labels)} {_number(value.value)}")
+                continue
+
+            cumulative = 0
+            for bound, n in zip(value.buckets, value.counts):
+                cumulative += n
+                lines.append(
+                    f"{family.name}_bucket{_label_text(labels, (('le', repr(bound)),))} {cumulative}"
+                )
+            lines.append(f"{family.name}_bucket{_label_text(labels, (('le', '+Inf'),))} {value.count}")
+            lines.append(f"{family.name}_sum{_label_text(labels)} {repr(value.sum)}")
+            lines.append(f"{family.name}_count{_label_text(labels)} {value.count}")
+
+    for name, kind, help_text, value in _component_samples():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {_number(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _histogram_summary(histogram: Histogram) -> Dict[str, Any]:
+    def ms(value: Optional[float]) -> Optional[float]:
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        "count": histogram.count,
+        "mean_ms": ms(histogram.sum / histogram.count) if histogram.count else None,
+        "p50_ms": ms(histogram.quantile(0.5)),
+        "p95_ms": ms(histogram.quantile(0.95)),
+        "p99_ms": ms(histogram.quantile(0.99)),
+    }
+
+
+def metrics_summary() -> Dict[str, Any]:
+    """Human readable view: per route / stage counts and latency estimates"""
+    routes: Dict[str, Any] = {}
+    for labels, histogram in sorted(REQUEST_SECONDS.values.items()):
+        label = dict(labels)
+        routes[f"{label['method']} {label['route']}"] = _histogram_summary(histogram)
+
+    statuses: Dict[str, Dict[str, int]] = {}
+    for labels, counter in sorted(REQUESTS.values.items()):
+        label = dict(labels)
+        statuses.setdefault(f"{label['method']} {label['route']}", {})[label["status"]] = int(counter.value)
+    for name, summary in routes.items():
+        summary["status"] = statuses.get(name, {})
+
+    return {
+        "enabled": METRICS_ENABLED,
+        "in_flight": {
+            dict(labels)["route"]: int(gauge.value)
+            for labels, gauge in sorted(IN_FLIGHT.values.items())
+            if gauge.value
+        },
+        "routes": routes,
+        "stages": {
+            dict(labels)["stage"]: _histogram_summary(histogram)
+            for labels, histogram in sorted(STAGE_SECONDS.values.items())
+        },
+        "components": {name: value for name, _, _, value in _component_samples()},
+    }
+
+
+__all__ = [
+    "METRICS_ENABLED",
+    "Histogram",
+    "MetricsMiddleware",
+    "stage",
+    "observe_stage",
+    "timed",
+    "render_prometheus",
+    "metrics_summary",
+]
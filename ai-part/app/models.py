@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 class CarInput(BaseModel):
@@ -64,7 +64,23 @@ class AISuggestionRequest(BaseModel):
 class AISuggestionResponse(BaseModel):
     """AI suggestion response"""
     suggestion: str = Field(..., description="AI-generated suggestion")
+    cached: bool = Field(False, description="Served from the suggestion cache")
+    fallback: bool = Field(False, description="LLM unavailable: templated answer from local ranking")
     timestamp: datetime = Field(default_factory=datetime.now)
+
+
+class SessionSuggestionResponse(BaseModel):
+    """One turn of a conversational AI suggestion session"""
+    session_id: str
+    turn: int = Field(..., description="Completed turns in this session")
+    suggestion: str = Field(..., description="AI-generated suggestion")
+    fallback: bool = Field(False, description="LLM unavailable: templated answer from local ranking")
+    filters: Dict[str, Any] = Field(default_factory=dict, description="Filters accumulated so far")
+    budget: Optional[float] = None
+    matching_cars: int = Field(0, description="Catalog cars matching the filters")
+    narrowed: bool = Field(False, description="Searched the previous matches instead of the whole catalog")
+    timestamp: datetime = Field(default_factory=datetime.now)
+
 from typing import Dict, Any
 
 class CarsListResponse(BaseModel):
@@ -73,6 +89,16 @@ class CarsListResponse(BaseModel):
     statistics: Dict[str, Dict[str, int]]
 
 
+class CarsPageResponse(BaseModel):
+    """One cursor page of /cars/list"""
+    cars: List[Dict[str, Any]] = Field(..., description="Cars of this page (car_id + requested fields)")
+    count: int
+    limit: int
+    sort: str
+    next_cursor: Optional[str] = Field(None, description="Pass as ?cursor= for the next page; null on the last page")
+    catalog_version: str
+
+
 class BrandCount(BaseModel):
     brand: str
     count: int
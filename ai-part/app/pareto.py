@@ -0,0 +1,230 @@
+"""
+Pareto Frontier
+Listings that no other car beats on price, risk score AND mileage
+
+A car is dominated when another car is at least as good on all three
+(lower price, lower risk, lower mileage) and strictly better on one.
+The front is computed with a sort-based skyline: sort by price, then
+sweep while keeping a 2D staircase of the best (risk, mileage) pairs
+seen so far. Each car is checked with one binary search instead of
+against every other car, so a front costs O(n log n), not O(n^2).
+
+Fronts are cached per filter for each catalog version. When a new
+version only appends listings to the previous one (scraper ingest),
+cached fronts are carried over and the new listings are inserted
+incrementally instead of recomputing from scratch.
+"""
+
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.ai_calculations import calculate_risk_score
+from app.catalog import CatalogSnapshot
+
+
+# Max cached fronts (distinct filters) per catalog version
+MAX_CACHED_FRONTS = 256
+
+
+# =========================
+# SKYLINE
+# =========================
+class _Staircase:
+    """
+    Minimal (risk, mileage) pairs: risk ascending, mileage strictly
+    descending. A point is dominated if some stair has risk <= its risk
+    and mileage <= its mileage.
+    """
+
+    def __init__(self):
+        self.risks: List[float] = []
+        self.mileages: List[float] = []
+
+    def dominates(self, risk: float, mileage: float) -> bool:
+        i = bisect.bisect_right(self.risks, risk)
+        return i > 0 and self.mileages[i - 1] <= mileage
+
+    def add(self, risk: float, mileage: float) -> None:
+        i = bisect.bisect_left(self.risks, risk)
+        j = i
+        while j < len(self.risks) and self.mileages[j] >= mileage:
+            j += 1
+        self.risks[i:j] = [risk]
+        self.mileages[i:j] = [mileage]
+
+
+def skyline(rows: np.ndarray, price: np.ndarray, risk: np.ndarray, mileage: np.ndarray) -> List[int]:
+    """
+    Pareto-optimal rows (minimizing price, risk, mileage)
+
+    Exact duplicates on all three axes keep only the first listing.
+
+    Returns:
+        Row ids on the front, sorted by price
+    """
+    order = rows[np.lexsort((mileage[rows], risk[rows], price[rows]))]
+    stairs = _Staircase()
+    front = []
+
+    for row in order.tolist():
+        r, m = risk[row], mileage[row]
+        if stairs.dominates(r, m):
+            continue
+        stairs.add(r, m)
+        front.append(row)
+
+    return front
+
+
+def _dominates(a: Tuple[float, float, float], b: Tuple[float, float, float]) -> bool:
+    return all(x <= y for x, y in zip(a, b)) and a != b
+
+
+def insert_into_front(
+    front: List[int],
+    row: int,
+    price: np.ndarray,
+    risk: np.ndarray,
+    mileage: np.ndarray
+) -> List[int]:
+    """Front after adding one listing (O(front size))"""
+    point = (price[row], risk[row], mileage[row])
+    points = [(price[r], risk[r], mileage[r]) for r in front]
+
+    if any(_dominates(p, point) or p == point for p in points):
+        return front
+
+    kept = [r for r, p in zip(front, points) if not _dominates(point, p)]
+    bisect.insort(kept, row, key=lambda r: (price[r], risk[r], mileage[r]))
+    return kept
+
+
+# =========================
+# PER-VERSION INDEX
+# =========================
+class ParetoIndex:
+    """
+    Pareto fronts for one catalog snapshot, cached per filter
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot, previous: Optional["ParetoIndex"] = None):
+        self.snapshot = snapshot
+        self.version = snapshot.version
+        self._fronts: "OrderedDict[Tuple, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        appended_from = previous if previous and previous.is_prefix_of(snapshot) else None
+
+        # Risk only depends on the listing itself, so appended versions
+        # reuse the previous column and score the new rows only
+        start = appended_from.snapshot.size if appended_from else 0
+        self.risk = np.empty(snapshot.size, dtype=float)
+        if appended_from:
+            self.risk[:start] = appended_from.risk
+        for row in range(start, snapshot.size):
+            self.risk[row] = calculate_risk_score(snapshot.cars[row])
+
+        # Listings without price or mileage can't be compared
+        self.comparable = ~np.isnan(snapshot.price) & ~np.isnan(snapshot.mileage)
+
+        if appended_from:
+            new_rows = np.arange(start, snapshot.size)
+            for key, front in appended_from.cached_fronts():
+                matching = new_rows[self._filter_mask(key)[start:]]
+                for row in matching.tolist():
+                    front = insert_into_front(
+                        front, row, snapshot.price, self.risk, snapshot.mileage
+                    )
+                self._fronts[key] = front
+
+    def is_prefix_of(self, snapshot: CatalogSnapshot) -> bool:
+        """True when `snapshot` only appends listings to this one"""
+        old = self.snapshot
+        return snapshot.size >= old.size and snapshot.cars[:old.size] == old.cars
+
+    def cached_fronts(self) -> List[Tuple[Tuple, List[int]]]:
+        with self._lock:
+            return list(self._fronts.items())
+
+    def _filter_mask(self, key: Tuple) -> np.ndarray:
+        brand, fuel, max_price, max_mileage, min_year = key
+        snap = self.snapshot
+        mask = self.comparable.copy()
+
+        if brand:
+            code = snap.brand_vocab.index(brand) if brand in snap.brand_vocab else -1
+            mask &= snap.brand_codes == code
+        if fuel:
+            code = snap.fuel_vocab.index(fuel) if fuel in snap.fuel_vocab else -1
+            mask &= snap.fuel_codes == code
+        if max_price is not None:
+            mask &= snap.price <= max_price
+        if max_mileage is not None:
+            mask &= snap.mileage <= max_mileage
+        if min_year is not None:
+            mask &= snap.year >= min_year
+
+        return mask
+
+    def front(
+        self,
+        brand: Optional[str] = None,
+        fuel: Optional[str] = None,
+        max_price: Optional[float] = None,
+        max_mileage: Optional[float] = None,
+        min_year: Optional[int] = None
+    ) -> List[int]:
+        """Row ids on the Pareto front for this filter, sorted by price"""
+        key = (
+            (brand or "").strip().lower(),
+            (fuel or "").strip().lower(),
+            max_price,
+            max_mileage,
+            min_year,
+        )
+
+        with self._lock:
+            if key in self._fronts:
+                self._fronts.move_to_end(key)
+                return self._fronts[key]
+
+        rows = np.flatnonzero(self._filter_mask(key))
+        front = skyline(rows, self.snapshot.price, self.risk, self.snapshot.mileage)
+
+        with self._lock:
+            self._fronts[key] = front
+            while len(self._fronts) > MAX_CACHED_FRONTS:
+                self._fronts.popitem(last=False)
+
+        return front
+
+
+_latest_index: Optional[ParetoIndex] = None
+_index_lock = threading.Lock()
+
+
+def _build_for(snapshot: CatalogSnapshot) -> ParetoIndex:
+    global _latest_index
+
+    with _index_lock:
+        index = ParetoIndex(snapshot, _latest_index)
+        _latest_index = index
+
+    return index
+
+
+def get_pareto_index(snapshot: CatalogSnapshot) -> ParetoIndex:
+    """Pareto index for this snapshot (carried over on append-only ingest)"""
+    return snapshot.derived("pareto_index", _build_for)
+
+
+__all__ = [
+    "ParetoIndex",
+    "skyline",
+    "insert_into_front",
+    "get_pareto_index",
+]
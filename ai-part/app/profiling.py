@@ -0,0 +1,238 @@
+"""
+Request Profiling
+Profile one request on demand, guarded by an admin token
+
+Send any request with `X-Profile: <PROFILE_TOKEN>` and it runs under a
+profiler; the response carries `X-Profile-Id`. The profile is stored
+in PROFILE_DIR (newest PROFILE_KEEP kept) and served by
+GET /admin/profiles/{id} with `X-Admin-Token: <PROFILE_TOKEN>`.
+
+Profilers:
+- pyinstrument (sampling, `pip install pyinstrument`): async aware,
+  only this request's task is attributed; stored as HTML + text
+- cProfile (deterministic, stdlib fallback): stored as .pstats (open
+  with snakeviz or `python -m pstats`) + a text summary. It profiles
+  the event loop thread, so other requests served meanwhile by the
+  same worker show up too; use it on a quiet worker.
+  Work handed to the thread / process pools is not included.
+
+Without PROFILE_TOKEN the middleware is a pass-through and the admin
+endpoints answer 404. Unprofiled requests only pay one header scan.
+Only one profiled request runs at a time per worker (else 409).
+"""
+
+import cProfile
+import hmac
+import io
+import json
+import os
+import pstats
+import re
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from starlette.responses import JSONResponse
+
+from app.executors import run_in_thread
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler
+except ImportError:  # optional: async-aware sampling profiler
+    SamplingProfiler = None
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN") or None
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "car-api-profiles"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+
+PROFILE_HEADER = b"x-profile"
+
+# Lines of the text summary (per sort order)
+SUMMARY_LINES = 40
+
+# <timestamp with microseconds>-<random>: names sort by creation time
+_PROFILE_ID_RE = re.compile(r"^\d{8}T\d{12}-[0-9a-f]{6}$")
+
+_active = False
+
+
+def profiling_enabled() -> bool:
+    return PROFILE_TOKEN is not None
+
+
+def token_ok(token: Optional[str]) -> bool:
+    """Constant-time admin token check (always False when disabled)"""
+    if PROFILE_TOKEN is None or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), PROFILE_TOKEN.encode("utf-8"))
+
+
+# =========================
+# STORAGE
+# =========================
+def _path(profile_id: str, suffix: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}.{suffix}")
+
+
+def _prune() -> None:
+    metas = sorted(name for name in os.listdir(PROFILE_DIR) if name.endswith(".json"))
+    for name in metas[:-PROFILE_KEEP] if PROFILE_KEEP > 0 else metas:
+        profile_id = name[:-len(".json")]
+        for suffix in ("json", "txt", "pstats", "html"):
+            try:
+                os.remove(_path(profile_id, suffix))
+            except FileNotFoundError:
+                pass
+
+
+def _cprofile_summary(profile: cProfile.Profile) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profile, stream=out)
+    stats.sort_stats("cumulative").print_stats(SUMMARY_LINES)
+    stats.sort_stats("tottime").print_stats(SUMMARY_LINES)
+    return out.getvalue()
+
+
+def _store(profile_id: str, meta: dict, profiler) -> None:
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    if isinstance(profiler, cProfile.Profile):
+        profiler.dump_stats(_path(profile_id, "pstats"))
+        summary = _cprofile_summary(profiler)
+    else:
+        with open(_path(profile_id, "html"), "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+        summary = profiler.output_text(unicode=True, color=False)
+
+    with open(_path(profile_id, "txt"), "w", encoding="utf-8") as f:
+        f.write(summary)
+    with open(_path(profile_id, "json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+    _prune()
+
+
+def list_profiles() -> List[dict]:
+    """Stored profiles, newest first"""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+
+    profiles = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if name.endswith(".json"):
+            with open(os.path.join(PROFILE_DIR, name), encoding="utf-8") as f:
+                profiles.append(json.load(f))
+    return profiles
+
+
+def profile_file(profile_id: str, fmt: str = "text") -> Optional[str]:
+    """Path of a stored profile (text, pstats or html), None if missing"""
+    suffix = {"text": "txt", "pstats": "pstats", "html": "html"}.get(fmt)
+    if suffix is None or not _PROFILE_ID_RE.match(profile_id):
+        return None
+
+    path = _path(profile_id, suffix)
+    return path if os.path.exists(path) else None
+
+
+# =========================
+# MIDDLEWARE
+# =========================
+def _start_profiler():
+    if SamplingProfiler is not None:
+        profiler = SamplingProfiler(async_mode="enabled")
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+
+def _stop_profiler(profiler) -> None:
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+    else:
+        profiler.stop()
+
+
+class ProfilingMiddleware:
+    """Runs requests flagged with X-Profile: <token> under a profiler"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if PROFILE_TOKEN is None or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                token = value.decode("latin-1")
+                break
+
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not token_ok(token):
+            await JSONResponse({"detail": "Invalid profile token"}, status_code=403)(scope, receive, send)
+            return
+
+        await self._profiled(scope, receive, send)
+
+    async def _profiled(self, scope, receive, send) -> None:
+        global _active
+
+        if _active:
+            await JSONResponse(
+                {"detail": "Another request is being profiled on this worker"}, status_code=409
+            )(scope, receive, send)
+            return
+
+        profile_id = f"{datetime.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+        status = 500
+
+        async def send_with_id(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile_id.encode("ascii")),
+                ]
+            await send(message)
+
+        _active = True
+        started = time.perf_counter()
+        profiler = _start_profiler()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _stop_profiler(profiler)
+            _active = False
+
+        meta = {
+            "profile_id": profile_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "status": status,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            "profiler": "pyinstrument" if SamplingProfiler is not None else "cProfile",
+            "created_at": datetime.now().isoformat(),
+        }
+        await run_in_thread(_store, profile_id, meta, profiler)
+
+
+__all__ = [
+    "PROFILE_DIR",
+    "ProfilingMiddleware",
+    "profiling_enabled",
+    "token_ok",
+    "list_profiles",
+    "profile_file",
+]
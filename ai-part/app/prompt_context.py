@@ -0,0 +1,161 @@
+"""
+Prompt Context Builder
+Compact, token-budgeted table of candidate cars for the LLM prompt
+
+- One header line + one pipe-separated row per car instead of a
+  decorated block per car (2-3x fewer tokens)
+- Skips columns no candidate has a value for
+- Fits a token budget: drops the least useful columns first, then
+  the lowest ranked cars (at least one car is always kept)
+- Deterministic: fixed column order and number formatting, so the same
+  candidates always give byte-identical text (provider prompt caching)
+
+Token counts use tiktoken when it is installed, otherwise a
+chars / 4 estimate.
+"""
+
+import math
+import os
+import re
+from typing import List, Optional, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # optional: exact token counts
+    tiktoken = None
+
+from app.llm_client import MODEL_NAME
+
+CONTEXT_TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKENS", "600"))
+
+MAX_TITLE_CHARS = 40
+
+# (header, formatter) in output order
+COLUMNS = [
+    ("car", lambda c: _clean_title(c.get("title"))),
+    ("year", lambda c: _int_text(c.get("year_numeric"))),
+    ("km", lambda c: _int_text(c.get("mileage_numeric"))),
+    ("fuel", lambda c: _text(c.get("fuel_type"))),
+    ("gearbox", lambda c: _text(c.get("gearbox"))),
+    ("price", lambda c: _int_text(c.get("price_numeric"))),
+    ("value", lambda c: _int_text(c.get("estimated_market_value"))),
+    ("profit", lambda c: _int_text(c.get("profit"))),
+    ("risk", lambda c: _risk_text(c.get("risk_score"))),
+    ("rating", lambda c: _text(c.get("recommendation"))),
+    ("url", lambda c: _text(c.get("url"))),
+]
+
+# Columns dropped (in this order) when the table is over budget
+DROP_ORDER = ["url", "gearbox", "rating", "value", "fuel", "km"]
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+# =========================
+# TOKEN COUNTING
+# =========================
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Prompt tokens of `text` for MODEL_NAME (estimate without tiktoken)"""
+    global _encoding
+
+    if tiktoken is None:
+        return math.ceil(len(text) / 4)
+
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model(MODEL_NAME)
+        except KeyError:
+            _encoding = tiktoken.get_encoding("o200k_base")
+
+    return len(_encoding.encode(text))
+
+
+# =========================
+# CELL FORMATTING
+# =========================
+def _text(value) -> str:
+    if value is None or value == "":
+        return "-"
+    return _WHITESPACE_RE.sub(" ", str(value)).strip().replace("|", "/") or "-"
+
+
+def _clean_title(value) -> str:
+    title = _text(value)
+    if len(title) > MAX_TITLE_CHARS:
+        title = title[:MAX_TITLE_CHARS - 1].rstrip() + "…"
+    return title
+
+
+def _int_text(value) -> str:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or math.isnan(value):
+        return "-"
+    return str(int(round(value)))
+
+
+def _risk_text(value) -> str:
+    if not isinstance(value, (int, float)) or math.isnan(value):
+        return "-"
+    return f"{value:.1f}"
+
+
+# =========================
+# BUILDER
+# =========================
+def _render(cars: List[dict], columns: List[Tuple[str, object]]) -> str:
+    lines = ["#|" + "|".join(name for name, _ in columns)]
+    for i, car in enumerate(cars, 1):
+        lines.append(f"{i}|" + "|".join(fmt(car) for _, fmt in columns))
+    return "\n".join(lines)
+
+
+def build_cars_context(
+    cars: List[dict],
+    token_budget: Optional[int] = None
+) -> Tuple[str, int, List[dict]]:
+    """
+    Candidate table that fits `token_budget` tokens
+
+    Args:
+        cars: Analyzed cars, best first
+        token_budget: Defaults to LLM_CONTEXT_TOKENS
+
+    Returns:
+        (table text, its token count, the cars in the table) - rows
+        dropped for the budget are not in the list, so callers only
+        present cars the model was shown
+    """
+    budget = CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    cars = list(cars)
+
+    # Columns no candidate has a value for carry no information
+    columns = [
+        (name, fmt) for name, fmt in COLUMNS
+        if name == "car" or any(fmt(car) != "-" for car in cars)
+    ]
+
+    text = _render(cars, columns)
+    tokens = count_tokens(text)
+
+    for name in DROP_ORDER:
+        if tokens <= budget:
+            break
+        columns = [column for column in columns if column[0] != name]
+        text = _render(cars, columns)
+        tokens = count_tokens(text)
+
+    while tokens > budget and len(cars) > 1:
+        cars.pop()
+        text = _render(cars, columns)
+        tokens = count_tokens(text)
+
+    return text, tokens, cars
+
+
+__all__ = [
+    "CONTEXT_TOKEN_BUDGET",
+    "count_tokens",
+    "build_cars_context",
+]
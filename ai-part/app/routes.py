@@ -1,10 +1,15 @@
 # FastAPI router & error handling
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
 
 # Basic Python utilities
-from typing import List
+import functools
+import json
+from typing import Callable, List, Optional, Tuple, Union
 from datetime import datetime
 
+import numpy as np
+
 # ========== NEW: AI Recommendation Engine ==========
 from app.car_recommendation_engine import (
     CarRecommendationEngine,
@@ -20,18 +25,129 @@ from app.models import (
     CompareByNameRequest,  # (reserved / future use)
     AISuggestionRequest,   # AI suggestion input
     AISuggestionResponse,  # AI suggestion output
+    SessionSuggestionResponse,  # One conversation turn
     CarsListResponse,      # Cars list response
+    CarsPageResponse,      # Cars list page (cursor pagination)
     CarsStatsResponse      # Dataset stats response
 )
 
 # Import business logic functions
 from app.ai_calculations import (
     analyze_multiple_cars,  # Analyze profit/risk
-    compare_cars,           # Compare multiple cars
-    get_ai_suggestion,      # OpenAI-based suggestion
-    load_car_data           # Load cleaned car dataset
+    summarize_comparison,   # Best picks from analyzed cars
+)
+
+# Catalog snapshot & indexes
+from app.catalog import get_catalog
+from app.similar_index import get_similar_index
+from app.market_cube import analyze_with_market, current_market_cube
+from app.pareto import get_pareto_index
+from app.catalog_pages import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    PageQueryError,
+    catalog_page,
+    normalize_query,
+)
+
+# AI suggestions behind the intent-keyed response cache
+from app.suggestion_cache import (
+    get_cached_ai_suggestion,
+    stream_cached_ai_suggestion,
+    cache_stats,
+)
+
+# Conversation sessions (accumulated filters, narrowing candidates)
+from app.sessions import (
+    create_session,
+    delete_session,
+    get_session,
+    session_stats,
+    session_suggestion,
+    session_summary,
+    SESSION_TTL,
 )
 
+# LLM load shedding (queue full -> 503)
+from app.llm_gate import LLMOverloadedError
+from app.llm_client import llm_stats
+
+# NDJSON bulk analysis (streamed in and out, bounded memory)
+from app.bulk_analysis import NDJSONStreamingResponse, analyze_ndjson
+
+# CPU work runs off the event loop (thread / process pools)
+from app.executors import run_batch, run_in_thread
+
+# orjson-backed responses, pre-serialized catalog payloads
+from app.fast_json import FastJSONResponse, RawJSONResponse, dumps
+
+# On-demand request profiles (admin token)
+from app.profiling import list_profiles, profile_file, profiling_enabled, token_ok
+
+# Hot-path stage timings (exposed on /metrics)
+from app.metrics import stage
+
+# Identical concurrent catalog requests share one computation
+from app.singleflight import SingleFlight
+
+# ETag / If-None-Match for catalog-derived GET endpoints
+from app.http_cache import catalog_etag, etag_headers, etag_matches, not_modified
+
+_catalog_flights = SingleFlight("catalog")
+
+# Fields of /analyze-cars/ items (response_model=List[CarAnalysis])
+CAR_ANALYSIS_FIELDS = list(CarAnalysis.model_fields)
+_CAR_ANALYSIS_FLOATS = {
+    name for name, field in CarAnalysis.model_fields.items()
+    if float in getattr(field.annotation, "__args__", (field.annotation,))
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _analysis_projector(fields: Tuple[str, ...], lean: bool = False) -> Callable[[dict], dict]:
+    """
+    Shapes analyzed cars into CarAnalysis items restricted to `fields`
+
+    The field list is checked against CarAnalysis once per distinct
+    selection, not per item. Default output equals model_dump() (ints
+    in float fields become floats); lean output passes the analyzed
+    values through as they are.
+    """
+    unknown = [field for field in fields if field not in CarAnalysis.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    floats = [field for field in fields if field in _CAR_ANALYSIS_FLOATS]
+
+    def project(car: dict) -> dict:
+        return {field: car.get(field) for field in fields}
+
+    if lean or not floats:
+        return project
+
+    def project_coerced(car: dict) -> dict:
+        item = project(car)
+        for field in floats:
+            value = item[field]
+            if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+                item[field] = float(value)
+        return item
+
+    return project_coerced
+
+
+def _analysis_output(fields: Optional[str], lean: bool) -> Callable[[dict], dict]:
+    """Projector for the `fields` / `lean` query parameters (HTTP 400 on bad fields)"""
+    names = tuple(dict.fromkeys(f.strip() for f in (fields or "").split(",") if f.strip()))
+    try:
+        return _analysis_projector(names or tuple(CAR_ANALYSIS_FIELDS), lean)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Same output as CarAnalysis.model_dump(), without the model pass
+_car_analysis_item = _analysis_projector(tuple(CAR_ANALYSIS_FIELDS))
+
 # Create API router
 router = APIRouter()
 
@@ -43,23 +159,67 @@ recommendation_engine = CarRecommendationEngine()
 # ANALYZE CARS
 # =========================================================
 @router.post("/analyze-cars/", response_model=List[CarAnalysis])
-async def analyze_cars(cars: List[CarInput]):
+async def analyze_cars(
+    cars: List[CarInput],
+    fields: Optional[str] = Query(None, description="Comma-separated CarAnalysis fields to return"),
+    lean: bool = Query(False, description="Trusted callers: skip float normalization of the output"),
+):
     """
     Analyze multiple cars.
     Returns profit, risk score, recommendation, etc.
+
+    Items are built straight from the analysis (no per-item model
+    validation); `fields` selects a subset of CarAnalysis fields.
     """
+    project = _analysis_output(fields, lean)
+
     try:
         # Convert Pydantic models to normal dictionaries
         cars_data = [car.model_dump() for car in cars]
 
-        # Run analysis logic
-        return analyze_multiple_cars(cars_data)
+        # Run analysis logic (process pool for large batches)
+        with stage("analysis"):
+            analyzed = await run_batch(analyze_with_market, cars_data)
+
+        # Same fields as CarAnalysis, without the per-item model pass
+        return FastJSONResponse([project(car) for car in analyzed])
 
     except Exception as e:
         # Any unexpected error → HTTP 500
         raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
 
 
+# =========================================================
+# ANALYZE CARS (NDJSON STREAM)
+# =========================================================
+@router.post(
+    "/analyze-cars/stream",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+        }
+    },
+)
+async def analyze_cars_stream(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated CarAnalysis fields to return"),
+    lean: bool = Query(False, description="Trusted callers: skip float normalization of the output"),
+):
+    """
+    Bulk analysis for large feeds.
+    Body: one CarInput JSON object per line (NDJSON).
+    Response: one result per input line, in order, streamed while
+    the body is still being uploaded:
+    - {"line": n, ...CarAnalysis fields}
+    - {"line": n, "error": "..."} for invalid lines
+    - a final {"summary": {...}} line
+    `fields` / `lean` work as on /analyze-cars/.
+    """
+    project = _analysis_output(fields, lean)
+    return NDJSONStreamingResponse(analyze_ndjson(request.stream(), project))
+
+
 # =========================================================
 # COMPARE CARS
 # =========================================================
@@ -75,8 +235,10 @@ async def compare_cars_endpoint(request: CompareRequest):
         # Convert input cars to dict
         cars_data = [car.model_dump() for car in request.cars]
 
-        # Compare cars
-        return compare_cars(cars_data)
+        # Analyze off the event loop, then pick the best cars
+        with stage("analysis"):
+            analyzed = await run_batch(analyze_with_market, cars_data)
+        return FastJSONResponse(summarize_comparison(analyzed))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Comparison error: {str(e)}")
@@ -89,21 +251,182 @@ async def compare_cars_endpoint(request: CompareRequest):
 async def ai_suggest(request: AISuggestionRequest):
     """
     Ask AI for car buying advice based on user prompt & budget
+
+    Answers 503 + Retry-After when the LLM queue is full. While the LLM
+    is down (circuit breaker open) the reply is a templated pick from
+    the local ranking, flagged with fallback=true.
     """
     try:
-        suggestion = await get_ai_suggestion(
+        result = await get_cached_ai_suggestion(
             request.prompt,
             request.budget
         )
 
         return AISuggestionResponse(
-            suggestion=suggestion,
+            suggestion=result["suggestion"],
+            cached=result["cached"],
+            fallback=result["fallback"],
             timestamp=datetime.now()
         )
 
+    except LLMOverloadedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"AI suggestion service overloaded: {str(e)}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI suggestion error: {str(e)}")
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/ai-suggest/stream")
+async def ai_suggest_stream(request: AISuggestionRequest):
+    """
+    Streaming AI suggestion (Server-Sent Events)
+
+    Events, in order:
+    - candidates: top ranked cars, sent as soon as local retrieval is done
+    - token: {"text": "..."} reply fragments as the LLM produces them
+    - error: {"message": "..."} only if something fails
+    - done: {"timestamp": "...", "cached": bool, "fallback": bool} always last
+    """
+    async def events():
+        async for event, data in stream_cached_ai_suggestion(request.prompt, request.budget):
+            yield _sse_event(event, data)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/ai-suggest/cache-stats")
+async def ai_suggest_cache_stats():
+    """
+    Suggestion cache hit/miss counters and the LLM calls/seconds saved
+    """
+    return cache_stats()
+
+
+@router.get("/ai-suggest/llm-stats")
+async def ai_suggest_llm_stats():
+    """
+    LLM concurrency gate (running / waiting / rejected), retry counters
+    and circuit breaker state
+    """
+    return llm_stats()
+
+
+# =========================================================
+# CONVERSATION SESSIONS
+# =========================================================
+@router.post("/sessions")
+async def start_session():
+    """
+    Start a conversation; pass the session_id to /sessions/{id}/suggest
+    """
+    session = await create_session()
+    return {"session_id": session["session_id"], "expires_in_seconds": SESSION_TTL}
+
+
+@router.get("/sessions/stats")
+async def sessions_stats():
+    """Session store backend and counters"""
+    return session_stats()
+
+
+@router.post("/sessions/{session_id}/suggest", response_model=SessionSuggestionResponse)
+async def session_suggest(session_id: str, request: AISuggestionRequest):
+    """
+    Next conversation turn
+
+    Filters from earlier turns are kept (later turns override them);
+    when a turn only tightens them, only the previous matches are
+    searched. Cars already recommended are not picked again while
+    other matches remain.
+    """
+    try:
+        result = await session_suggestion(session_id, request.prompt, request.budget)
+
+    except LLMOverloadedError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"AI suggestion service overloaded: {str(e)}",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"AI suggestion error: {str(e)}")
 
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found or expired")
+
+    return SessionSuggestionResponse(**result)
+
+
+@router.get("/sessions/{session_id}")
+async def read_session(session_id: str):
+    """Filters, budget and cars recommended so far"""
+    session = await get_session(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Session {session_id} not found or expired")
+
+    return await run_in_thread(session_summary, session)
+
+
+@router.delete("/sessions/{session_id}")
+async def end_session(session_id: str):
+    """Forget a conversation"""
+    await delete_session(session_id)
+    return {"session_id": session_id, "deleted": True}
+
+
+# =========================================================
+# ADMIN: REQUEST PROFILES
+# =========================================================
+def _require_admin(token: Optional[str]) -> None:
+    if not profiling_enabled():
+        raise HTTPException(status_code=404, detail="Profiling is disabled (PROFILE_TOKEN not set)")
+    if not token_ok(token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@router.get("/admin/profiles")
+async def get_profiles(x_admin_token: Optional[str] = Header(None)):
+    """
+    Stored request profiles, newest first.
+    Profile a request by sending it with `X-Profile: <PROFILE_TOKEN>`;
+    its response carries the `X-Profile-Id` to fetch here.
+    """
+    _require_admin(x_admin_token)
+    return {"profiles": await run_in_thread(list_profiles)}
+
+
+@router.get("/admin/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("text", description="text, pstats (cProfile) or html (pyinstrument)"),
+    x_admin_token: Optional[str] = Header(None),
+):
+    """One stored profile: text summary, raw pstats file or HTML report"""
+    _require_admin(x_admin_token)
+
+    path = profile_file(profile_id, format)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} ({format}) not found")
+
+    media_type = {"text": "text/plain; charset=utf-8", "html": "text/html; charset=utf-8"}
+    return FileResponse(
+        path,
+        media_type=media_type.get(format, "application/octet-stream"),
+        filename=None if format in media_type else f"{profile_id}.pstats",
+    )
+
 
 # =========================================================
 # TEST ANALYSIS (DEV ONLY)
@@ -134,7 +457,7 @@ async def test_analysis():
     ]
 
     # Analyze sample cars
-    results = analyze_multiple_cars(sample_cars)
+    results = analyze_multiple_cars(sample_cars, current_market_cube())
 
     return {
         "message": "Test analysis completed",
@@ -142,41 +465,182 @@ async def test_analysis():
     }
 
 
+# =========================================================
+# CATALOG HELPERS (SYNC, RUN IN THREAD POOL)
+# =========================================================
+def _build_cars_list(cars: List[dict]) -> dict:
+    """Preview + brand/fuel histograms (runs in the thread pool)"""
+    total = len(cars)
+
+    brands = {}
+    fuel_types = {}
+
+    # Count brands and fuel types
+    for car in cars:
+        brand = car.get("brand") or "Unknown"
+        fuel = car.get("fuel_type") or "Unknown"
+
+        brands[brand] = brands.get(brand, 0) + 1
+        fuel_types[fuel] = fuel_types.get(fuel, 0) + 1
+
+    return {
+        "total_cars": total,
+        "cars_preview": cars[:10],
+        "statistics": {
+            "brands": brands,
+            "fuel_types": fuel_types
+        }
+    }
+
+
+def _build_dataset_stats(cars: List[dict]) -> dict:
+    """Price/year ranges + top brands (runs in the thread pool)"""
+    total = len(cars)
+
+    # -----------------------------
+    # SAFE PRICE CALCULATION
+    # -----------------------------
+    prices = [
+        car.get("price_numeric")
+        for car in cars
+        if isinstance(car.get("price_numeric"), (int, float))
+    ]
+
+    min_price = min(prices) if prices else 0
+    max_price = max(prices) if prices else 0
+    avg_price = sum(prices) / len(prices) if prices else 0
+
+    # -----------------------------
+    # SAFE YEAR CALCULATION
+    # -----------------------------
+    years = [
+        car.get("year_numeric")
+        for car in cars
+        if isinstance(car.get("year_numeric"), int)
+    ]
+
+    oldest = min(years) if years else 0
+    newest = max(years) if years else 0
+
+    # -----------------------------
+    # BRAND COUNT
+    # -----------------------------
+    brands = {}
+    for car in cars:
+        brand = car.get("brand") or "Unknown"
+        brands[brand] = brands.get(brand, 0) + 1
+
+    top_brands = sorted(
+        brands.items(),
+        key=lambda x: x[1],
+        reverse=True
+    )[:5]
+
+    return {
+        "total_cars": total,
+        "price_range": {
+            "min": round(min_price, 2),
+            "max": round(max_price, 2),
+            "average": round(avg_price, 2)
+        },
+        "year_range": {
+            "oldest": int(oldest),
+            "newest": int(newest)
+        },
+        "top_5_brands": [
+            {"brand": b, "count": c} for b, c in top_brands
+        ],
+        "data_quality": "Cleaned & API-ready"
+    }
+
+
+def _cars_list_json(catalog) -> bytes:
+    """/cars/list body, validated + serialized once per catalog version"""
+    return catalog.derived(
+        "cars_list_json",
+        lambda snap: dumps(CarsListResponse(**_build_cars_list(snap.cars)).model_dump()),
+    )
+
+
+def _dataset_stats_json(catalog) -> bytes:
+    """
+    /cars/stats body, validated + serialized once per catalog version
+
+    Goes through CarsStatsResponse like the response_model path did
+    (price_range floats stay 29000.0 on the wire).
+    """
+    return catalog.derived(
+        "cars_stats_json",
+        lambda snap: dumps(CarsStatsResponse(**_build_dataset_stats(snap.cars)).model_dump()),
+    )
+
+
 # =========================================================
 # LIST CLEAN CARS
 # =========================================================
-@router.get("/cars/list", response_model=CarsListResponse)
-async def list_clean_cars():
+@router.get("/cars/list", response_model=Union[CarsListResponse, CarsPageResponse])
+async def list_clean_cars(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated car fields, e.g. title,price_numeric,url"),
+    sort: Optional[str] = Query(None, description="id, price, year, mileage or power; '-' prefix for descending"),
+    brand: Optional[str] = Query(None, description="Comma-separated brands"),
+    fuel_type: Optional[str] = Query(None, description="Comma-separated fuel types"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    min_year: Optional[int] = None,
+    max_year: Optional[int] = None,
+    min_mileage: Optional[float] = Query(None, ge=0),
+    max_mileage: Optional[float] = Query(None, ge=0),
+):
     """
-    Returns:
+    Without query parameters:
     - Total number of cars
     - First 10 cars as preview
     - Brand & fuel statistics
-    """
-    try:
-        cars = load_car_data()
-        total = len(cars)
 
-        brands = {}
-        fuel_types = {}
+    With any of them, one cursor page of the catalog:
+    - Filters: brand, fuel_type, price / year / mileage ranges
+    - sort, fields projection, limit (default 50)
+    - next_cursor for the following page (null on the last page)
 
-        # Count brands and fuel types
-        for car in cars:
-            brand = car.get("brand") or "Unknown"
-            fuel = car.get("fuel_type") or "Unknown"
+    ETag per catalog version + query; If-None-Match gives a 304.
+    """
+    paged = any(value is not None for value in (
+        limit, cursor, fields, sort, brand, fuel_type, min_price, max_price,
+        min_year, max_year, min_mileage, max_mileage,
+    ))
 
-            brands[brand] = brands.get(brand, 0) + 1
-            fuel_types[fuel] = fuel_types.get(fuel, 0) + 1
+    try:
+        catalog = await run_in_thread(get_catalog)
+        etag = catalog_etag(request, catalog)
+        if etag_matches(request, etag):
+            return not_modified(etag)
 
-        return {
-            "total_cars": total,
-            "cars_preview": cars[:10],
-            "statistics": {
-                "brands": brands,
-                "fuel_types": fuel_types
-            }
-        }
+        if paged:
+            query = normalize_query(
+                brand, fuel_type, min_price, max_price,
+                min_year, max_year, min_mileage, max_mileage,
+                sort or "id",
+            )
+            page = await run_in_thread(functools.partial(
+                catalog_page,
+                catalog,
+                query,
+                limit=limit or DEFAULT_PAGE_SIZE,
+                cursor=cursor,
+                fields=fields,
+            ))
+            return FastJSONResponse(page, headers=etag_headers(etag))
 
+        body = await _catalog_flights.do(
+            ("cars_list", catalog.version), run_in_thread, _cars_list_json, catalog
+        )
+        return RawJSONResponse(body, headers=etag_headers(etag))
+
+    except PageQueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except FileNotFoundError:
         # Dataset missing
         raise HTTPException(
@@ -191,7 +655,7 @@ async def list_clean_cars():
 # DATASET STATS (SAFE VERSION)
 # =========================================================
 @router.get("/cars/stats", response_model=CarsStatsResponse)
-async def get_dataset_stats():
+async def get_dataset_stats(request: Request):
     """
     Returns dataset statistics:
     - Price range
@@ -199,71 +663,120 @@ async def get_dataset_stats():
     - Top 5 brands
     """
     try:
-        cars = load_car_data()
-        total = len(cars)
-
-        # -----------------------------
-        # SAFE PRICE CALCULATION
-        # -----------------------------
-        prices = [
-            car.get("price_numeric")
-            for car in cars
-            if isinstance(car.get("price_numeric"), (int, float))
-        ]
+        catalog = await run_in_thread(get_catalog)
+        etag = catalog_etag(request, catalog)
+        if etag_matches(request, etag):
+            return not_modified(etag)
 
-        min_price = min(prices) if prices else 0
-        max_price = max(prices) if prices else 0
-        avg_price = sum(prices) / len(prices) if prices else 0
-
-        # -----------------------------
-        # SAFE YEAR CALCULATION
-        # -----------------------------
-        years = [
-            car.get("year_numeric")
-            for car in cars
-            if isinstance(car.get("year_numeric"), int)
-        ]
+        body = await _catalog_flights.do(
+            ("cars_stats", catalog.version), run_in_thread, _dataset_stats_json, catalog
+        )
+        return RawJSONResponse(body, headers=etag_headers(etag))
 
-        oldest = min(years) if years else 0
-        newest = max(years) if years else 0
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error calculating stats: {str(e)}"
+        )
 
-        # -----------------------------
-        # BRAND COUNT
-        # -----------------------------
-        brands = {}
-        for car in cars:
-            brand = car.get("brand") or "Unknown"
-            brands[brand] = brands.get(brand, 0) + 1
 
-        top_brands = sorted(
-            brands.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:5]
+# =========================================================
+# SIMILAR CARS (NEAREST NEIGHBOURS)
+# =========================================================
+@router.get("/cars/{car_id}/similar")
+async def get_similar_cars(request: Request, car_id: int, k: int = Query(10, ge=1, le=50)):
+    """
+    Returns the k cars most similar to catalog row `car_id`
+    (price, age, mileage, power, brand, fuel, gearbox).
 
-        return {
-            "total_cars": total,
-            "price_range": {
-                "min": round(min_price, 2),
-                "max": round(max_price, 2),
-                "average": round(avg_price, 2)
-            },
-            "year_range": {
-                "oldest": int(oldest),
-                "newest": int(newest)
-            },
-            "top_5_brands": [
-                {"brand": b, "count": c} for b, c in top_brands
+    The KD-tree index is built once per catalog version; its build
+    time and size are reported under "index".
+    """
+    try:
+        catalog = await run_in_thread(get_catalog)
+        car = catalog.get_car(car_id)
+
+        if car is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Car {car_id} not found (catalog has {catalog.size} cars)"
+            )
+
+        etag = catalog_etag(request, catalog)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        index = await run_in_thread(get_similar_index, catalog)
+        neighbours = index.query(car_id, k)
+
+        return FastJSONResponse({
+            "car_id": car_id,
+            "car": car,
+            "similar": [
+                {"car_id": row, "distance": dist, **catalog.cars[row]}
+                for row, dist in neighbours
             ],
-            "data_quality": "Cleaned & API-ready"
-        }
+            "catalog_version": catalog.version,
+            "index": index.stats()
+        }, headers=etag_headers(etag))
 
+    except HTTPException:
+        raise
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Car dataset not found")
     except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error calculating stats: {str(e)}"
+        raise HTTPException(status_code=500, detail=f"Similar cars error: {str(e)}")
+
+
+# =========================================================
+# PARETO FRONT (PRICE / RISK / MILEAGE)
+# =========================================================
+@router.get("/cars/pareto")
+async def get_pareto_front(
+    request: Request,
+    brand: Optional[str] = None,
+    fuel_type: Optional[str] = None,
+    max_price: Optional[float] = Query(None, ge=0),
+    max_mileage: Optional[float] = Query(None, ge=0),
+    min_year: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """
+    Returns the non-dominated cars for the given filter:
+    no other car is cheaper, lower-risk AND lower-mileage at once.
+
+    Sorted by price (cheapest first). Fronts are cached per filter
+    and catalog version.
+    """
+    try:
+        catalog = await run_in_thread(get_catalog)
+        etag = catalog_etag(request, catalog)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        index = await run_in_thread(get_pareto_index, catalog)
+        front = await run_in_thread(
+            index.front, brand, fuel_type, max_price, max_mileage, min_year
         )
 
+        return FastJSONResponse({
+            "total_on_front": len(front),
+            "cars": [
+                {
+                    "car_id": row,
+                    "risk_score": float(index.risk[row]),
+                    **catalog.cars[row]
+                }
+                for row in front[:limit]
+            ],
+            "catalog_version": catalog.version
+        }, headers=etag_headers(etag))
+
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Car dataset not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Pareto front error: {str(e)}")
+
 
 # =========================================================
 # ========== NEW ENDPOINTS: AI RECOMMENDATION ==========
@@ -366,8 +879,8 @@ async def compare_two_cars_with_ai(request: dict):
             )
         
         # Compare with AI engine
-        comparison = recommendation_engine.compare_two_cars(
-            car_a, car_b, user_ctx
+        comparison = await run_in_thread(
+            recommendation_engine.compare_two_cars, car_a, car_b, user_ctx
         )
         
         # Format for UI
@@ -450,8 +963,8 @@ async def analyze_single_car_with_ai(request: dict):
             )
         
         # Analyze with AI engine
-        analysis = recommendation_engine.analyze_car_for_user(
-            car, user_ctx
+        analysis = await run_in_thread(
+            recommendation_engine.analyze_car_for_user, car, user_ctx
         )
         
         return {
@@ -473,6 +986,153 @@ async def analyze_single_car_with_ai(request: dict):
         )
 
 
+# =========================================================
+# RANK MANY CARS WITH AI
+# =========================================================
+@router.post("/rank-cars/")
+async def rank_cars_with_ai(request: dict):
+    """
+    Rank a batch of cars for one user context
+    
+    Scores every car without building insight text; only the
+    returned top_n cars are explained when "explain" is true.
+    
+    With "profiles" the cars are scored once and ranked under every
+    named weight profile (balanced, price, features, reliability,
+    daily, family, business) - one list per UI tab.
+    
+    Request body:
+    {
+        "cars": [{...}, {...}],   // same car shape as /analyze-single-car/
+        "user_context": {"max_budget": 30000, "min_seats": 5},
+        "top_n": 10,
+        "explain": false,
+        "profiles": ["family", "price"]   // optional, or one name
+    }
+    
+    Response:
+    {
+        "total": 2,
+        "ranked": [
+            {
+                "car_id": "https://example.com/car-a",
+                "car_title": "BMW 320d Touring",
+                "score": 87.5,
+                "scores_breakdown": {...}
+            }
+        ]
+    }
+    
+    With "profiles" the response has "by_profile" instead of "ranked":
+    {
+        "total": 2,
+        "by_profile": {
+            "family": [{"car_id": ..., "car_title": ..., "score": 81.2}],
+            "price": [...]
+        }
+    }
+    """
+    try:
+        cars = request.get("cars")
+        user_ctx = get_user_context_from_request(
+            request.get("user_context", {})
+        )
+        explain = bool(request.get("explain", False))
+        top_n = request.get("top_n", 10)
+        
+        if not cars or not isinstance(cars, list):
+            raise HTTPException(
+                status_code=400,
+                detail="cars must be a non-empty list"
+            )
+        
+        # Positive integer (numeric strings accepted), at most len(cars)
+        if isinstance(top_n, bool) or (isinstance(top_n, float) and not top_n.is_integer()):
+            top_n = None
+        try:
+            top_n = int(top_n)
+        except (TypeError, ValueError):
+            top_n = 0
+        if top_n < 1:
+            raise HTTPException(
+                status_code=400,
+                detail="top_n must be a positive integer"
+            )
+        top_n = min(top_n, len(cars))
+        
+        # One name or a list of names ("family" is not f, a, m, ...)
+        profiles = request.get("profiles")
+        if isinstance(profiles, str):
+            profiles = [profiles]
+        if profiles is not None and not (
+            isinstance(profiles, list) and all(isinstance(p, str) for p in profiles)
+        ):
+            raise HTTPException(
+                status_code=400,
+                detail="profiles must be a profile name or a list of profile names"
+            )
+
+        if profiles:
+            try:
+                names, scores, fits = await run_in_thread(
+                    recommendation_engine.score_profiles, cars, user_ctx, profiles
+                )
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            
+            by_profile = {}
+            for col, name in enumerate(names):
+                order = np.argsort(-fits[:, col], kind="stable")[:top_n]
+                by_profile[name] = [
+                    {
+                        "car_id": cars[i].get("details_url", "unknown"),
+                        "car_title": cars[i].get("car_title", "Unknown"),
+                        "score": round(float(fits[i, col]), 1)
+                    }
+                    for i in order
+                ]
+            
+            return {
+                "total": len(cars),
+                "by_profile": by_profile
+            }
+        
+        ranked = await run_in_thread(
+            functools.partial(
+                recommendation_engine.rank_cars,
+                cars, user_ctx, top_n=top_n, explain=explain
+            )
+        )
+        
+        results = []
+        for analysis in ranked:
+            item = {
+                "car_id": analysis["car_id"],
+                "car_title": analysis["car_title"],
+                "score": round(analysis["user_fit"], 1),
+                "scores_breakdown": {
+                    k: round(v, 2) for k, v in analysis["scores"].items()
+                }
+            }
+            if explain:
+                item["insights"] = analysis["insights"]
+                item["warnings"] = analysis["warnings"]
+            results.append(item)
+        
+        return {
+            "total": len(cars),
+            "ranked": results
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"AI ranking error: {str(e)}"
+        )
+
+
 # =========================================================
 # HEALTH CHECK FOR NEW ENDPOINTS
 # =========================================================
@@ -480,6 +1140,9 @@ async def analyze_single_car_with_ai(request: dict):
 async def ai_engine_health():
     """
     Check if AI recommendation engine is working
+
+    Runs a sample analysis on every call: a manual check, not a probe
+    (load balancers use /health/live and /health/ready).
     """
     try:
         # Test with dummy data
@@ -496,9 +1159,9 @@ async def ai_engine_health():
             "min_seats": 5
         }
         
-        # Try analysis
+        # Try analysis (scores only, no insight text needed)
         analysis = recommendation_engine.analyze_car_for_user(
-            test_car, test_context
+            test_car, test_context, explain=False
         )
         
         return {
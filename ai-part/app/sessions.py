@@ -0,0 +1,319 @@
+"""
+Conversation Sessions
+Keeps per-conversation state so follow-up answers build on earlier turns
+
+A session holds:
+1. Accumulated filters (parsed intent of every turn, later turns win)
+2. The catalog rows matching them (for one catalog version)
+3. Cars already recommended (not picked again while others remain)
+4. The last few user/assistant messages (sent to the LLM as history)
+
+When a turn only tightens the filters ("diesel" -> "diesel, under 100k
+km"), it searches the previous matches instead of the whole catalog.
+Loosening a filter, or a new catalog version, falls back to a full scan.
+
+Sessions live in a bounded in-memory TTL store (app/cache.py). Set
+SESSION_REDIS_URL to keep them in Redis or any Redis-compatible server
+instead (needs `pip install redis`).
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional: shared session store
+    redis_asyncio = None
+
+from app.ai_calculations import generate_suggestion
+from app.cache import TTLCache
+from app.catalog import get_catalog
+from app.executors import run_in_thread
+from app.intent import parse_intent
+
+SESSION_TTL = float(os.getenv("SESSION_TTL", "1800"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "10000"))
+SESSION_HISTORY_TURNS = int(os.getenv("SESSION_HISTORY_TURNS", "3"))
+SESSION_REDIS_URL = os.getenv("SESSION_REDIS_URL") or None
+
+# Filters where a bigger value is looser / tighter
+_UPPER_BOUNDS = ("max_price", "max_mileage")
+_LOWER_BOUNDS = ("min_year", "min_seats")
+
+
+# =========================
+# STORES
+# =========================
+class MemorySessionStore:
+    """Sessions in a process-local TTL/LRU cache (expiry slides on save)"""
+
+    def __init__(self, max_size: int = SESSION_MAX, ttl: float = SESSION_TTL):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl)
+
+    async def get(self, session_id: str) -> Optional[dict]:
+        return self._cache.get(session_id)
+
+    async def save(self, session: dict) -> None:
+        self._cache.set(session["session_id"], session)
+
+    async def delete(self, session_id: str) -> None:
+        self._cache.delete(session_id)
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class RedisSessionStore:
+    """Sessions as JSON strings in Redis, expiring after `ttl` seconds"""
+
+    KEY_PREFIX = "car-ai:session:"
+
+    def __init__(self, url: str, ttl: float = SESSION_TTL):
+        self.ttl = ttl
+        self._redis = redis_asyncio.from_url(url)
+
+    async def get(self, session_id: str) -> Optional[dict]:
+        raw = await self._redis.get(self.KEY_PREFIX + session_id)
+        if raw is None:
+            return None
+
+        session = json.loads(raw)
+        if session["rows"] is not None:
+            session["rows"] = np.asarray(session["rows"], dtype=int)
+        return session
+
+    async def save(self, session: dict) -> None:
+        data = dict(session)
+        if data["rows"] is not None:
+            data["rows"] = np.asarray(data["rows"]).tolist()
+
+        await self._redis.set(
+            self.KEY_PREFIX + session["session_id"],
+            json.dumps(data, ensure_ascii=False),
+            ex=int(self.ttl),
+        )
+
+    async def delete(self, session_id: str) -> None:
+        await self._redis.delete(self.KEY_PREFIX + session_id)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "ttl_seconds": self.ttl}
+
+
+_store = None
+
+
+def get_session_store():
+    """Process-wide session store (Redis when SESSION_REDIS_URL is set)"""
+    global _store
+
+    if _store is None:
+        if SESSION_REDIS_URL:
+            if redis_asyncio is None:
+                raise RuntimeError(
+                    "SESSION_REDIS_URL is set but the redis package is not installed"
+                )
+            _store = RedisSessionStore(SESSION_REDIS_URL)
+        else:
+            _store = MemorySessionStore()
+
+    return _store
+
+
+async def close_session_store() -> None:
+    """Close the Redis connection pool (called on app shutdown)"""
+    global _store
+
+    if _store is not None:
+        await _store.close()
+        _store = None
+
+
+# =========================
+# SESSION STATE
+# =========================
+def new_session() -> dict:
+    now = datetime.now().isoformat()
+    return {
+        "session_id": uuid.uuid4().hex,
+        "created_at": now,
+        "updated_at": now,
+        "turns": 0,
+        "intent": None,
+        "budget": None,
+        "catalog_version": None,
+        "rows": None,
+        "recommended": [],
+        "history": [],
+    }
+
+
+def merge_intent(previous: Optional[dict], turn: dict) -> Tuple[dict, bool]:
+    """
+    Accumulated filters after one more turn
+
+    Returns:
+        (merged intent, True if every change only tightened the filters)
+    """
+    if previous is None:
+        return dict(turn), False
+
+    merged = dict(previous)
+    narrowing = True
+
+    for name, value in turn.items():
+        if value is None or value == []:
+            continue
+
+        old = previous.get(name)
+        merged[name] = value
+
+        if old is None or old == []:
+            continue  # a new constraint only tightens
+        if isinstance(value, list):
+            narrowing &= set(value) <= set(old)
+        elif name in _UPPER_BOUNDS:
+            narrowing &= value <= old
+        elif name in _LOWER_BOUNDS:
+            narrowing &= value >= old
+        else:
+            narrowing &= value == old
+
+    return merged, narrowing
+
+
+async def create_session() -> dict:
+    session = new_session()
+    await get_session_store().save(session)
+    return session
+
+
+async def get_session(session_id: str) -> Optional[dict]:
+    return await get_session_store().get(session_id)
+
+
+async def delete_session(session_id: str) -> None:
+    await get_session_store().delete(session_id)
+
+
+async def session_suggestion(
+    session_id: str,
+    prompt: str,
+    budget: Optional[float] = None
+) -> Optional[dict]:
+    """
+    One conversation turn
+
+    Returns None for an unknown / expired session, otherwise:
+        {"session_id", "turn", "suggestion", "fallback", "filters",
+         "budget", "matching_cars", "narrowed"}
+
+    Raises:
+        LLMOverloadedError: the LLM queue is full
+    """
+    store = get_session_store()
+    session = await store.get(session_id)
+    if session is None:
+        return None
+
+    intent, narrowing = merge_intent(session["intent"], parse_intent(prompt))
+
+    if budget is None:
+        budget = session["budget"]
+    elif session["budget"] and budget > session["budget"]:
+        narrowing = False
+
+    catalog = await run_in_thread(get_catalog)
+    within = None
+    if narrowing and session["rows"] is not None and session["catalog_version"] == catalog.version:
+        within = session["rows"]
+
+    result = await generate_suggestion(
+        prompt,
+        budget,
+        intent=intent,
+        within_rows=within,
+        exclude_rows=session["recommended"],
+        history=session["history"],
+    )
+
+    retrieval = result["retrieval"]
+    if result["ok"]:
+        session["intent"] = intent
+        session["budget"] = budget
+        session["history"] = (session["history"] + [
+            {"role": "user", "content": prompt},
+            {"role": "assistant", "content": result["suggestion"]},
+        ])[-2 * SESSION_HISTORY_TURNS:]
+        session["turns"] += 1
+
+        if retrieval:
+            session["catalog_version"] = retrieval["catalog_version"]
+            session["rows"] = retrieval["rows"]
+            # The LLM is asked to pick the best candidate: the first one
+            if retrieval["candidate_rows"]:
+                best = int(retrieval["candidate_rows"][0])
+                if best not in session["recommended"]:
+                    session["recommended"].append(best)
+
+    session["updated_at"] = datetime.now().isoformat()
+    await store.save(session)
+
+    return {
+        "session_id": session_id,
+        "turn": session["turns"],
+        "suggestion": result["suggestion"],
+        "fallback": result["fallback"],
+        "filters": session["intent"] or {},
+        "budget": session["budget"],
+        "matching_cars": len(session["rows"]) if session["rows"] is not None else 0,
+        "narrowed": within is not None,
+    }
+
+
+def session_summary(session: dict) -> dict:
+    """Public view of a session (no row ids / raw history)"""
+    cars = get_catalog().cars if session["recommended"] else []
+    return {
+        "session_id": session["session_id"],
+        "created_at": session["created_at"],
+        "updated_at": session["updated_at"],
+        "turns": session["turns"],
+        "filters": session["intent"] or {},
+        "budget": session["budget"],
+        "matching_cars": len(session["rows"]) if session["rows"] is not None else 0,
+        "recommended": [
+            cars[row].get("title") for row in session["recommended"] if row < len(cars)
+        ],
+    }
+
+
+def session_stats() -> dict:
+    return get_session_store().stats()
+
+
+__all__ = [
+    "SESSION_TTL",
+    "MemorySessionStore",
+    "RedisSessionStore",
+    "get_session_store",
+    "close_session_store",
+    "merge_intent",
+    "create_session",
+    "get_session",
+    "delete_session",
+    "session_suggestion",
+    "session_summary",
+    "session_stats",
+]
@@ -0,0 +1,302 @@
+"""
+Shared Catalog
+One copy of the catalog per machine instead of one per worker process
+
+With `uvicorn --workers N` (and the process pool) every process used
+to parse the dataset into its own list of dicts and numpy columns.
+With CATALOG_SHARED=1 the first process that sees a new dataset
+version publishes it to CATALOG_SHARED_DIR (tmpfs /dev/shm by default)
+and every process maps the same files read-only:
+
+    {dir}/CURRENT               versioned handle: dataset file key -> version
+    {dir}/{version}/meta.json   size + category vocabularies
+    {dir}/{version}/*.npy       numpy columns (np.load(mmap_mode="r"))
+    {dir}/{version}/rows.bin    cars as JSON, one after another
+    {dir}/{version}/offsets.npy where each car starts in rows.bin
+    {dir}/{version}/derived/    arrays from CatalogSnapshot.derived_arrays()
+
+Publishing happens under an flock, so one process builds a version and
+the others wait for it and attach. Workers notice a new dataset file
+on their next request (get_catalog() stat) and all switch to the
+version named by CURRENT. Versions are immutable; the newest
+CATALOG_SHARED_KEEP stay on disk, older ones are removed (processes
+still mapping them keep their pages until they switch).
+
+Cars are decoded from rows.bin on access (a fresh dict per access, a
+few microseconds each). Structures made of Python objects (market
+cube, KD-trees, cached JSON bodies) are still built per process.
+"""
+
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Sequence
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from app.catalog import CatalogSnapshot
+
+try:
+    import fcntl
+except ImportError:  # not on Windows: shared mode is unavailable
+    fcntl = None
+
+CATALOG_SHARED = os.getenv("CATALOG_SHARED", "0") == "1"
+CATALOG_SHARED_DIR = os.getenv(
+    "CATALOG_SHARED_DIR",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "car-api-catalog"),
+)
+CATALOG_SHARED_KEEP = max(1, int(os.getenv("CATALOG_SHARED_KEEP", "2")))
+
+HANDLE_FILE = "CURRENT"
+
+
+def shared_enabled() -> bool:
+    return CATALOG_SHARED and fcntl is not None
+
+
+@contextmanager
+def _locked(path: str) -> Iterator[None]:
+    """Exclusive lock across processes (and threads: one fd per call)"""
+    with open(path, "a+") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _safe_name(name: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+
+
+# =========================
+# ROWS
+# =========================
+class SharedRows(Sequence):
+    """Read-only car list over a mapped JSON blob"""
+
+    def __init__(self, path: str, offsets: np.ndarray):
+        self.offsets = offsets
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("car index out of range")
+        return json.loads(self._blob[int(self.offsets[index]):int(self.offsets[index + 1])])
+
+    def __iter__(self) -> Iterator[dict]:
+        bounds = self.offsets.tolist()
+        blob = self._blob
+        for start, end in zip(bounds, bounds[1:]):
+            yield json.loads(blob[start:end])
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, SharedRows):
+            end = int(self.offsets[-1])
+            return (
+                np.array_equal(self.offsets, other.offsets)
+                and self._blob[:end] == other._blob[:end]
+            )
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    __hash__ = None
+
+
+# =========================
+# VERSION STORE
+# =========================
+class SharedStore:
+    """Files of one published catalog version"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def load_array(self, name: str) -> np.ndarray:
+        return np.load(self.path(name), mmap_mode="r")
+
+    def arrays(self, name: str, build: Callable[[], Tuple[np.ndarray, ...]]) -> Tuple[np.ndarray, ...]:
+        """Derived arrays: built by the first process that asks, mapped by all"""
+        base = os.path.join(self.directory, "derived", _safe_name(name))
+        marker = f"{base}.count"
+
+        if not os.path.exists(marker):
+            os.makedirs(os.path.dirname(base), exist_ok=True)
+            with _locked(f"{base}.lock"):
+                if not os.path.exists(marker):
+                    built = build()
+                    for i, array in enumerate(built):
+                        _save_array(f"{base}.{i}.npy", np.ascontiguousarray(array))
+                    _write_atomic(marker, str(len(built)))
+
+        with open(marker) as f:
+            count = int(f.read())
+        return tuple(np.load(f"{base}.{i}.npy", mmap_mode="r") for i in range(count))
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _save_array(path: str, array: np.ndarray) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def _publish(snapshot: CatalogSnapshot) -> None:
+    """Write `snapshot` as a new version directory (no-op if it exists)"""
+    final = os.path.join(CATALOG_SHARED_DIR, snapshot.version)
+    if os.path.isdir(final):
+        return
+
+    tmp = tempfile.mkdtemp(prefix=f".{snapshot.version}-", dir=CATALOG_SHARED_DIR)
+    try:
+        offsets = np.zeros(snapshot.size + 1, dtype=np.int64)
+        with open(os.path.join(tmp, "rows.bin"), "wb") as f:
+            position = 0
+            for i, car in enumerate(snapshot.cars):
+                raw = json.dumps(car, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                f.write(raw)
+                position += len(raw)
+                offsets[i + 1] = position
+
+        np.save(os.path.join(tmp, "offsets.npy"), offsets)
+        for name, column in snapshot.columns().items():
+            np.save(os.path.join(tmp, f"{name}.npy"), column)
+
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": snapshot.version,
+                "size": snapshot.size,
+                "vocabs": snapshot.vocabs(),
+                "published_at": time.time(),
+                "published_by": os.getpid(),
+            }, f)
+
+        os.rename(tmp, final)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def _prune(current: str) -> None:
+    versions = []
+    for name in os.listdir(CATALOG_SHARED_DIR):
+        meta = os.path.join(CATALOG_SHARED_DIR, name, "meta.json")
+        if name != current and os.path.exists(meta):
+            versions.append((os.path.getmtime(meta), name))
+
+    for _, name in sorted(versions, reverse=True)[CATALOG_SHARED_KEEP - 1:]:
+        shutil.rmtree(os.path.join(CATALOG_SHARED_DIR, name), ignore_errors=True)
+
+
+def _read_handle() -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(CATALOG_SHARED_DIR, HANDLE_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def attach(version: str) -> CatalogSnapshot:
+    """Map a published version read-only"""
+    store = SharedStore(os.path.join(CATALOG_SHARED_DIR, version))
+    with open(store.path("meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+
+    rows = SharedRows(store.path("rows.bin"), store.load_array("offsets.npy"))
+    columns = {
+        name[:-len(".npy")]: store.load_array(name)
+        for name in os.listdir(store.directory)
+        if name.endswith(".npy") and name != "offsets.npy"
+    }
+    return CatalogSnapshot(rows, meta["version"], columns=columns, vocabs=meta["vocabs"], store=store)
+
+
+def shared_snapshot(
+    path: str,
+    file_key: Tuple[int, int],
+    load: Callable[[str], CatalogSnapshot],
+) -> CatalogSnapshot:
+    """
+    Snapshot of dataset `path` (at `file_key`) from the shared store
+
+    The first process to ask for a new file key loads it with `load`
+    and publishes it; everyone else attaches the published version.
+    """
+    os.makedirs(CATALOG_SHARED_DIR, exist_ok=True)
+
+    with _locked(os.path.join(CATALOG_SHARED_DIR, ".lock")):
+        handle = _read_handle()
+        current = (
+            handle is not None
+            and handle["file_key"] == list(file_key)
+            and os.path.isdir(os.path.join(CATALOG_SHARED_DIR, handle["version"]))
+        )
+
+        if not current:
+            snapshot = load(path)
+            _publish(snapshot)
+            handle = {
+                "version": snapshot.version,
+                "file_key": list(file_key),
+                "published_at": time.time(),
+            }
+            _write_atomic(os.path.join(CATALOG_SHARED_DIR, HANDLE_FILE), json.dumps(handle))
+            _prune(snapshot.version)
+
+        # Attach under the lock: a concurrent publish may prune old versions
+        return attach(handle["version"])
+
+
+def shared_stats() -> Dict[str, Any]:
+    handle = _read_handle() if shared_enabled() else None
+    stats: Dict[str, Any] = {
+        "enabled": shared_enabled(),
+        "dir": CATALOG_SHARED_DIR,
+        "version": handle["version"] if handle else None,
+    }
+    if handle:
+        directory = os.path.join(CATALOG_SHARED_DIR, handle["version"])
+        stats["bytes"] = sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(directory)
+            for name in names
+        )
+    return stats
+
+
+__all__ = [
+    "CATALOG_SHARED",
+    "CATALOG_SHARED_DIR",
+    "SharedRows",
+    "SharedStore",
+    "shared_enabled",
+    "shared_snapshot",
+    "attach",
+    "shared_stats",
+]
@@ -0,0 +1,189 @@
+"""
+Similar Cars Index
+k-nearest-neighbour search over the catalog ("show me cars like this one")
+
+Distance between two cars:
+- Euclidean over scaled numeric features: price, age, mileage, power
+- Plus a fixed penalty for each differing category: brand, fuel, gearbox
+
+Fuel and gearbox are one-hot encoded next to the numeric features.
+Brand (high cardinality) is handled by partitioning instead: one KD-tree
+per brand. A query searches brands in order of their penalty and stops
+once the penalty alone exceeds the current k-th distance, so results are
+exact while a dense catalog is served mostly from the car's own brand.
+
+The index is built once per catalog version (see CatalogSnapshot.derived).
+"""
+
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from app.catalog import CatalogSnapshot
+
+
+# Distance added by a mismatch in each categorical field,
+# relative to one standard deviation of a numeric feature.
+# A missing value against a known one counts as half a mismatch.
+CATEGORY_WEIGHTS = {
+    "brand": 1.0,
+    "fuel": 0.8,
+    "gearbox": 0.5,
+}
+
+
+def _scale(column: np.ndarray) -> np.ndarray:
+    """Center on median and divide by std; missing values land on 0"""
+    valid = column[~np.isnan(column)]
+    if valid.size == 0:
+        return np.zeros_like(column)
+
+    center = np.median(valid)
+    spread = valid.std() or 1.0
+    scaled = (column - center) / spread
+    scaled[np.isnan(scaled)] = 0.0
+    return scaled
+
+
+def _one_hot(codes: np.ndarray, vocab_size: int, weight: float) -> np.ndarray:
+    """
+    One-hot encode category codes
+
+    Values are weight / sqrt(2), so two different categories are exactly
+    `weight` apart and missing (all-zero) is weight / sqrt(2) from any.
+    """
+    encoded = np.zeros((codes.size, max(vocab_size - 1, 1)), dtype=float)
+    known = codes > 0
+    encoded[np.flatnonzero(known), codes[known] - 1] = weight / np.sqrt(2)
+    return encoded
+
+
+def _mismatch(codes: np.ndarray, code: int, weight: float) -> np.ndarray:
+    """Squared penalty of each code against `code` (0 = missing)"""
+    penalty = np.where(codes == code, 0.0, weight ** 2)
+    half = (codes == 0) ^ (code == 0)
+    penalty[half] = weight ** 2 / 2
+    return penalty
+
+
+class SimilarCarsIndex:
+    """
+    Partitioned KD-trees over one catalog snapshot
+    """
+
+    def __init__(self, snapshot: CatalogSnapshot):
+        from scipy.spatial import cKDTree
+
+        started = time.perf_counter()
+
+        self.version = snapshot.version
+        self.rows = snapshot.size
+        self.features = np.hstack([
+            np.column_stack([
+                _scale(np.log1p(snapshot.price)),
+                _scale(snapshot.age),
+                _scale(np.log1p(snapshot.mileage)),
+                _scale(snapshot.power),
+            ]),
+            _one_hot(snapshot.fuel_codes, len(snapshot.fuel_vocab), CATEGORY_WEIGHTS["fuel"]),
+            _one_hot(snapshot.gearbox_codes, len(snapshot.gearbox_vocab), CATEGORY_WEIGHTS["gearbox"]),
+        ])
+        self.brand_codes = snapshot.brand_codes
+
+        # One KD-tree per brand
+        keys, inverse = np.unique(self.brand_codes, return_inverse=True)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(keys) + 1))
+
+        self.partition_keys = keys
+        self.partition_rows: List[np.ndarray] = []
+        self.partition_trees = []
+        for p in range(len(keys)):
+            rows = order[bounds[p]:bounds[p + 1]]
+            self.partition_rows.append(rows)
+            self.partition_trees.append(cKDTree(self.features[rows], leafsize=32))
+
+        self.build_ms = (time.perf_counter() - started) * 1000
+        self.size_bytes = self.features.nbytes + sum(
+            rows.nbytes + self._tree_bytes(tree)
+            for rows, tree in zip(self.partition_rows, self.partition_trees)
+        )
+
+    @staticmethod
+    def _tree_bytes(tree) -> int:
+        # Points + permutation index + ~64 bytes per tree node
+        return tree.data.nbytes + tree.indices.nbytes + tree.size * 64
+
+    def _partition_penalties(self, car_id: int) -> np.ndarray:
+        return np.sqrt(_mismatch(
+            self.partition_keys, self.brand_codes[car_id], CATEGORY_WEIGHTS["brand"]
+        ))
+
+    def query(self, car_id: int, k: int = 10) -> List[Tuple[int, float]]:
+        """
+        k most similar cars to catalog row `car_id`
+
+        Returns:
+            [(row id, distance), ...] nearest first, excluding the car itself
+        """
+        k = max(1, min(k, self.rows - 1))
+        point = self.features[car_id]
+        penalties = self._partition_penalties(car_id)
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_dist = np.empty(0, dtype=float)
+        kth = np.inf
+
+        for p in np.argsort(penalties, kind="stable"):
+            penalty = penalties[p]
+            if penalty >= kth:
+                break
+
+            # Only numeric+fuel+gearbox distance that can still beat k-th
+            rows = self.partition_rows[p]
+            distances, found = self.partition_trees[p].query(
+                point,
+                k=min(k + 1, rows.size),
+                distance_upper_bound=np.sqrt(kth ** 2 - penalty ** 2),
+            )
+            distances = np.atleast_1d(distances)
+            found = np.atleast_1d(found)
+            hit = np.isfinite(distances)
+            found_rows = rows[found[hit]]
+            keep = found_rows != car_id
+
+            best_rows = np.concatenate([best_rows, found_rows[keep]])
+            best_dist = np.concatenate([
+                best_dist, np.hypot(distances[hit][keep], penalty)
+            ])
+            if best_dist.size >= k:
+                top = np.lexsort((best_rows, best_dist))[:k]
+                best_rows, best_dist = best_rows[top], best_dist[top]
+                kth = best_dist[-1]
+
+        order = np.lexsort((best_rows, best_dist))[:k]
+        return [
+            (int(row), round(float(dist), 4))
+            for row, dist in zip(best_rows[order], best_dist[order])
+        ]
+
+    def stats(self) -> Dict:
+        return {
+            "catalog_version": self.version,
+            "rows": int(self.rows),
+            "partitions": len(self.partition_trees),
+            "build_ms": round(self.build_ms, 2),
+            "size_bytes": int(self.size_bytes),
+        }
+
+
+def get_similar_index(snapshot: CatalogSnapshot) -> SimilarCarsIndex:
+    """Index for this snapshot, built on first use"""
+    return snapshot.derived("similar_index", SimilarCarsIndex)
+
+
+__all__ = [
+    "SimilarCarsIndex",
+    "get_similar_index",
+]
@@ -0,0 +1,71 @@
+"""
+Single-Flight Request Coalescing
+Concurrent calls with the same key share one execution
+
+The first caller for a key starts the work; callers arriving while it
+is still running await the same task instead of repeating it. Once the
+task finishes the key is released, so this never serves stale results
+(caching is a separate layer, see app/cache.py).
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Per-key deduplication of in-flight async work
+
+    A caller that gets cancelled does not cancel the shared task; the
+    other waiters still get their result.
+    """
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(
+        self,
+        key: Hashable,
+        func: Callable[..., Awaitable[Any]],
+        *args
+    ) -> Any:
+        """
+        Run `await func(*args)` once per key at a time
+
+        Exceptions are shared too: every waiter of a failed
+        execution gets the same exception.
+        """
+        task = self._inflight.get(key)
+
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(func(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        # Mark the exception as retrieved when every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "in_flight": len(self._inflight),
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
+
+
+__all__ = ["SingleFlight"]
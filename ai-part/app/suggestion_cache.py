@@ -0,0 +1,250 @@
+"""
+AI Suggestion Cache
+Caches /ai-suggest/ answers by normalized prompt intent
+
+Near-identical prompts ("cheap diesel family car" / "Family car, cheap,
+diesel!") map to the same key: the parsed search intent (app/intent.py),
+a few need keywords, a budget bucket and the catalog version. The
+version is resolved with get_catalog() (a stat, reloading a changed
+dataset) before each lookup, so an answer cached for an older dataset
+is a miss once the file changes.
+
+Only successful LLM answers are cached; errors and local fallback
+answers (LLM unavailable) are always retried.
+
+Budget buckets: retrieval always uses the caller's exact budget, the
+bucket only widens the key. An entry generated for 20999 is reused
+for 20000 only if none of its cars is above 20000 (else it is a miss
+and regenerated); a caller at the top of a bucket may get an answer
+generated for a lower budget in it, which can miss cars just below
+their budget.
+"""
+
+import math
+import os
+import re
+import time
+from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
+
+from app.ai_calculations import generate_suggestion, stream_ai_suggestion
+from app.cache import TTLCache
+from app.executors import run_in_thread
+from app.intent import parse_intent
+from app.singleflight import SingleFlight
+
+AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", "600"))
+AI_CACHE_SIZE = int(os.getenv("AI_CACHE_SIZE", "1000"))
+
+# Prompt keyword -> normalized need
+NEED_KEYWORDS = {
+    "cheap": "cheap",
+    "budget": "cheap",
+    "affordable": "cheap",
+    "family": "family",
+    "spacious": "family",
+    "city": "city",
+    "commute": "city",
+    "small": "city",
+    "reliable": "reliable",
+    "luxury": "luxury",
+    "premium": "luxury",
+    "sport": "sport",
+    "fast": "sport",
+    "mileage": "low_mileage",
+    "new": "new",
+    "economical": "economical",
+    "efficient": "economical",
+}
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+_cache = TTLCache(max_size=AI_CACHE_SIZE, ttl=AI_CACHE_TTL)
+
+# Identical misses arriving together share one retrieval + LLM call
+_flights = SingleFlight("ai_suggest")
+
+# How much upstream work the hits avoided
+_savings = {"llm_calls_saved": 0, "llm_seconds_saved": 0.0, "prompt_tokens_saved": 0}
+
+# Entries found but not served: a car above the caller's budget
+_over_budget = {"misses": 0}
+
+
+# =========================
+# KEY NORMALIZATION
+# =========================
+def bucket_budget(budget: Optional[float]) -> Optional[float]:
+    """
+    Floor a budget to 2 significant digits (20400 -> 20000, 950 -> 950)
+
+    Only shapes the cache key; retrieval uses the caller's budget.
+    """
+    if not budget or budget <= 0:
+        return None
+
+    step = 10 ** max(0, int(math.floor(math.log10(budget))) - 1)
+    return float(budget // step * step)
+
+
+async def _catalog_version() -> str:
+    """Version of the dataset on disk (get_catalog() stat / reload, in the thread pool)"""
+    from app.catalog import get_catalog
+
+    try:
+        snapshot = await run_in_thread(get_catalog)
+    except FileNotFoundError:
+        return "none"  # retrieval fails as well: nothing gets cached
+    return snapshot.version
+
+
+def intent_key(prompt: str, budget: Optional[float], catalog_version: str) -> tuple:
+    """Normalized cache key for a suggestion prompt against one catalog version"""
+    words = set(_WORD_RE.findall(prompt.lower()))
+
+    filters = tuple(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in sorted(parse_intent(prompt).items())
+    )
+    needs = tuple(sorted({NEED_KEYWORDS[w] for w in words if w in NEED_KEYWORDS}))
+
+    return (catalog_version, filters, needs, bucket_budget(budget))
+
+
+# =========================
+# CACHED SUGGESTIONS
+# =========================
+def _fits_budget(entry: dict, budget: Optional[float]) -> bool:
+    """No cached car costs more than this caller's budget"""
+    if not budget or budget <= 0:
+        return True
+    return all(
+        (car.get("price_numeric") or 0) <= budget for car in entry["candidates"]
+    )
+
+
+def _lookup(key: tuple, budget: Optional[float]) -> Optional[dict]:
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    if not _fits_budget(entry, budget):
+        _over_budget["misses"] += 1
+        return None
+    _record_hit(entry)
+    return entry
+
+
+def _record_hit(entry: dict) -> None:
+    _savings["llm_calls_saved"] += 1
+    _savings["llm_seconds_saved"] += entry["llm_seconds"]
+    _savings["prompt_tokens_saved"] += entry["prompt_tokens"]
+
+
+async def get_cached_ai_suggestion(
+    prompt: str,
+    budget: Optional[float] = None
+) -> dict:
+    """
+    get_ai_suggestion with an intent-keyed cache
+
+    Returns:
+        {"suggestion": text, "cached": bool, "fallback": bool}
+    """
+    key = intent_key(prompt, budget, await _catalog_version())
+    entry = _lookup(key, budget)
+    if entry is not None:
+        return {"suggestion": entry["suggestion"], "cached": True, "fallback": False}
+
+    # Flights per exact budget: callers in one bucket retrieve differently
+    result = await _flights.do((key, budget), _generate_and_store, key, prompt, budget)
+    return {"suggestion": result["suggestion"], "cached": False, "fallback": result["fallback"]}
+
+
+async def _generate_and_store(key: tuple, prompt: str, budget: Optional[float]) -> dict:
+    started = time.perf_counter()
+    result = await generate_suggestion(prompt, budget)
+
+    if result["ok"] and not result["fallback"]:
+        _cache.set(key, {
+            "suggestion": result["suggestion"],
+            "candidates": result["candidates"],
+            "llm_seconds": time.perf_counter() - started,
+            "prompt_tokens": result["prompt_tokens"],
+        })
+
+    return result
+
+
+async def stream_cached_ai_suggestion(
+    prompt: str,
+    budget: Optional[float] = None
+) -> AsyncIterator[Tuple[str, dict]]:
+    """
+    stream_ai_suggestion with the same cache
+
+    A hit replays candidates + the whole reply as one token event; the
+    done event carries "cached": true. A miss streams live and caches
+    the full reply once it finished without errors or fallback.
+    """
+    key = intent_key(prompt, budget, await _catalog_version())
+    entry = _lookup(key, budget)
+    if entry is not None:
+        yield "candidates", {"candidates": entry["candidates"]}
+        yield "token", {"text": entry["suggestion"]}
+        yield "done", {
+            "timestamp": datetime.now().isoformat(),
+            "fallback": False,
+            "cached": True,
+        }
+        return
+
+    started = time.perf_counter()
+    candidates = []
+    prompt_tokens = 0
+    parts = []
+    failed = False
+
+    async for event, data in stream_ai_suggestion(prompt, budget):
+        if event == "candidates":
+            candidates = data["candidates"]
+            prompt_tokens = data["prompt_tokens"]
+        elif event == "token":
+            parts.append(data["text"])
+        elif event == "error":
+            failed = True
+        elif event == "done":
+            data = {**data, "cached": False}
+            if not failed and not data.get("fallback"):
+                _cache.set(key, {
+                    "suggestion": "".join(parts),
+                    "candidates": candidates,
+                    "llm_seconds": time.perf_counter() - started,
+                    "prompt_tokens": prompt_tokens,
+                })
+        yield event, data
+
+
+def cache_stats() -> dict:
+    """Hit/miss counters plus the LLM work the cache avoided"""
+    return {
+        **_cache.stats(),
+        "llm_calls_saved": _savings["llm_calls_saved"],
+        "llm_seconds_saved": round(_savings["llm_seconds_saved"], 3),
+        "prompt_tokens_saved": _savings["prompt_tokens_saved"],
+        "coalesced_misses": _flights.coalesced,
+        "over_budget_misses": _over_budget["misses"],
+    }
+
+
+def clear_suggestion_cache() -> None:
+    _cache.clear()
+
+
+__all__ = [
+    "bucket_budget",
+    "intent_key",
+    "get_cached_ai_suggestion",
+    "stream_cached_ai_suggestion",
+    "cache_stats",
+    "clear_suggestion_cache",
+]
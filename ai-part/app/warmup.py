@@ -0,0 +1,241 @@
+"""
+Warmup
+Builds the expensive per-process state before the first request needs it
+
+Heavy modules (openai, joblib, the scraper chain) are imported on first
+use, so `import app.main` stays cheap. The work a first request would
+otherwise pay for runs here, once per worker, at startup:
+
+1. catalog: read + parse the dataset into a snapshot
+2. market_cube, similar_index, pareto_index: derived structures
+3. ml_model: the trained price model (skipped when there is none)
+4. llm_client: imports the openai SDK and creates the shared client
+5. process_pool: spawns the pool workers, each loads its own catalog
+
+WARMUP selects when it runs:
+- background (default): the server accepts requests at once, warmup
+  runs in the thread pool; is_warm() turns True when it is done
+- blocking: startup waits for warmup, the port opens warm
+- off: nothing is pre-built (first requests pay, as before)
+
+startup_report() gives the breakdown (import time, each step in ms).
+readiness() backs GET /health/ready: 503 until the catalog and its
+indexes are warm, so load balancers only route to workers that serve
+at full speed. It only reads in-memory state (no file stat, no I/O).
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.executors import PROCESS_WORKERS, get_process_pool, run_in_thread
+
+WARMUP = os.getenv("WARMUP", "background").lower()
+WARMUP_PROCESS_POOL = os.getenv("WARMUP_PROCESS_POOL", "1") != "0"
+
+# A worker is not ready while one of these is missing / failed
+REQUIRED_STEPS = ("catalog", "market_cube", "similar_index", "pareto_index")
+
+# Derived structures reported by readiness()
+INDEXES = ("market_cube", "similar_index", "pareto_index")
+
+# "pending" -> "running" -> "done" / "failed" ("off" when disabled)
+_state = {
+    "mode": WARMUP,
+    "state": "pending",
+    "phases": {},
+    "steps": {},
+    "errors": {},
+    "total_ms": None,
+}
+_task: Optional[asyncio.Future] = None
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Startup phase measured outside warmup (e.g. app import time)"""
+    _state["phases"][f"{name}_ms"] = round(seconds * 1000, 2)
+
+
+# =========================
+# STEPS
+# =========================
+def _catalog() -> Any:
+    from app.catalog import get_catalog
+
+    return get_catalog()
+
+
+def _market_cube() -> None:
+    from app.market_cube import get_market_cube
+
+    get_market_cube(_catalog())
+
+
+def _similar_index() -> None:
+    from app.similar_index import get_similar_index
+
+    get_similar_index(_catalog())
+
+
+def _pareto_index() -> None:
+    from app.pareto import get_pareto_index
+
+    get_pareto_index(_catalog())
+
+
+def _ml_model() -> Optional[str]:
+    from app.ai_calculations import load_ml_model
+
+    try:
+        load_ml_model()
+    except FileNotFoundError:
+        return "skipped: no trained model"
+    return None
+
+
+def _llm_client() -> Optional[str]:
+    from app.llm_client import get_llm_client
+
+    if not os.getenv("OPENAI_API_KEY"):
+        import openai  # noqa: F401  (the import is the slow part)
+        return "skipped: OPENAI_API_KEY not set, SDK imported only"
+
+    get_llm_client()
+    return None
+
+
+def _warm_worker() -> int:
+    """Runs in a pool process: imports analysis code, builds its cube"""
+    from app.market_cube import current_market_cube
+
+    current_market_cube()
+    return os.getpid()
+
+
+def _process_pool() -> Optional[str]:
+    if not WARMUP_PROCESS_POOL:
+        return "skipped: WARMUP_PROCESS_POOL=0"
+
+    # One task per worker: the pool spawns a process for each queued task
+    pool = get_process_pool()
+    futures = [pool.submit(_warm_worker) for _ in range(PROCESS_WORKERS)]
+    wait(futures)
+    pids = {future.result() for future in futures}
+    return f"{len(pids)} workers"
+
+
+STEPS: List[Tuple[str, Callable[[], Optional[str]]]] = [
+    ("catalog", _catalog),
+    ("market_cube", _market_cube),
+    ("similar_index", _similar_index),
+    ("pareto_index", _pareto_index),
+    ("ml_model", _ml_model),
+    ("llm_client", _llm_client),
+    ("process_pool", _process_pool),
+]
+
+
+def run_warmup() -> Dict[str, Any]:
+    """Run every step (blocking); a failed step is recorded, not raised"""
+    _state["state"] = "running"
+    started = time.perf_counter()
+
+    for name, step in STEPS:
+        step_started = time.perf_counter()
+        try:
+            note = step()
+        except Exception as e:
+            _state["errors"][name] = f"{type(e).__name__}: {e}"
+            note = None
+        entry: Dict[str, Any] = {"ms": round((time.perf_counter() - step_started) * 1000, 2)}
+        if isinstance(note, str):
+            entry["note"] = note
+        _state["steps"][name] = entry
+
+    _state["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    _state["state"] = "failed" if _state["errors"] else "done"
+    return startup_report()
+
+
+# =========================
+# STARTUP HOOK
+# =========================
+async def start_warmup() -> None:
+    """Startup event: run warmup per WARMUP (background / blocking / off)"""
+    global _task
+
+    if WARMUP == "off":
+        _state["state"] = "off"
+        return
+
+    if WARMUP == "blocking":
+        await run_in_thread(run_warmup)
+        return
+
+    _task = asyncio.ensure_future(run_in_thread(run_warmup))
+
+
+def is_warm() -> bool:
+    """Warmup finished (or disabled); a failed step still counts as warm"""
+    return _state["state"] in ("done", "failed", "off")
+
+
+def readiness() -> Tuple[bool, Dict[str, Any]]:
+    """
+    (ready, report) for a load balancer, from cached state only
+
+    Ready once warmup has finished without failing a REQUIRED_STEPS
+    step (always, with WARMUP=off). The report names the catalog
+    version, the model version and which indexes are built for the
+    current snapshot (rebuilt lazily after a dataset change).
+    """
+    from app.ai_calculations import ml_model_version
+    from app.catalog import current_snapshot
+
+    snapshot = current_snapshot()
+    failed = [name for name in REQUIRED_STEPS if name in _state["errors"]]
+    ready = is_warm() and not failed and (snapshot is not None or WARMUP == "off")
+
+    catalog = None
+    if snapshot is not None:
+        catalog = {
+            "version": snapshot.version,
+            "size": snapshot.size,
+            "loaded_at": snapshot.loaded_at.isoformat(),
+            "shared": snapshot.store is not None,
+        }
+
+    return ready, {
+        "status": "ready" if ready else "not_ready",
+        "catalog": catalog,
+        "indexes": {
+            name: snapshot is not None and snapshot.has_derived(name) for name in INDEXES
+        },
+        "model": {"version": ml_model_version()},
+        "failed_steps": failed,
+        "warmup": startup_report(),
+    }
+
+
+def startup_report() -> Dict[str, Any]:
+    return {
+        "mode": _state["mode"],
+        "state": _state["state"],
+        "phases": dict(_state["phases"]),
+        "steps": dict(_state["steps"]),
+        "errors": dict(_state["errors"]),
+        "total_ms": _state["total_ms"],
+    }
+
+
+__all__ = [
+    "WARMUP",
+    "record_phase",
+    "run_warmup",
+    "start_warmup",
+    "is_warm",
+    "readiness",
+    "startup_report",
+]
@@ -0,0 +1,139 @@
+"""
+Benchmark response serialization: FastAPI default path vs fast path
+Runs directly from terminal (no server needed)
+
+    python scripts/benchmark_serialization.py [cars]
+
+Default path = response_model validation + jsonable_encoder + json.dumps
+(what FastAPI does for a plain return value). Fast path = what the
+routes do now: orjson via app/fast_json.py, and bytes pre-serialized
+once per catalog version for /cars/list and /cars/stats.
+
+Times are CPU time per response (time.process_time).
+"""
+
+import json
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.catalog import get_catalog
+from app.ai_calculations import summarize_comparison
+from app.market_cube import analyze_with_market
+from app.models import CarAnalysis, CarsListResponse, CarsStatsResponse
+from app.fast_json import dumps, orjson
+from app.routes import (
+    _analysis_projector,
+    _car_analysis_item,
+    _build_cars_list,
+    _build_dataset_stats,
+    _cars_list_json,
+    _dataset_stats_json,
+)
+
+N_CARS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+REPEAT = 20
+
+
+def cpu_ms(func, repeat: int = REPEAT) -> float:
+    func()  # warm up
+    started = time.process_time()
+    for _ in range(repeat):
+        func()
+    return (time.process_time() - started) * 1000 / repeat
+
+
+def default_path(content, model=None) -> bytes:
+    if model is not None:
+        content = model.validate_python(content)
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False).encode("utf-8")
+
+
+catalog = get_catalog()
+cars = [dict(catalog.cars[i % catalog.size]) for i in range(N_CARS)]
+analyzed = analyze_with_market(cars)
+comparison = summarize_comparison(analyzed)
+
+analysis_model = TypeAdapter(List[CarAnalysis])
+lean_item = _analysis_projector(tuple(CarAnalysis.model_fields), True)
+short_item = _analysis_projector(("title", "profit", "risk_score"))
+list_model = TypeAdapter(CarsListResponse)
+stats_model = TypeAdapter(CarsStatsResponse)
+
+cases = [
+    (
+        f"/analyze-cars/ ({N_CARS} cars)",
+        lambda: default_path(analyzed, analysis_model),
+        lambda: dumps([_car_analysis_item(car) for car in analyzed]),
+    ),
+    (
+        "  ?lean=true",
+        lambda: default_path(analyzed, analysis_model),
+        lambda: dumps([lean_item(car) for car in analyzed]),
+    ),
+    (
+        "  ?fields=title,profit,risk_score",
+        lambda: default_path(analyzed, analysis_model),
+        lambda: dumps([short_item(car) for car in analyzed]),
+    ),
+    (
+        f"/compare-cars/ ({N_CARS} cars)",
+        lambda: default_path(comparison),
+        lambda: dumps(summarize_comparison(analyzed)),
+    ),
+    (
+        "/cars/list",
+        lambda: default_path(_build_cars_list(catalog.cars), list_model),
+        lambda: _cars_list_json(catalog),
+    ),
+    (
+        "/cars/stats",
+        lambda: default_path(_build_dataset_stats(catalog.cars), stats_model),
+        lambda: _dataset_stats_json(catalog),
+    ),
+]
+
+print("=" * 72)
+print(f"🚗 RESPONSE SERIALIZATION BENCHMARK (orjson: {'yes' if orjson else 'no'})")
+print("=" * 72)
+print(f"{'endpoint':<36}{'default ms':>12}{'fast ms':>12}{'speedup':>10}")
+
+for name, slow, fast in cases:
+    slow_ms = cpu_ms(slow)
+    fast_ms = cpu_ms(fast)
+    print(f"{name:<36}{slow_ms:>12.3f}{fast_ms:>12.3f}{slow_ms / max(fast_ms, 1e-6):>9.1f}x")
+
+# Same content either way
+# Per-item shaping cost, serialization excluded
+model_us = cpu_ms(
+    lambda: analysis_model.dump_python(analysis_model.validate_python(analyzed))
+) * 1000 / N_CARS
+print(f"\n{'per item (µs)':<36}{'model':>12}{'projector':>12}")
+for name, item in [("default", _car_analysis_item), ("lean", lean_item), ("fields", short_item)]:
+    item_us = cpu_ms(lambda: [item(car) for car in analyzed]) * 1000 / N_CARS
+    print(f"{name:<36}{model_us:>12.2f}{item_us:>12.2f}")
+
+# Byte-identical output (compact separators on both sides)
+expected = json.dumps(
+    jsonable_encoder(analysis_model.validate_python(analyzed)),
+    ensure_ascii=False, separators=(",", ":"),
+).encode("utf-8")
+same = expected == dumps([_car_analysis_item(car) for car in analyzed])
+print(f"\n{'✅' if same else '❌'} /analyze-cars/ payloads identical: {same}")
+
+for name, build, model, cached in [
+    ("/cars/list", _build_cars_list, list_model, _cars_list_json),
+    ("/cars/stats", _build_dataset_stats, stats_model, _dataset_stats_json),
+]:
+    expected = json.dumps(
+        jsonable_encoder(model.validate_python(build(catalog.cars))),
+        ensure_ascii=False, separators=(",", ":"),
+    ).encode("utf-8")
+    same = expected == cached(catalog)
+    print(f"{'✅' if same else '❌'} {name} payloads identical: {same}")
@@ -0,0 +1,128 @@
+"""
+Benchmark catalog memory with several worker processes
+Runs directly from terminal (no server needed, Linux: reads /proc)
+
+    python scripts/benchmark_shared_catalog.py [cars] [workers]
+
+Generates a synthetic catalog, then starts `workers` processes that
+each load it the way a uvicorn worker does: per process (default) and
+attached from the shared store (CATALOG_SHARED=1, app/shared_catalog.py).
+Reports the catalog's proportional set size (PSS: shared pages are
+split between the processes mapping them) summed over all workers.
+"""
+
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+N_CARS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+BRANDS = ["Volkswagen", "Toyota", "BMW", "Audi", "Renault", "Skoda", "Ford", "Opel", "Kia"]
+FUELS = ["petrol", "diesel", "hybrid", "electric"]
+
+
+def write_catalog(path: str) -> None:
+    cars = []
+    for i in range(N_CARS):
+        brand = random.choice(BRANDS)
+        cars.append({
+            "title": f"{brand} synthetic car {i}",
+            "brand": brand,
+            "year_numeric": random.randint(2005, 2024),
+            "mileage_numeric": random.randint(5_000, 300_000),
+            "price_numeric": random.randint(1_500, 60_000),
+            "power_kw": random.randint(50, 250),
+            "fuel_type": random.choice(FUELS),
+            "gearbox": random.choice(["manual", "automatic"]),
+            "details_url": f"https://example.com/listing/{i}",
+        })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cars, f)
+
+
+def pss_kb() -> int:
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def worker(path: str, shared: bool, barrier, results) -> None:
+    from app.catalog import _file_key, load_snapshot
+    from app.catalog_pages import _sort_order
+    from app.shared_catalog import shared_snapshot
+
+    before = pss_kb()
+    started = time.perf_counter()
+    if shared:
+        snapshot = shared_snapshot(path, _file_key(path), load_snapshot)
+    else:
+        snapshot = load_snapshot(path)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    # Touch what requests touch: columns, a sort order, some cars
+    float(snapshot.price.sum() + snapshot.age.sum())
+    _sort_order(snapshot, "-price")
+    [snapshot.cars[i] for i in range(0, snapshot.size, max(1, snapshot.size // 100))]
+
+    barrier.wait()  # everyone mapped: PSS splits shared pages fairly
+    results.put((load_ms, pss_kb() - before))
+    barrier.wait()
+
+
+def run(path: str, shared: bool) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(WORKERS)
+    results = ctx.Queue()
+    processes = [ctx.Process(target=worker, args=(path, shared, barrier, results)) for _ in range(WORKERS)]
+    for process in processes:
+        process.start()
+    measured = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    loads = sorted(ms for ms, _ in measured)
+    total_mb = sum(kb for _, kb in measured) / 1024
+    print(
+        f"{'shared store' if shared else 'per process':<14}"
+        f"{total_mb:>10.1f} MB total {total_mb / WORKERS:>8.1f} MB/worker"
+        f"   load {loads[0]:>7.0f} .. {loads[-1]:>7.0f} ms"
+    )
+    if shared:
+        store = os.environ["CATALOG_SHARED_DIR"]
+        size = sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(store) for name in names
+        )
+        print(f"{'':<14}{size / 1024 / 1024:>10.1f} MB store files (once per machine, tmpfs)")
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix="catalog-bench-")
+    os.environ["CATALOG_SHARED_DIR"] = os.path.join(workdir, "shm")
+    path = os.path.join(workdir, "cars.json")
+    try:
+        write_catalog(path)
+
+        print("=" * 60)
+        print(f"🚗 CATALOG MEMORY ({N_CARS} cars, {WORKERS} workers)")
+        print("=" * 60)
+        print(f"Dataset file: {os.path.getsize(path) / 1024 / 1024:.1f} MB\n")
+        run(path, shared=False)
+        run(path, shared=True)
+        print("\n(the first shared worker publishes, the others wait and attach)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Local stand-in for the OpenAI chat completions API
+Use it to test the AI suggestion path without a real key or spend
+
+Run:
+    uvicorn scripts.fake_openai_server:app --port 8001
+
+Then start the API against it:
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=test \\
+        uvicorn app.main:app
+
+Environment:
+    FAKE_LLM_DELAY         seconds to "think" before answering (default 1.0)
+    FAKE_LLM_TOKEN_DELAY   seconds between streamed tokens (default 0.05)
+    FAKE_LLM_RATE_LIMIT    concurrent requests before answering 429 with
+                           Retry-After: 1, like a provider rate limit
+                           (default 0 = unlimited)
+
+Requests with "stream": true get an SSE stream of chat.completion.chunk
+objects, one word per chunk, like the real API.
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+FAKE_LLM_DELAY = float(os.getenv("FAKE_LLM_DELAY", "1.0"))
+FAKE_LLM_TOKEN_DELAY = float(os.getenv("FAKE_LLM_TOKEN_DELAY", "0.05"))
+FAKE_LLM_RATE_LIMIT = int(os.getenv("FAKE_LLM_RATE_LIMIT", "0"))
+
+app = FastAPI(title="Fake OpenAI API")
+
+# Simple counters so tests can check how many calls reached "upstream"
+stats = {"requests": 0, "in_flight": 0, "max_in_flight": 0, "rate_limited": 0}
+
+
+def _reply_text(messages) -> str:
+    last = messages[-1]["content"] if messages else ""
+    return (
+        "Based on your request, the first car in the list looks like the "
+        f"best match. (fake reply to {len(last)} prompt chars) "
+        "What matters more to you, price or mileage?"
+    )
+
+
+async def _stream_chunks(text: str, model: str):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+    def chunk(delta: dict, finish_reason=None) -> str:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload)}\n\n"
+
+    yield chunk({"role": "assistant", "content": ""})
+    for word in text.split(" "):
+        await asyncio.sleep(FAKE_LLM_TOKEN_DELAY)
+        yield chunk({"content": word + " "})
+    yield chunk({}, finish_reason="stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+
+    stats["requests"] += 1
+
+    if FAKE_LLM_RATE_LIMIT and stats["in_flight"] >= FAKE_LLM_RATE_LIMIT:
+        stats["rate_limited"] += 1
+        return JSONResponse(
+            status_code=429,
+            headers={"Retry-After": "1"},
+            content={"error": {
+                "message": "Rate limit reached (fake)",
+                "type": "requests",
+                "code": "rate_limit_exceeded",
+            }},
+        )
+
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        await asyncio.sleep(FAKE_LLM_DELAY)
+    finally:
+        stats["in_flight"] -= 1
+
+    text = _reply_text(body.get("messages", []))
+
+    if body.get("stream"):
+        return StreamingResponse(
+            _stream_chunks(text, body.get("model", "fake-model")),
+            media_type="text/event-stream",
+        )
+
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake-model"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": text},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return stats
@@ -0,0 +1,65 @@
+"""
+Fire concurrent /ai-suggest/ requests and check they overlap
+Runs directly from terminal against a running API
+
+1. uvicorn scripts.fake_openai_server:app --port 8001
+2. OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=test uvicorn app.main:app --port 8000
+3. python scripts/test_ai_concurrency.py
+
+With a non-blocking client, N concurrent calls take about one LLM
+delay in total instead of N delays.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+API_URL = os.getenv("API_URL", "http://127.0.0.1:8000")
+CONCURRENCY = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+PROMPTS = [
+    "cheap diesel family car",
+    "German car for daily commute",
+    "reliable japanese hatchback",
+    "electric car for the city",
+    "BMW or Audi with low mileage",
+]
+
+
+async def one_call(client: httpx.AsyncClient, i: int) -> float:
+    started = time.perf_counter()
+    response = await client.post(
+        f"{API_URL}/ai-suggest/",
+        json={"prompt": PROMPTS[i % len(PROMPTS)], "budget": 20000 + i},
+    )
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def main():
+    print("=" * 60)
+    print(f"🚗 {CONCURRENCY} CONCURRENT /ai-suggest/ CALLS")
+    print("=" * 60)
+
+    async with httpx.AsyncClient(timeout=120) as client:
+        started = time.perf_counter()
+        durations = await asyncio.gather(
+            *(one_call(client, i) for i in range(CONCURRENCY))
+        )
+        total = time.perf_counter() - started
+
+    print(f"Slowest single call : {max(durations):.2f}s")
+    print(f"Sum of call times   : {sum(durations):.2f}s")
+    print(f"Wall clock total    : {total:.2f}s")
+
+    if total < sum(durations) / 2:
+        print("✅ RESULT: calls overlapped")
+    else:
+        print("❌ RESULT: calls serialized")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""
+Check /ai-suggest/stream against the fake streaming LLM
+Runs directly from terminal against a running API
+
+1. uvicorn scripts.fake_openai_server:app --port 8001
+2. OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=test uvicorn app.main:app --port 8000
+3. python scripts/test_ai_stream.py
+
+The candidates event should arrive after local retrieval only,
+long before the fake LLM's FAKE_LLM_DELAY is over.
+"""
+
+import json
+import os
+import time
+
+import httpx
+
+API_URL = os.getenv("API_URL", "http://127.0.0.1:8000")
+
+print("=" * 60)
+print("🚗 /ai-suggest/stream TIMING TEST")
+print("=" * 60)
+
+started = time.perf_counter()
+timings = {}
+reply = ""
+event = None
+
+with httpx.stream(
+    "POST",
+    f"{API_URL}/ai-suggest/stream",
+    json={"prompt": "cheap diesel family car", "budget": 20000},
+    timeout=120,
+) as response:
+    response.raise_for_status()
+
+    for line in response.iter_lines():
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+            timings.setdefault(event, time.perf_counter() - started)
+        elif line.startswith("data: "):
+            data = json.loads(line[len("data: "):])
+            if event == "candidates":
+                print(f"Candidates: {[c['title'] for c in data['candidates']]}")
+            elif event == "token":
+                reply += data["text"]
+            elif event == "error":
+                print(f"❌ Error event: {data['message']}")
+
+print(f"\nReply: {reply}\n")
+for name in ("candidates", "token", "done"):
+    if name in timings:
+        print(f"First '{name}' event after {timings[name] * 1000:8.1f} ms")
+
+if timings.get("candidates", 1e9) < timings.get("token", 0):
+    print("✅ RESULT: candidates streamed before the LLM answered")
+else:
+    print("❌ RESULT: nothing arrived before the LLM answer")
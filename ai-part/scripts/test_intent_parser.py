@@ -0,0 +1,49 @@
+"""
+Check the prompt -> filters parser (app/intent.py)
+Runs directly from terminal (no server needed)
+
+    python scripts/test_intent_parser.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.intent import parse_intent
+
+# (prompt, expected subset of parse_intent(prompt))
+CASES = [
+    # Negated terms are not filters
+    ("no diesel please", {"fuels": []}),
+    ("diesel, no petrol", {"fuels": ["diesel"]}),
+    ("not a manual", {"gearbox": None}),
+    ("automatic, without manual gearbox", {"gearbox": "automatic"}),
+    ("anything except bmw", {"brands": []}),
+    ("audi or mercedes, not bmw", {"brands": ["Audi", "Mercedes"]}),
+    ("not german", {"brands": []}),
+    # "auto" alone is not a gearbox ("auto" = car)
+    ("cheap auto for commuting", {"gearbox": None}),
+    ("automatic", {"gearbox": "automatic"}),
+    # "from N" next to a currency / price word is an amount
+    ("cheap car from 2000 euro", {"min_year": None}),
+    ("something from 2000€", {"min_year": None}),
+    ("price from 2000", {"min_year": None}),
+    ("bmw from 2016", {"min_year": 2016, "brands": ["BMW"]}),
+    ("from 3000 eur, from 2012", {"min_year": 2012}),
+    ("newer than 2015", {"min_year": 2016}),
+]
+
+print("=" * 60)
+print("🚗 INTENT PARSER CHECK")
+print("=" * 60)
+
+failures = 0
+for prompt, expected in CASES:
+    parsed = parse_intent(prompt)
+    got = {key: parsed[key] for key in expected}
+    ok = got == expected
+    failures += not ok
+    print(f"{'✅' if ok else '❌'} {prompt!r}: {got}" + ("" if ok else f" (expected {expected})"))
+
+print(f"\n{'✅ all cases passed' if not failures else f'❌ {failures} failed'}")
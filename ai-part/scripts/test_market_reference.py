@@ -0,0 +1,76 @@
+"""
+Check market-cube valuations of premium cars in a budget-heavy catalog
+Runs directly from terminal (no server needed)
+
+    python scripts/test_market_reference.py
+
+A premium car must never be priced from the median of budget cars:
+every fallback segment keeps the brand or its tier, and without one
+the rule-based estimate is used.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.ai_calculations import estimate_market_value
+from app.catalog import CatalogSnapshot
+from app.market_cube import MarketCube
+
+
+def listing(i: int, brand: str, price: int, year: int = 2020, fuel: str = "diesel") -> dict:
+    return {
+        "title": f"{brand} listing {i}",
+        "url": f"https://example.com/{i}",
+        "brand": brand,
+        "year_numeric": year,
+        "mileage_numeric": 60000,
+        "price_numeric": price,
+        "fuel_type": fuel,
+    }
+
+
+budget_cars = [listing(i, ("Dacia", "Skoda", "Kia")[i % 3], 6000 + i * 10) for i in range(60)]
+bmw = {**listing(999, "BMW", 35000), "title": "BMW 330e 2020"}
+
+checks = []
+
+# 1. Only budget cars: no brand / tier segment for a BMW -> rule-based
+cube = MarketCube.build(CatalogSnapshot(budget_cars, "budget-only"))
+checks.append((
+    "no premium listings: no market reference",
+    cube.lookup(bmw) is None,
+))
+checks.append((
+    "no premium listings: rule-based estimate",
+    estimate_market_value(bmw, cube) == estimate_market_value(bmw),
+))
+
+# 2. A few premium cars of other brands: priced from the premium tier
+premium = [listing(100 + i, ("Audi", "Mercedes", "Tesla")[i], 30000 + i * 1000) for i in range(3)]
+cube = MarketCube.build(CatalogSnapshot(budget_cars + premium, "with-premium"))
+reference = cube.lookup(bmw)
+checks.append((
+    "premium tier reference, not budget median",
+    reference is not None and reference["segment"][0] == "tier" and reference["median"] >= 30000,
+))
+checks.append((
+    "estimate above the budget median",
+    estimate_market_value(bmw, cube) > 20000,
+))
+
+# 3. Budget cars still use their own comparables
+checks.append((
+    "budget car priced from its brand segment",
+    cube.lookup(listing(5000, "Skoda", 6500))["segment"][0] == "brand",
+))
+
+print("=" * 60)
+print("🚗 MARKET REFERENCE: PREMIUM CAR IN A BUDGET CATALOG")
+print("=" * 60)
+for name, ok in checks:
+    print(f"{'✅' if ok else '❌'} {name}")
+
+failed = sum(not ok for _, ok in checks)
+print(f"\n{'✅ all checks passed' if not failed else f'❌ {failed} failed'}")
@@ -0,0 +1,126 @@
+"""
+Check /analyze-cars/stream with a large generated NDJSON feed
+Runs directly from terminal against a running API
+
+1. uvicorn app.main:app --port 8000
+2. python scripts/test_ndjson_stream.py [cars]
+
+The feed is uploaded slowly (UPLOAD_DELAY per 500 lines) while the
+response is read on the same connection, so the first results should
+arrive long before the upload is finished. httpx sends the whole body
+before reading the response, so this uses h11 (installed with httpx)
+directly.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import urlparse
+
+import h11
+
+API_URL = os.getenv("API_URL", "http://127.0.0.1:8000")
+N_CARS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+UPLOAD_DELAY = float(os.getenv("UPLOAD_DELAY", "0.05"))
+
+BRANDS = ["Volkswagen", "Toyota", "BMW", "Audi", "Renault", "Skoda", "Ford"]
+FUELS = ["petrol", "diesel", "hybrid", "electric"]
+
+
+def feed_line(i: int) -> bytes:
+    if i % 1000 == 999:
+        return b'{"title": "broken line"\n'  # invalid JSON on purpose
+    brand = random.choice(BRANDS)
+    car = {
+        "title": f"{brand} feed car {i}",
+        "brand": brand,
+        "year_numeric": random.randint(2005, 2024),
+        "mileage_numeric": random.randint(5_000, 300_000),
+        "price_numeric": random.randint(1_500, 60_000),
+        "fuel_type": random.choice(FUELS),
+    }
+    return (json.dumps(car) + "\n").encode("utf-8")
+
+
+async def main():
+    url = urlparse(API_URL)
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    conn = h11.Connection(h11.CLIENT)
+    started = time.perf_counter()
+    upload_done = None
+
+    writer.write(conn.send(h11.Request(
+        method="POST",
+        target="/analyze-cars/stream",
+        headers=[
+            ("Host", url.netloc),
+            ("Content-Type", "application/x-ndjson"),
+            ("Transfer-Encoding", "chunked"),
+        ],
+    )))
+
+    async def upload():
+        nonlocal upload_done
+        for first in range(0, N_CARS, 500):
+            batch = b"".join(feed_line(i) for i in range(first, min(first + 500, N_CARS)))
+            writer.write(conn.send(h11.Data(data=batch)))
+            await writer.drain()
+            await asyncio.sleep(UPLOAD_DELAY)
+        writer.write(conn.send(h11.EndOfMessage()))
+        await writer.drain()
+        upload_done = time.perf_counter() - started
+
+    first_result = None
+    results = errors = 0
+    summary = None
+
+    async def download():
+        nonlocal first_result, results, errors, summary
+        pending = b""
+        while True:
+            event = conn.next_event()
+            if event is h11.NEED_DATA:
+                conn.receive_data(await reader.read(65536))
+                continue
+            if isinstance(event, h11.Response) and event.status_code != 200:
+                raise RuntimeError(f"HTTP {event.status_code}")
+            if isinstance(event, h11.EndOfMessage):
+                return
+            if not isinstance(event, h11.Data):
+                continue
+
+            *lines, pending = (pending + event.data).split(b"\n")
+            for line in lines:
+                record = json.loads(line)
+                if "summary" in record:
+                    summary = record["summary"]
+                    continue
+                if first_result is None:
+                    first_result = time.perf_counter() - started
+                if "error" in record:
+                    errors += 1
+                else:
+                    results += 1
+
+    await asyncio.gather(upload(), download())
+    writer.close()
+    total = time.perf_counter() - started
+
+    print("=" * 60)
+    print(f"🚗 NDJSON BULK ANALYSIS ({N_CARS} cars)")
+    print("=" * 60)
+    print(f"First result after:  {first_result:.3f}s")
+    print(f"Upload finished at:  {upload_done:.3f}s")
+    print(f"Last result after:   {total:.3f}s")
+    print(f"Analyzed: {results}, errors: {errors}")
+    print(f"Summary: {summary}")
+
+    ok = results + errors == N_CARS and errors == N_CARS // 1000
+    print(f"\n{'✅' if ok else '❌'} one output line per input line")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
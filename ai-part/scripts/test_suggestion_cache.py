@@ -0,0 +1,81 @@
+"""
+Check that a dataset change invalidates cached /ai-suggest/ answers
+Runs directly from terminal (no server, no OpenAI key needed)
+
+    python scripts/test_suggestion_cache.py
+
+Works on a copy of the dataset; the LLM call is replaced by a
+generator that records which catalog version it answered for.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app.catalog as catalog
+import app.suggestion_cache as suggestion_cache
+from app.ai_calculations import DATA_PATH
+from app.catalog import get_catalog
+
+calls = []
+
+
+async def fake_generate(prompt, budget=None):
+    """Stands in for retrieval + LLM: answers with the catalog version"""
+    version = get_catalog().version
+    calls.append(version)
+    return {
+        "suggestion": f"answer for {version}",
+        "candidates": [],
+        "ok": True,
+        "fallback": False,
+        "prompt_tokens": 0,
+    }
+
+
+async def main() -> list:
+    ask = suggestion_cache.get_cached_ai_suggestion
+    checks = []
+
+    first = await ask("cheap diesel family car", 15000)
+    again = await ask("Family car, cheap, diesel!", 15000)
+    checks.append(("same dataset: second prompt is a hit", again["cached"] and len(calls) == 1))
+
+    # Append a listing: new file content, new catalog version
+    with open(catalog.DATA_PATH, encoding="utf-8") as f:
+        cars = json.load(f)
+    cars.append({**cars[0], "title": "Extra listing", "price_numeric": 9999})
+    with open(catalog.DATA_PATH, "w", encoding="utf-8") as f:
+        json.dump(cars, f)
+
+    after = await ask("cheap diesel family car", 15000)
+    checks.append(("dataset changed: miss", not after["cached"] and len(calls) == 2))
+    checks.append(("answer generated for the new version", after["suggestion"] != first["suggestion"]))
+
+    cached = await ask("cheap diesel family car", 15000)
+    checks.append(("new version is cached again", cached["cached"] and len(calls) == 2))
+    return checks
+
+
+workdir = tempfile.mkdtemp(prefix="suggestion-cache-")
+try:
+    catalog.DATA_PATH = os.path.join(workdir, "cars.json")
+    shutil.copy(DATA_PATH, catalog.DATA_PATH)
+    suggestion_cache.generate_suggestion = fake_generate
+    results = asyncio.run(main())
+finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+print("=" * 60)
+print("🚗 SUGGESTION CACHE: DATASET CHANGE")
+print("=" * 60)
+for name, ok in results:
+    print(f"{'✅' if ok else '❌'} {name}")
+
+failed = sum(not ok for _, ok in results)
+print(f"\n{'✅ all checks passed' if not failed else f'❌ {failed} failed'}")